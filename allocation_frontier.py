@@ -0,0 +1,185 @@
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import everest_wealth
+import everest_yield
+import tax_curves
+import tax_years
+
+MONTHS_PER_YEAR = 12
+HORIZON_YEARS = everest_wealth.TERM_YEARS  # Splits are compared at the end of an Everest term
+OPTIONS = ["Retirement Annuity", *everest_yield.PRODUCTS, "Savings"]
+INTEREST_EXEMPTION = 23800  # Annual interest exempt from tax under 65
+INTEREST_EXEMPTION_65 = 34500  # From 65
+LUMP_SUM_STEP = everest_wealth.INVESTMENT_INCREMENT  # Finest step of a lump sum grid, so Everest amounts stay valid
+MONTHLY_STEP = 100  # Finest step of a monthly surplus grid
+MAX_GRID_STEPS = 400  # Steps along each axis; the step widens in whole finest steps for larger amounts
+SPLIT_COLUMNS = [
+    "Retirement Annuity (R)", "Everest Product", "Everest (R)", "Savings (R)", "Broker Commission (R)",
+    "RA Tax Saving per Tax Year (R)", "RA Excess Carried Forward per Tax Year (R)", "Accessible Now (%)", "After-Tax Value (R)"
+]
+
+def allocation_grid(amount, monthly=False, investor_pays_commission=True):
+    """Every split of amount between an RA, one Everest product and savings on the grid, as arrays of RA amount, Everest amount and product.
+
+    product indexes everest_yield.PRODUCTS. Everest amounts are 0 or at least the minimum in whole
+    increments, and with the commission paid by the investor it must fit in the amount too. A
+    monthly surplus cannot meet the Everest minimum, so monthly splits are between the RA and savings.
+    """
+    finest = MONTHLY_STEP if monthly else LUMP_SUM_STEP
+    step = finest * max(1, int(np.ceil(amount / finest / MAX_GRID_STEPS)))
+    ra = np.unique(np.append(np.arange(0, amount, step), amount))
+    if monthly or amount < everest_wealth.MINIMUM_INVESTMENT:
+        return ra, np.zeros(len(ra)), np.zeros(len(ra), dtype=np.int64)
+    everest = np.append(0.0, np.arange(everest_wealth.MINIMUM_INVESTMENT, amount + 1, step))
+    commissions = np.array([everest_yield.product_terms(product)[1] for product in everest_yield.PRODUCTS])
+    ra, everest, product = (grid.ravel() for grid in np.meshgrid(ra, everest, np.arange(len(commissions)), indexing="ij"))
+    cost = everest * (1 + commissions[product] * investor_pays_commission)
+    # Without an Everest investment the product makes no difference, so keep one of them
+    keep = (ra + cost <= amount + 1e-6) & ((everest > 0) | (product == 0))
+    return ra[keep], everest[keep], product[keep]
+
+def evaluate(ra, everest, product, amount, income, age, existing_ra=0.0, monthly=False, ra_return=0.09, savings_rate=0.08,
+             retirement_tax_rate=0.18, investor_pays_commission=True, dividend_tax_rate=everest_wealth.DIVIDEND_TAX_RATE,
+             tax_year=tax_years.BASE_TAX_YEAR):
+    """After-tax outcome of each split at the end of HORIZON_YEARS, stepping every split through the months at once.
+
+    The RA saves the PAYE its contribution deducts, worked out on the tax curves so the 27.5% and
+    R350,000 limits (after existing_ra) and any change of bracket are exact; contributions above
+    the limit save nothing now and are carried forward. The saving is refunded on assessment at
+    the end of each contribution year and saved. The RA grows at ra_return and is valued net of
+    retirement_tax_rate, the tax expected on its benefits.
+
+    Everest pays its income monthly after dividend tax into savings and returns the capital and any
+    after-tax bonus at the end of the term. The broker commission is paid on top of the investment
+    when investor_pays_commission. Savings earn savings_rate, with interest above the annual
+    exemption taxed at the marginal rate each year.
+
+    A lump sum is invested today; a monthly surplus (with ra the RA's monthly share) is invested
+    at the end of every month. Returns a dict of arrays, one value per split.
+    """
+    ra, everest = np.asarray(ra, dtype=float), np.asarray(everest, dtype=float)
+    terms = np.array([everest_yield.product_terms(name) for name in everest_yield.PRODUCTS])[np.asarray(product)]
+    commission = everest * terms[:, 1]
+    deposit = amount - ra - everest - np.where(investor_pays_commission, commission, 0.0)
+    annual_ra = ra * (MONTHS_PER_YEAR if monthly else 1)
+    without = tax_curves.salary_tax(income, existing_ra, age, 0, tax_year)
+    with_ra = tax_curves.salary_tax(income, existing_ra + annual_ra, age, 0, tax_year)
+    tax_saving = without["paye_before_mtc"] - with_ra["paye_before_mtc"]
+    limit = min(income * tax_years.RA_DEDUCTION_RATE, tax_years.RA_DEDUCTION_CAP)
+    carried_forward = np.maximum(0, existing_ra + annual_ra - limit) - max(0, existing_ra - limit)
+    marginal_rate = float(without["marginal_rate"])
+    exemption = INTEREST_EXEMPTION_65 if age >= 65 else INTEREST_EXEMPTION
+
+    ra_growth = (1 + ra_return) ** (1 / MONTHS_PER_YEAR) - 1
+    savings_growth = (1 + savings_rate) ** (1 / MONTHS_PER_YEAR) - 1
+    everest_income = everest * terms[:, 0] / MONTHS_PER_YEAR * (1 - dividend_tax_rate)
+    ra_value = np.zeros(len(ra)) if monthly else ra.copy()
+    savings = np.zeros(len(ra)) if monthly else deposit.copy()
+    interest_tax = np.zeros(len(ra))
+    year_interest = np.zeros(len(ra))
+    for month in range(1, HORIZON_YEARS * MONTHS_PER_YEAR + 1):
+        interest = savings * savings_growth
+        year_interest += interest
+        ra_value = ra_value * (1 + ra_growth) + (ra if monthly else 0)
+        savings = savings + interest + everest_income + (deposit if monthly else 0)
+        if month % MONTHS_PER_YEAR == 0:
+            tax = np.maximum(0, year_interest - exemption) * marginal_rate
+            interest_tax += tax
+            savings = savings - tax + (tax_saving if monthly or month == MONTHS_PER_YEAR else 0)
+            year_interest[:] = 0
+    everest_value = everest + everest * terms[:, 2] * (1 - dividend_tax_rate)
+    invested = amount * (HORIZON_YEARS * MONTHS_PER_YEAR if monthly else 1)
+    return {
+        "ra": ra,
+        "everest": everest,
+        "product": np.asarray(product),
+        "savings": deposit,
+        "commission": commission,
+        "tax_saving": tax_saving,
+        "carried_forward": carried_forward,
+        "interest_tax": interest_tax,
+        "accessible": deposit / amount if amount > 0 else np.ones(len(ra)),
+        "ra_value": ra_value * (1 - retirement_tax_rate),
+        "savings_value": savings,
+        "everest_value": everest_value,
+        "after_tax_value": ra_value * (1 - retirement_tax_rate) + savings + everest_value,
+        "invested": invested
+    }
+
+def efficient_frontier(accessible, value):
+    """Positions of the splits no other split beats on both accessible share and value, from most accessible to least.
+
+    Splits are sorted by accessible share, best value first among equals; a split is on the
+    frontier when it is worth more than every split at least as accessible.
+    """
+    order = np.lexsort((-value, -accessible))
+    best_before = np.maximum.accumulate(np.concatenate([[-np.inf], value[order][:-1]]))
+    return order[value[order] > best_before]
+
+def split_frame(outcome, positions):
+    """The chosen splits as rows of SPLIT_COLUMNS.
+
+    Amounts are per month for a monthly surplus, except the RA tax saving and excess carried
+    forward, which are a tax year's since the deduction is worked out on a year's contributions.
+    """
+    products = np.array(everest_yield.PRODUCTS)[outcome["product"][positions]]
+    return pd.DataFrame({
+        "Retirement Annuity (R)": outcome["ra"][positions],
+        "Everest Product": np.where(outcome["everest"][positions] > 0, products, "None"),
+        "Everest (R)": outcome["everest"][positions],
+        "Savings (R)": outcome["savings"][positions],
+        "Broker Commission (R)": outcome["commission"][positions],
+        "RA Tax Saving per Tax Year (R)": outcome["tax_saving"][positions],
+        "RA Excess Carried Forward per Tax Year (R)": outcome["carried_forward"][positions],
+        "Accessible Now (%)": outcome["accessible"][positions] * 100,
+        "After-Tax Value (R)": outcome["after_tax_value"][positions]
+    })
+
+def optimise(amount, income, age, monthly=False, **assumptions):
+    """Evaluate every split of amount on the grid and return the frontier and best split.
+
+    assumptions are passed to evaluate. Returns the efficient frontier and the best split as
+    frames of SPLIT_COLUMNS, the number of splits evaluated and the outcome arrays.
+    """
+    ra, everest, product = allocation_grid(amount, monthly, assumptions.get("investor_pays_commission", True))
+    outcome = evaluate(ra, everest, product, amount, income, age, monthly=monthly, **assumptions)
+    frontier = efficient_frontier(outcome["accessible"], outcome["after_tax_value"])
+    return {
+        "splits": len(ra),
+        "outcome": outcome,
+        "frontier": split_frame(outcome, frontier[::-1]),
+        "best": split_frame(outcome, [int(outcome["after_tax_value"].argmax())])
+    }
+
+def benchmark(amount, income=900000, age=45, seed=0):
+    """Time the grid for a lump sum and a monthly surplus and check the all-Everest corner against calculate_investment_results."""
+    start = time.perf_counter()
+    lump = optimise(amount, income, age)
+    lump_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    monthly = optimise(amount / 100, income, age, monthly=True)
+    monthly_seconds = time.perf_counter() - start
+
+    # With no interest and the commission paid by Everest, an all-Onyx split is calculate_investment_results
+    invested = everest_wealth.MINIMUM_INVESTMENT * 3
+    corner = evaluate([0.0], [invested], [0], invested, income, age, savings_rate=0.0, investor_pays_commission=False)
+    direct = everest_wealth.calculate_investment_results(invested, everest_yield.PRODUCTS[0])
+    return {
+        "amount": amount,
+        "lump_sum_splits": lump["splits"],
+        "lump_sum_seconds": lump_seconds,
+        "monthly_splits": monthly["splits"],
+        "monthly_seconds": monthly_seconds,
+        "frontier_points": len(lump["frontier"]),
+        "best_split": lump["best"].iloc[0].to_dict(),
+        "everest_difference": float(abs(corner["after_tax_value"][0] - invested - direct["net_total_return"]))
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the allocation grid and report the best split of a lump sum.")
+    parser.add_argument("--amount", type=float, default=2000000, help="Lump sum to allocate (default: 2000000)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.amount), indent=2, default=str))
@@ -0,0 +1,188 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+import io
+import allocation_frontier
+import everest_wealth
+import excel_exports
+import memory_profile
+import validation
+
+MAX_CHART_POINTS = 2000  # Splits sampled for the chart's background; the frontier is always drawn in full
+CHART_SEED = 0
+
+RESULTS_KEY = "allocation_optimizer_results"
+INPUT_SCHEMA = validation.schema({
+    "name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "amount": validation.field("Amount to Allocate (R)", minimum=0, exclusive_minimum=True),
+    "income": validation.field("Annual Taxable Income (R)", minimum=0),
+    "age": validation.field("Client's Age", minimum=18, maximum=120),
+    "existing_ra": validation.field("RA Contributions Already Made This Tax Year (R)", minimum=0)
+})
+
+def build_allocation_workbook(best, frontier, assumptions):
+    """Write the best split, the efficient frontier and the assumptions to Excel and return the workbook bytes."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        best.to_excel(writer, index=False, sheet_name="Best Split")
+        frontier.to_excel(writer, index=False, sheet_name="Efficient Frontier")
+        pd.DataFrame(assumptions).to_excel(writer, index=False, sheet_name="Assumptions")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains the best split of the amount and the efficient frontier of splits.",
+                "Each frontier row is the highest after-tax value for the share kept accessible.",
+                "For a monthly surplus the amounts are per month, except the RA tax saving and excess carried forward, which are per tax year.",
+                "To chart the frontier, select the 'Accessible Now (%)' and 'After-Tax Value (R)' columns and use Insert > Scatter Chart."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the allocation inputs and store the optimised splits in session state on submit."""
+    st.write("Find the split between a retirement annuity, Everest Wealth products and savings that leaves the client with the most after tax.")
+    st.markdown(
+        f"<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>Note: Splits are compared after {allocation_frontier.HORIZON_YEARS} years, the Everest term. "
+        "RA tax savings use 2024/2025 SARS tables and the 27.5% / R350,000 deduction limit. Verify with a tax professional for your specific case.</p>",
+        unsafe_allow_html=True
+    )
+    name = st.text_input("Client's Name", key="allocation_name")
+    mode = st.radio("Allocate", ["Lump Sum", "Monthly Surplus"], horizontal=True, key="allocation_mode")
+    amount = st.number_input("Amount to Allocate (R)", min_value=0.0, step=5000.0, value=1000000.0 if mode == "Lump Sum" else 10000.0, key=f"allocation_amount_{mode}")
+    income = st.number_input("Annual Taxable Income (R)", min_value=0.0, step=1000.0, value=900000.0)
+    age = st.number_input("Client's Age", min_value=18, max_value=120, step=1, value=45)
+    existing_ra = st.number_input("RA Contributions Already Made This Tax Year (R)", min_value=0.0, step=1000.0)
+    if mode == "Monthly Surplus":
+        st.markdown(
+            f"<p style='font-size: 14px; color: #888888;'>Everest Wealth products need a lump sum of at least R {everest_wealth.MINIMUM_INVESTMENT:,}, so a monthly surplus is split between the RA and savings.</p>",
+            unsafe_allow_html=True
+        )
+    with st.expander("Assumptions"):
+        ra_return = st.number_input("RA Return (% p.a.)", min_value=0.0, max_value=30.0, value=9.0, step=0.5) / 100
+        savings_rate = st.number_input("Savings Interest Rate (% p.a.)", min_value=0.0, max_value=30.0, value=8.0, step=0.25) / 100
+        retirement_tax_rate = st.number_input("Tax on RA Benefits at Retirement (%)", min_value=0.0, max_value=45.0, value=18.0, step=1.0) / 100
+        investor_pays_commission = st.checkbox("Investor pays the Everest broker commission", value=True)
+
+    if st.button("Find Best Split"):
+        errors = validation.validate_inputs({"name": name, "amount": amount, "income": income, "age": age, "existing_ra": existing_ra}, INPUT_SCHEMA)
+        if errors:
+            for error in errors:
+                st.error(error)
+        else:
+            try:
+                with memory_profile.track(__name__, "calculation"):
+                    monthly = mode == "Monthly Surplus"
+                    optimised = allocation_frontier.optimise(
+                        amount, income, age, monthly=monthly, existing_ra=existing_ra, ra_return=ra_return, savings_rate=savings_rate,
+                        retirement_tax_rate=retirement_tax_rate, investor_pays_commission=investor_pays_commission
+                    )
+                    outcome = optimised["outcome"]
+                    sample = np.random.default_rng(CHART_SEED).choice(len(outcome["ra"]), min(MAX_CHART_POINTS, len(outcome["ra"])), replace=False)
+                    assumptions = {
+                        "Assumption": [
+                            "Allocate", "Amount (R)", "Annual Taxable Income (R)", "Age", "RA Contributions Already Made (R)", "RA Return (%)",
+                            "Savings Interest Rate (%)", "Tax on RA Benefits (%)", "Investor Pays Commission", "Horizon (Years)", "Splits Evaluated"
+                        ],
+                        "Value": [
+                            mode, amount, income, age, existing_ra, ra_return * 100, savings_rate * 100, retirement_tax_rate * 100,
+                            "Yes" if investor_pays_commission else "No", allocation_frontier.HORIZON_YEARS, optimised["splits"]
+                        ]
+                    }
+                    st.session_state[RESULTS_KEY] = {
+                        "name": name,
+                        "monthly": monthly,
+                        "amount": amount,
+                        "invested": outcome["invested"],
+                        "splits": optimised["splits"],
+                        "best": optimised["best"],
+                        "frontier": optimised["frontier"],
+                        "sample": pd.DataFrame({
+                            "Accessible Now (%)": outcome["accessible"][sample] * 100,
+                            "After-Tax Value (R)": outcome["after_tax_value"][sample]
+                        }),
+                        "workbook_args": (optimised["best"], optimised["frontier"], assumptions)
+                    }
+            except Exception as e:
+                st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+@st.fragment
+@memory_profile.tracked("figures")
+def show_results():
+    """Render the most recently optimised split and frontier from session state without recalculating them."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    best = results["best"].iloc[0]
+    period = " per month" if results["monthly"] else ""
+    st.success("--- Allocation Summary ---")
+    st.write(f"**Client**: {results['name']}")
+    st.write(f"**Amount to Allocate**: R {results['amount']:,.2f}{period}")
+    st.write(f"**Splits Evaluated**: {results['splits']:,}")
+    st.write("**Best Split**")
+    st.write(f"- Retirement Annuity: R {best['Retirement Annuity (R)']:,.2f}{period}")
+    if best["Everest (R)"] > 0:
+        st.write(f"- {best['Everest Product']}: R {best['Everest (R)']:,.2f} (broker commission R {best['Broker Commission (R)']:,.2f})")
+    st.write(f"- Savings: R {best['Savings (R)']:,.2f}{period}")
+    tax_year = " per Tax Year" if results["monthly"] else ""
+    st.write(f"**RA Tax Saving{tax_year}**: R {best['RA Tax Saving per Tax Year (R)']:,.2f}")
+    if best["RA Excess Carried Forward per Tax Year (R)"] > 0:
+        st.write(f"**RA Excess Carried Forward{tax_year}**: R {best['RA Excess Carried Forward per Tax Year (R)']:,.2f}")
+    st.write(f"**After-Tax Value After {allocation_frontier.HORIZON_YEARS} Years**: R {best['After-Tax Value (R)']:,.2f} (R {results['invested']:,.2f} invested)")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=results["sample"]["Accessible Now (%)"],
+        y=results["sample"]["After-Tax Value (R)"],
+        mode="markers",
+        name="Other Splits",
+        marker={"color": "#888888", "size": 4},
+        hovertemplate="Accessible: %{x:.1f}%<br>Value: R%{y:,.2f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=results["frontier"]["Accessible Now (%)"],
+        y=results["frontier"]["After-Tax Value (R)"],
+        mode="lines",
+        name="Efficient Frontier",
+        line={"color": "#1f77b4"},
+        hovertemplate="Accessible: %{x:.1f}%<br>Value: R%{y:,.2f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[best["Accessible Now (%)"]],
+        y=[best["After-Tax Value (R)"]],
+        mode="markers",
+        name="Best Split",
+        marker={"color": "#ff7f0e", "size": 12, "symbol": "star"}
+    ))
+    fig.update_layout(
+        title="After-Tax Value by Share Kept Accessible",
+        xaxis_title="Accessible Now (%)",
+        yaxis_title="After-Tax Value (R)",
+        showlegend=True,
+        paper_bgcolor="#4A4A4A",
+        plot_bgcolor="#4A4A4A",
+        font={'color': "white"},
+        yaxis={'tickfont': {'color': "white"}},
+        xaxis={'tickfont': {'color': "white"}}
+    )
+    st.plotly_chart(fig)
+    with st.expander("Efficient Frontier"):
+        st.dataframe(results["frontier"], use_container_width=True, hide_index=True)
+        if results["monthly"]:
+            st.markdown(
+                "<p style='font-size: 14px; color: #888888;'>Amounts are per month, except the RA tax saving and excess carried forward, which are per tax year.</p>",
+                unsafe_allow_html=True
+            )
+    st.markdown(
+        "<p style='font-size: 14px; color: #888888;'>Accessible means kept in savings rather than locked in the RA (until 55) or an Everest term. "
+        "RA benefits are valued after the assumed tax at retirement; Everest income is after 20% dividend tax and is saved as it is paid.</p>",
+        unsafe_allow_html=True
+    )
+    excel_exports.download_button("Download Allocation as Excel", "allocation_summary.xlsx", build_allocation_workbook, *results["workbook_args"])
+
+def show():
+    show_inputs()
+    show_results()
@@ -1,14 +1,24 @@
 import streamlit as st
-import ra_calculator
-import salary_calculator
-import budget_tool
-import retirement_calculator
-import estate_liquidity
-import everest_wealth
+import importlib
+import warmup
+import memory_profile
 
-# Add custom CSS for grey background and white text to match Navigate Wealth logo
-st.markdown(
-    """
+# Each tool renders its inputs and results as Streamlit fragments, so widget changes inside a tool
+# rerun only that fragment and this app shell is only rerun when the tool changes or a result is calculated.
+# Tools are imported by module name when first shown (or earlier by the warm-up), so the first page render does not wait for them
+TOOLS = {
+    "Allocation Optimizer": "allocation_optimizer",
+    "Budget Tool": "budget_tool",
+    "Estate Liquidity Tool": "estate_liquidity",
+    "Everest Wealth": "everest_wealth",
+    "Payroll Cost Calculator": "payroll_costs",
+    "RA Tax Rebate Calculator": "ra_calculator",
+    "Retirement Calculator": "retirement_calculator",
+    "Salary Tax Calculator": "salary_calculator"
+}
+
+# Custom CSS for grey background and white text to match Navigate Wealth logo
+APP_CSS = """
     <style>
     .stApp {
         background-color: #4A4A4A;
@@ -68,43 +78,45 @@ st.markdown(
         background-color: #333333;
         color: white;
     }
-    .stTextInput > label, .stNumberInput > label, .stSelectbox > label {
+    .stTextInput > label, .stNumberInput > label, .stSelectbox > label, .stRadio > label, .stFileUploader > label, .stTextArea > label {
         color: white;
     }
     .stMarkdown, .stMarkdown p {
         color: white;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+@st.cache_resource
+def load_logo():
+    """Read the logo once per server process instead of on every rerun."""
+    with open("logo.png", "rb") as logo_file:
+        return logo_file.read()
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """Start the background warm-up once per server process, without waiting for it (under serve.py it has already run)."""
+    return warmup.start(TOOLS.values())
+
+start_warmup()
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Center the logo using columns
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    st.image("logo.png", width=300)
+    st.image(load_logo(), width=300)
 st.markdown("<br>", unsafe_allow_html=True)
 st.title("Navigate Wealth Financial Tools")
 st.markdown("<p style='text-align: center; color: #CCCCCC;'>Powered by Navigate Wealth</p>", unsafe_allow_html=True)
 
-# Tool selection dropdown
-tool_options = ["Select a Tool", "Budget Tool", "Estate Liquidity Tool", "Everest Wealth", "RA Tax Rebate Calculator", "Retirement Calculator", "Salary Tax Calculator"]
-# Sort tools alphabetically, keeping "Select a Tool" as the first option
-tool_options = ["Select a Tool"] + sorted([tool for tool in tool_options if tool != "Select a Tool"])
+# Tool selection dropdown, sorted alphabetically with "Select a Tool" as the first option
+tool_options = ["Select a Tool"] + sorted(TOOLS)
 selected_tool = st.selectbox("Choose a Financial Tool:", tool_options)
 
 # Display the selected tool's interface
 if selected_tool == "Select a Tool":
     st.write("Please select a tool from the dropdown above to get started.")
-elif selected_tool == "RA Tax Rebate Calculator":
-    ra_calculator.show()
-elif selected_tool == "Salary Tax Calculator":
-    salary_calculator.show()
-elif selected_tool == "Budget Tool":
-    budget_tool.show()
-elif selected_tool == "Retirement Calculator":
-    retirement_calculator.show()
-elif selected_tool == "Estate Liquidity Tool":
-    estate_liquidity.show()
-elif selected_tool == "Everest Wealth":
-    everest_wealth.show()
+else:
+    importlib.import_module(TOOLS[selected_tool]).show()
+memory_profile.record_session(st.session_state)
+memory_profile.show_admin()
@@ -0,0 +1,163 @@
+import re
+import io
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Keyword rules used to categorise bank statement descriptions (matched case-insensitively on word boundaries)
+CATEGORY_RULES = {
+    "Groceries": ["checkers", "pick n pay", "pnp", "woolworths", "spar", "shoprite", "food lovers", "boxer"],
+    "Fuel": ["engen", "shell", "bp", "sasol", "caltex", "totalenergies", "astron"],
+    "Transport": ["uber", "bolt", "gautrain", "e-toll", "sanral", "taxi"],
+    "Housing": ["rent", "levy", "levies", "home loan", "bond repayment"],
+    "Utilities": ["eskom", "municipal", "prepaid electricity", "electricity", "water and sanitation", "city of"],
+    "Telecoms": ["vodacom", "mtn", "telkom", "cell c", "rain", "afrihost", "vumatel", "openserve"],
+    "Insurance": ["discovery insure", "outsurance", "santam", "hollard", "king price", "budget insurance", "old mutual", "sanlam", "momentum", "liberty"],
+    "Medical": ["pharmacy", "clicks", "dis-chem", "dischem", "doctor", "hospital", "medical aid", "discovery health", "bonitas"],
+    "Dining Out": ["restaurant", "nandos", "kfc", "mcdonalds", "steers", "wimpy", "spur", "uber eats", "mr d", "debonairs"],
+    "Entertainment": ["netflix", "showmax", "dstv", "spotify", "ster-kinekor", "nu metro", "apple.com", "google play"],
+    "Shopping": ["takealot", "mr price", "edgars", "makro", "game", "builders", "pep", "ackermans", "superbalist"],
+    "Education": ["school", "university", "tuition", "unisa", "creche"],
+    "Bank Fees": ["bank charges", "service fee", "monthly fee", "admin fee", "transaction fee"],
+    "Cash Withdrawals": ["atm", "cash withdrawal"]
+}
+UNCATEGORISED = "Other"
+DATE_COLUMNS = ["date", "transaction date", "posting date", "value date"]
+DESCRIPTION_COLUMNS = ["description", "narrative", "details", "transaction description", "reference"]
+
+@lru_cache(maxsize=16)
+def _compile_rules(frozen_rules):
+    """Compile frozen (category, keywords) pairs into one alternation regex and a keyword lookup."""
+    lookup = {}
+    for category, keywords in frozen_rules:
+        for keyword in keywords:
+            lookup[keyword.strip().lower()] = category
+    # Longest keywords first, so "uber eats" wins over "uber" at the same position
+    alternatives = sorted(lookup, key=len, reverse=True)
+    pattern = r"(?<!\w)(" + "|".join(re.escape(keyword) for keyword in alternatives) + r")(?!\w)"
+    return re.compile(pattern), lookup
+
+def compile_rules(rules=None):
+    """Return the combined regex and keyword-to-category lookup for a rules dict."""
+    rules = CATEGORY_RULES if rules is None else rules
+    return _compile_rules(tuple((category, tuple(keywords)) for category, keywords in rules.items()))
+
+def parse_custom_rules(text):
+    """Parse lines of the form 'Category: keyword, keyword' into a rules dict."""
+    rules = {}
+    for line in text.splitlines():
+        if ":" not in line:
+            continue
+        category, keywords = line.split(":", 1)
+        keywords = [keyword.strip() for keyword in keywords.split(",") if keyword.strip()]
+        if category.strip() and keywords:
+            rules.setdefault(category.strip(), []).extend(keywords)
+    return rules
+
+def merge_rules(custom_rules):
+    """Combine the default rules with custom ones; custom keywords override default categories."""
+    merged = {category: list(keywords) for category, keywords in CATEGORY_RULES.items()}
+    for category, keywords in custom_rules.items():
+        # Re-insert at the end so these keywords are looked up last and take precedence
+        merged[category] = merged.pop(category, []) + list(keywords)
+    return merged
+
+MAX_REPORTED_ROWS = 5  # Unreadable amounts listed in the error message
+
+def _clean_amounts(column):
+    """Convert a column of amounts such as 'R 1 234,50', '1.234,50', '-1,234.50' or '(50.00)' to floats.
+
+    A comma is the decimal separator when it is the only comma and is followed by one or two
+    digits; dots group thousands before such a comma or when repeated, and are otherwise the
+    decimal point, with commas separating thousands.
+    Parentheses mark a negative. Blank cells are zero. Raises ValueError naming the rows of any
+    other amount that cannot be read, rather than counting it as zero.
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float).fillna(0.0)
+    text = column.fillna("").astype(str).str.replace(r"[R\s\u00a0]", "", regex=True)
+    blank = text == ""
+    negative = text.str.match(r"^\(.*\)$")
+    text = text.where(~negative, text.str[1:-1])
+    thousands_dots = text.str.fullmatch(r"-?\d{1,3}((\.\d{3})+,\d{1,2}|(\.\d{3}){2,})")
+    decimal_comma = text.str.contains(r",\d{1,2}$", regex=True) & (text.str.count(",") == 1) & (thousands_dots | ~text.str.contains(".", regex=False))
+    text = text.where(~thousands_dots, text.str.replace(".", "", regex=False))
+    text = text.where(~decimal_comma, text.str.replace(",", ".", regex=False)).str.replace(",", "", regex=False)
+    amounts = pd.to_numeric(text, errors="coerce")
+    unreadable = amounts.isna() & ~blank
+    if unreadable.any():
+        rows = [f"row {position + 1} ('{column.iloc[position]}')" for position in np.flatnonzero(unreadable)[:MAX_REPORTED_ROWS]]
+        more = f" and {unreadable.sum() - MAX_REPORTED_ROWS} more" if unreadable.sum() > MAX_REPORTED_ROWS else ""
+        raise ValueError(f"Could not read the {column.name} amount in {', '.join(rows)}{more}.")
+    return amounts.where(~negative, -amounts.abs()).fillna(0.0)
+
+def _parse_dates(column):
+    """Parse ISO dates (2024-05-31) as year-first and everything else (31/05/2024) as day-first."""
+    text = column.astype(str).str.strip()
+    iso = text.str.match(r"\d{4}[-/]\d{1,2}[-/]\d{1,2}")
+    dates = pd.Series(pd.NaT, index=column.index, dtype="datetime64[ns]")
+    if iso.any():
+        dates[iso] = pd.to_datetime(text[iso], errors="coerce")
+    if (~iso).any():
+        dates[~iso] = pd.to_datetime(text[~iso], errors="coerce", dayfirst=True)
+    return dates
+
+def load_statement(file):
+    """Read one bank statement CSV into Date, Description and signed Amount columns (outflows negative)."""
+    raw = pd.read_csv(file)
+    columns = {column.strip().lower(): column for column in raw.columns}
+    date_column = next((columns[c] for c in DATE_COLUMNS if c in columns), None)
+    description_column = next((columns[c] for c in DESCRIPTION_COLUMNS if c in columns), None)
+    if date_column is None or description_column is None:
+        raise ValueError("Bank statement must have a Date and a Description column.")
+    if "amount" in columns:
+        amount = _clean_amounts(raw[columns["amount"]])
+    elif "debit" in columns or "credit" in columns:
+        debit = _clean_amounts(raw[columns["debit"]]).abs() if "debit" in columns else 0.0
+        credit = _clean_amounts(raw[columns["credit"]]).abs() if "credit" in columns else 0.0
+        amount = credit - debit
+    else:
+        raise ValueError("Bank statement must have an Amount column or Debit/Credit columns.")
+    transactions = pd.DataFrame({
+        "Date": _parse_dates(raw[date_column]),
+        "Description": raw[description_column].fillna("").astype(str),
+        "Amount": amount
+    })
+    return transactions.dropna(subset=["Date"]).reset_index(drop=True)
+
+def load_statements(files):
+    """Read and concatenate several bank statement CSVs."""
+    return pd.concat([load_statement(file) for file in files], ignore_index=True)
+
+def categorise(descriptions, rules=None):
+    """Categorise a Series of descriptions with a single compiled regex pass."""
+    pattern, lookup = compile_rules(rules)
+    keywords = descriptions.str.lower().str.extract(pattern, expand=False)
+    return keywords.map(lookup).fillna(UNCATEGORISED)
+
+def summarise_statement(transactions, rules=None):
+    """Categorise transactions and total income and expenses per month.
+
+    Returns the categorised transactions, a Series of income per month and a DataFrame of
+    expenses per month (rows) and category (columns), all indexed by the same months.
+    """
+    categorised = transactions.assign(
+        Category=categorise(transactions["Description"], rules),
+        Month=transactions["Date"].dt.to_period("M")
+    )
+    months = pd.PeriodIndex(sorted(categorised["Month"].unique()), freq="M")
+    outflows = categorised[categorised["Amount"] < 0]
+    expenses = (-outflows["Amount"]).groupby([outflows["Month"], outflows["Category"]]).sum().unstack(fill_value=0.0)
+    expenses = expenses.reindex(months, fill_value=0.0)
+    income = categorised["Amount"].clip(lower=0).groupby(categorised["Month"]).sum().reindex(months, fill_value=0.0)
+    return categorised, income, expenses
+
+def month_expenses(expenses, month):
+    """Return one month's non-zero category totals as (category, amount) pairs for calculate_budget."""
+    row = expenses.loc[pd.Period(month, freq="M")]
+    row = row[row > 0].sort_values(ascending=False)
+    return [(category, float(amount)) for category, amount in row.items()]
+
+def statement_from_bytes(contents):
+    """Load and concatenate statements given as raw CSV bytes."""
+    return load_statements([io.BytesIO(data) for data in contents])
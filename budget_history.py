@@ -0,0 +1,282 @@
+import bisect
+import numpy as np
+import pandas as pd
+import budget_totals
+
+ROLLING_WINDOW = 6  # Number of previous snapshots that form a category's trend
+MIN_PERIODS = 3  # Snapshots needed before a trend is reported
+ANOMALY_THRESHOLD = 2.5  # Standard deviations from trend that flag a month as anomalous
+MIN_VOLATILITY_SHARE = 0.05  # Volatility floor as a share of the trend, so flat histories can still flag jumps
+INITIAL_CAPACITY = 1024
+
+LINE_COLUMNS = {
+    "client": np.int32,
+    "month": np.int32,
+    "category": np.int32,
+    "amount": np.float64,
+    "trend": np.float64,
+    "volatility": np.float64,
+    "zscore": np.float64
+}
+MONTH_COLUMNS = {
+    "client": np.int32,
+    "month": np.int32,
+    "income": np.float64,
+    "total_expenses": np.float64,
+    "remaining_budget": np.float64,
+    "savings_potential": np.float64,
+    "savings_rate": np.float64,
+    "savings_rate_trend": np.float64
+}
+
+def month_ordinal(month):
+    """Convert a 'YYYY-MM' string, date or Period to a month number (year * 12 + month - 1)."""
+    period = pd.Period(month, freq="M")
+    return period.year * 12 + period.month - 1
+
+def month_label(ordinal):
+    """Convert a month number back to a 'YYYY-MM' string."""
+    return f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+
+def _empty_columns(spec, capacity):
+    return {name: np.full(capacity, np.nan) if dtype == np.float64 else np.zeros(capacity, dtype=dtype) for name, dtype in spec.items()}
+
+def _window_stats(values, window, min_periods):
+    """Return the trend and volatility of the last window values, or NaN when there are too few."""
+    values = values[-window:]
+    if len(values) < min_periods:
+        return np.nan, np.nan
+    return values.mean(), values.std(ddof=1)
+
+class BudgetHistory:
+    """Columnar store of monthly budget snapshots with incrementally maintained rolling statistics.
+
+    Expense lines and monthly totals are kept in parallel NumPy columns. Each (client, category)
+    series keeps the row positions of its lines in month order, so adding a month only recomputes
+    the trend of the rows at and after that month instead of the whole history.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW, min_periods=MIN_PERIODS, threshold=ANOMALY_THRESHOLD):
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self.client_codes = {}
+        self.category_codes = {}
+        self._lines = _empty_columns(LINE_COLUMNS, INITIAL_CAPACITY)
+        self._months = _empty_columns(MONTH_COLUMNS, INITIAL_CAPACITY)
+        self._line_count = 0
+        self._month_count = 0
+        self._series = {}  # (client, category) -> [(month, line row)] sorted by month
+        self._client_months = {}  # client -> [(month, month row)] sorted by month
+
+    def _code(self, codes, key):
+        if key not in codes:
+            codes[key] = len(codes)
+        return codes[key]
+
+    def _append(self, columns, count, values):
+        """Append one row to a column dict, doubling its capacity when full."""
+        capacity = len(next(iter(columns.values())))
+        if count == capacity:
+            for name, column in columns.items():
+                grown = np.full(capacity * 2, np.nan) if column.dtype == np.float64 else np.zeros(capacity * 2, dtype=column.dtype)
+                grown[:capacity] = column
+                columns[name] = grown
+        for name, value in values.items():
+            columns[name][count] = value
+        return count
+
+    def add_snapshot(self, client_id, month, monthly_income, expenses):
+        """Store one month of calculate_budget inputs and outputs and update the affected trends.
+
+        expenses is the same list of (category, amount) pairs that calculate_budget takes. Adding a
+        month that is already stored replaces it: its totals and its whole set of expense lines.
+        """
+        client = self._code(self.client_codes, client_id)
+        ordinal = month_ordinal(month)
+        totals = {}
+        for category, amount in expenses:
+            totals[category] = totals.get(category, 0.0) + amount
+        total_expenses, remaining_budget, savings_potential = budget_totals.calculate_budget(monthly_income, list(totals.items()))
+        savings_rate = remaining_budget / monthly_income if monthly_income > 0 else np.nan
+        month_values = {
+            "client": client,
+            "month": ordinal,
+            "income": monthly_income,
+            "total_expenses": total_expenses,
+            "remaining_budget": remaining_budget,
+            "savings_potential": savings_potential,
+            "savings_rate": savings_rate
+        }
+        months = self._client_months.setdefault(client, [])
+        position = bisect.bisect_left(months, (ordinal, -1))
+        if position < len(months) and months[position][0] == ordinal:
+            row = months[position][1]
+            for name, value in month_values.items():
+                self._months[name][row] = value
+            replaced = True
+        else:
+            row = self._append(self._months, self._month_count, month_values)
+            self._month_count += 1
+            months.insert(position, (ordinal, row))
+            replaced = False
+        self._update_savings_trend(months, position)
+
+        if replaced:
+            dropped = {code for category, code in self.category_codes.items() if category not in totals}
+            for key in [key for key in self._series if key[0] == client and key[1] in dropped]:
+                self._remove_line(key, ordinal)
+        for category, amount in totals.items():
+            key = (client, self._code(self.category_codes, category))
+            series = self._series.setdefault(key, [])
+            position = bisect.bisect_left(series, (ordinal, -1))
+            if position < len(series) and series[position][0] == ordinal:
+                self._lines["amount"][series[position][1]] = amount
+            else:
+                row = self._append(self._lines, self._line_count, {"client": key[0], "month": ordinal, "category": key[1], "amount": amount})
+                self._line_count += 1
+                series.insert(position, (ordinal, row))
+            self._update_series(series, position)
+
+    def _remove_line(self, key, ordinal):
+        """Drop a series' line for one month, if it has one, and recompute the trends after it.
+
+        The last stored line is moved into the freed row so the columns stay dense.
+        """
+        series = self._series[key]
+        position = bisect.bisect_left(series, (ordinal, -1))
+        if position == len(series) or series[position][0] != ordinal:
+            return
+        row = series.pop(position)[1]
+        last = self._line_count - 1
+        if row != last:
+            for column in self._lines.values():
+                column[row] = column[last]
+            moved = self._series[(int(self._lines["client"][row]), int(self._lines["category"][row]))]
+            moved_ordinal = int(self._lines["month"][row])
+            moved[bisect.bisect_left(moved, (moved_ordinal, -1))] = (moved_ordinal, row)
+        self._line_count -= 1
+        if series:
+            self._update_series(series, position)
+        else:
+            del self._series[key]
+
+    def _update_series(self, series, start):
+        """Recompute trend, volatility and z-score for the rows of one series from position start onwards."""
+        # Only the window before start can influence the rows being recomputed
+        offset = max(0, start - self.window)
+        rows = np.fromiter((row for _, row in series[offset:]), dtype=np.int64, count=len(series) - offset)
+        amounts = self._lines["amount"][rows]
+        for position in range(start - offset, len(rows)):
+            trend, volatility = _window_stats(amounts[:position], self.window, self.min_periods)
+            row = rows[position]
+            self._lines["trend"][row] = trend
+            self._lines["volatility"][row] = volatility
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._lines["zscore"][row] = (amounts[position] - trend) / np.fmax(volatility, MIN_VOLATILITY_SHARE * abs(trend))
+
+    def _update_savings_trend(self, months, start):
+        """Recompute the rolling savings-rate trend for a client's months from position start onwards."""
+        offset = max(0, start - self.window)
+        rows = np.fromiter((row for _, row in months[offset:]), dtype=np.int64, count=len(months) - offset)
+        rates = self._months["savings_rate"][rows]
+        for position in range(start - offset, len(rows)):
+            window = rates[max(0, position + 1 - self.window):position + 1]
+            window = window[~np.isnan(window)]
+            self._months["savings_rate_trend"][rows[position]] = window.mean() if len(window) else np.nan
+
+    def rebuild(self):
+        """Recompute every rolling statistic in one vectorized pass, e.g. after changing the window."""
+        lines = self.lines_frame(decoded=False).sort_values(["client", "category", "month"])
+        keys = [lines["client"], lines["category"]]
+        previous = lines.groupby(keys)["amount"].shift(1)
+        rolling = previous.groupby(keys).rolling(self.window, min_periods=self.min_periods)
+        trend = rolling.mean().reset_index(level=[0, 1], drop=True)
+        volatility = rolling.std().reset_index(level=[0, 1], drop=True)
+        scale = np.fmax(volatility, MIN_VOLATILITY_SHARE * trend.abs())
+        self._lines["trend"][trend.index] = trend.to_numpy()
+        self._lines["volatility"][volatility.index] = volatility.to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._lines["zscore"][trend.index] = ((lines["amount"] - trend) / scale).reindex(trend.index).to_numpy()
+
+        months = self.months_frame(decoded=False).sort_values(["client", "month"])
+        savings_trend = months.groupby("client")["savings_rate"].rolling(self.window, min_periods=1).mean()
+        savings_trend = savings_trend.reset_index(level=0, drop=True)
+        self._months["savings_rate_trend"][savings_trend.index] = savings_trend.to_numpy()
+
+    def lines_frame(self, decoded=True, rows=None):
+        """Return the stored expense lines (all, or the given rows) and their rolling statistics."""
+        rows = slice(0, self._line_count) if rows is None else rows
+        frame = pd.DataFrame({name: column[rows] for name, column in self._lines.items()})
+        frame["anomaly"] = frame["zscore"].abs() > self.threshold
+        return self._decode(frame) if decoded else frame
+
+    def months_frame(self, decoded=True, rows=None):
+        """Return the stored monthly totals (all, or the given rows) and their savings-rate trend."""
+        rows = slice(0, self._month_count) if rows is None else rows
+        frame = pd.DataFrame({name: column[rows] for name, column in self._months.items()})
+        return self._decode(frame) if decoded else frame
+
+    def _decode(self, frame):
+        clients = np.array(list(self.client_codes), dtype=object)
+        categories = np.array(list(self.category_codes), dtype=object)
+        frame["client"] = clients[frame["client"].to_numpy()]
+        if "category" in frame:
+            frame["category"] = categories[frame["category"].to_numpy()]
+        frame["month"] = [month_label(ordinal) for ordinal in frame["month"]]
+        return frame
+
+    def category_history(self, client_id):
+        """Return one client's expense lines with trend, volatility and anomaly flags, in month order."""
+        if client_id not in self.client_codes:
+            return self.lines_frame(rows=slice(0, 0))
+        rows = np.flatnonzero(self._lines["client"][:self._line_count] == self.client_codes[client_id])
+        return self.lines_frame(rows=rows).sort_values(["month", "category"]).reset_index(drop=True)
+
+    def savings_history(self, client_id):
+        """Return one client's monthly totals and savings-rate trend, in month order."""
+        if client_id not in self.client_codes:
+            return self.months_frame(rows=slice(0, 0))
+        rows = [row for _, row in self._client_months[self.client_codes[client_id]]]
+        return self.months_frame(rows=rows)
+
+    def anomalies(self, client_id=None):
+        """Return the expense lines that deviate from their trend by more than the threshold."""
+        lines = self.lines_frame() if client_id is None else self.category_history(client_id)
+        return lines[lines["anomaly"]].reset_index(drop=True)
+
+    def save(self, path):
+        """Write the store to a compressed .npz file."""
+        np.savez_compressed(
+            path,
+            clients=np.array(list(self.client_codes), dtype=str),
+            categories=np.array(list(self.category_codes), dtype=str),
+            settings=np.array([self.window, self.min_periods, self.threshold]),
+            **{f"line_{name}": column[:self._line_count] for name, column in self._lines.items()},
+            **{f"month_{name}": column[:self._month_count] for name, column in self._months.items()}
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by save, rebuilding its series indexes without recomputing statistics."""
+        data = np.load(path)
+        window, min_periods, threshold = data["settings"]
+        history = cls(int(window), int(min_periods), float(threshold))
+        history.client_codes = {name: code for code, name in enumerate(data["clients"].tolist())}
+        history.category_codes = {name: code for code, name in enumerate(data["categories"].tolist())}
+        history._line_count = len(data["line_amount"])
+        history._month_count = len(data["month_income"])
+        history._lines = _empty_columns(LINE_COLUMNS, max(INITIAL_CAPACITY, history._line_count))
+        history._months = _empty_columns(MONTH_COLUMNS, max(INITIAL_CAPACITY, history._month_count))
+        for name in LINE_COLUMNS:
+            history._lines[name][:history._line_count] = data[f"line_{name}"]
+        for name in MONTH_COLUMNS:
+            history._months[name][:history._month_count] = data[f"month_{name}"]
+        lines = history._lines
+        for row in np.lexsort((lines["month"][:history._line_count], lines["category"][:history._line_count], lines["client"][:history._line_count])):
+            key = (int(lines["client"][row]), int(lines["category"][row]))
+            history._series.setdefault(key, []).append((int(lines["month"][row]), int(row)))
+        months = history._months
+        for row in np.lexsort((months["month"][:history._month_count], months["client"][:history._month_count])):
+            history._client_months.setdefault(int(months["client"][row]), []).append((int(months["month"][row]), int(row)))
+        return history
@@ -1,85 +1,350 @@
 import streamlit as st
 import pandas as pd
 import io
+import bank_statements
+import budget_history
+import budget_totals
+import debt_payoff
+import excel_exports
+import memory_profile
+import validation
 
-def calculate_budget(monthly_income, expenses):
-    """Calculate total expenses, remaining budget, and savings potential."""
-    total_expenses = sum(expense for category, expense in expenses)
-    remaining_budget = monthly_income - total_expenses
-    savings_potential = max(0, remaining_budget)
-    return total_expenses, remaining_budget, savings_potential
+@st.cache_data(show_spinner=False)
+def summarise_uploaded_statements(contents, custom_rules_text):
+    """Load, categorise and aggregate uploaded statements, cached on the file contents and rules."""
+    rules = bank_statements.merge_rules(bank_statements.parse_custom_rules(custom_rules_text))
+    transactions = bank_statements.statement_from_bytes(contents)
+    return bank_statements.summarise_statement(transactions, rules)
 
-def show():
+def statement_expenses():
+    """Show the bank statement upload inputs and return the selected month's expenses, submit state and month."""
+    uploaded_files = st.file_uploader(
+        "Bank Statement CSVs",
+        type="csv",
+        accept_multiple_files=True,
+        help="Each file needs Date and Description columns, plus an Amount column (payments negative) or Debit and Credit columns."
+    )
+    custom_rules_text = st.text_area(
+        "Custom Category Rules (optional)",
+        placeholder="One rule per line, e.g.\nGym: virgin active, planet fitness",
+        key="statement_rules"
+    )
+    if not uploaded_files:
+        st.info("Upload one or more bank statement CSVs to categorise your transactions.")
+        return [], False, None
+    try:
+        categorised, income, expenses_by_month = summarise_uploaded_statements(
+            tuple(file.getvalue() for file in uploaded_files), custom_rules_text
+        )
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        return [], False, None
+    if expenses_by_month.empty:
+        st.error("No dated transactions were found in the uploaded statements.")
+        return [], False, None
+    months = [str(month) for month in expenses_by_month.index]
+    month = st.selectbox("Statement Month", months, index=len(months) - 1)
+    st.write(f"**Income Received in {month}**: R {income[pd.Period(month, freq='M')]:,.2f}")
+    with st.expander("Categorised Transactions"):
+        st.dataframe(categorised[categorised["Month"] == pd.Period(month, freq="M")].drop(columns="Month"), use_container_width=True)
+    submit_button = st.button("Calculate Budget")
+    return bank_statements.month_expenses(expenses_by_month, month), submit_button, month
+
+def get_budget_history():
+    """Return this session's budget history store, creating it on first use."""
+    if "budget_history" not in st.session_state:
+        st.session_state["budget_history"] = budget_history.BudgetHistory()
+    return st.session_state["budget_history"]
+
+def show_budget_history(history_name):
+    """Show the savings-rate trend and anomalous categories for a saved budget history."""
+    history = st.session_state.get("budget_history")
+    if history is None:
+        return
+    months = history.savings_history(history_name)
+    if len(months) < 2:
+        return
+    st.write(f"**Budget History: {history_name}**")
+    trend_data = pd.DataFrame({
+        "Month": months["month"],
+        "Savings Rate (%)": months["savings_rate"] * 100,
+        "Savings Rate Trend (%)": months["savings_rate_trend"] * 100
+    })
+    st.line_chart(trend_data.set_index("Month"))
+    anomalies = history.anomalies(history_name)
+    if anomalies.empty:
+        st.write("No categories deviate sharply from their trend.")
+    else:
+        st.warning(f"{len(anomalies)} category month(s) deviate sharply from their trend.")
+        st.dataframe(
+            anomalies[["month", "category", "amount", "trend", "zscore"]].rename(columns={
+                "month": "Month", "category": "Category", "amount": "Amount (R)", "trend": "Trend (R)", "zscore": "Deviation (Std Devs)"
+            }),
+            use_container_width=True
+        )
+
+RESULTS_KEY = "budget_tool_results"
+INPUT_SCHEMA = validation.schema({"monthly_income": validation.field("Monthly Income (R)", minimum=0)})
+EXPENSE_SCHEMA = validation.schema({
+    "category": validation.field("Expense Category", text=True, required=False),
+    "amount": validation.field("Amount (R)", minimum=0)
+})
+DEBT_COLUMNS = {"Debt": "debt", "Balance (R)": "balance", "Interest Rate (%)": "rate", "Minimum Payment (R)": "minimum_payment", "Custom Priority": "priority"}
+DEBT_SCHEMA = validation.schema({
+    "debt": validation.field("Debt", text=True, required=False),
+    "balance": validation.field("Balance (R)", minimum=0),
+    "rate": validation.field("Interest Rate (%)", minimum=0, maximum=100),
+    "minimum_payment": validation.field("Minimum Payment (R)", minimum=0),
+    "priority": validation.field("Custom Priority", required=False, minimum=1)
+})
+GOAL_COLUMNS = {"Goal": "goal", "Target (R)": "target"}
+GOAL_SCHEMA = validation.schema({
+    "goal": validation.field("Goal", text=True, required=False),
+    "target": validation.field("Target (R)", minimum=0, exclusive_minimum=True)
+})
+
+def filled_rows(table, columns):
+    """Rename an editor table's columns to field names and drop the rows left completely blank."""
+    table = table.rename(columns=columns)[list(columns.values())]
+    blank = table.isna() | (table.astype(str).apply(lambda column: column.str.strip()) == "")
+    return table[~blank.all(axis=1)].reset_index(drop=True)
+
+def debt_plan_inputs():
+    """Show the debt and savings goal tables and return them with the annual savings rate."""
+    with st.expander("Debt Payoff and Savings Plan"):
+        st.write("List your debts and savings goals to compare paying them off by avalanche (highest rate first), snowball (smallest balance first) or your own priority.")
+        debts = st.data_editor(
+            pd.DataFrame({"Debt": pd.Series(dtype=str), **{column: pd.Series(dtype=float) for column in list(DEBT_COLUMNS)[1:]}}),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="budget_debts",
+            column_config={
+                "Balance (R)": st.column_config.NumberColumn(min_value=0.0, step=1000.0, format="%.2f"),
+                "Interest Rate (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=0.25),
+                "Minimum Payment (R)": st.column_config.NumberColumn(min_value=0.0, step=100.0, format="%.2f"),
+                "Custom Priority": st.column_config.NumberColumn(min_value=1, step=1, help="1 is paid first under the custom strategy")
+            }
+        )
+        goals = st.data_editor(
+            pd.DataFrame({"Goal": pd.Series(dtype=str), "Target (R)": pd.Series(dtype=float)}),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="budget_goals",
+            column_config={"Target (R)": st.column_config.NumberColumn(min_value=0.0, step=1000.0, format="%.2f")}
+        )
+        savings_rate = st.number_input("Savings Interest Rate (%)", min_value=0.0, max_value=20.0, value=7.0, step=0.5, key="budget_savings_rate") / 100
+        st.markdown(
+            "<p style='font-size: 14px; color: #888888;'>Minimum payments are assumed to be included in your expenses. Goals are saved for in the order listed.</p>",
+            unsafe_allow_html=True
+        )
+    return filled_rows(debts, DEBT_COLUMNS), filled_rows(goals, GOAL_COLUMNS), savings_rate
+
+def calculate_debt_plan(debts, goals, remaining_budget, savings_rate):
+    """Simulate every strategy and extra payment, returning what show_results and the workbook need, or None without debts or goals."""
+    if debts.empty and goals.empty:
+        return None
+    debt_names = [str(name).strip() if pd.notna(name) and str(name).strip() else f"Debt {i+1}" for i, name in enumerate(debts["debt"])]
+    goal_names = [str(name).strip() if pd.notna(name) and str(name).strip() else f"Goal {i+1}" for i, name in enumerate(goals["goal"])]
+    balance, rate, minimum_payment = (debts[column].astype(float) for column in ["balance", "rate", "minimum_payment"])
+    plan = debt_payoff.simulate(
+        balance, rate / 100, minimum_payment, debts["priority"].astype(float), goals["target"].astype(float), remaining_budget, savings_rate=savings_rate
+    )
+    comparison = debt_payoff.comparison_frame(plan, goal_names)
+    best_strategy = plan["strategies"][int(plan["total_interest"][:, -1].argmin())]
+    below_interest = debt_payoff.minimum_below_interest(balance, rate / 100, minimum_payment)
+    return {
+        "debt_names": debt_names,
+        # (name, minimum payment, first month's interest) of debts that grow on minimum payments alone
+        "minimum_below_interest": [
+            (name, float(minimum), float(interest))
+            for name, minimum, interest, below in zip(debt_names, minimum_payment, balance * rate / 100 / debt_payoff.MONTHS_PER_YEAR, below_interest) if below
+        ],
+        "strategies": plan["strategies"],
+        "extras": plan["extras"],
+        "total_debt": plan["balances"].sum(axis=-1),
+        "savings": plan["savings"],
+        "comparison": comparison,
+        "best_strategy": best_strategy,
+        "schedule": debt_payoff.schedule_frame(plan, best_strategy, len(plan["extras"]) - 1, debt_names)
+    }
+
+def build_budget_workbook(summary_data, expenses_data, chart_data, plan_comparison=None, plan_schedule=None):
+    """Write the budget summary, expenses, chart data and any debt payoff plan to Excel and return the workbook bytes."""
+    summary_df = pd.DataFrame(summary_data)
+    expenses_df = pd.DataFrame(expenses_data)
+    chart_df = pd.DataFrame(chart_data).reset_index()
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, index=False, sheet_name="Budget Summary")
+        expenses_df.to_excel(writer, startrow=len(summary_df) + 2, index=False, sheet_name="Budget Summary")
+        chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
+        if plan_comparison is not None:
+            plan_comparison.to_excel(writer, index=False, sheet_name="Debt Payoff Comparison")
+            plan_schedule.to_excel(writer, index=False, sheet_name="Debt Payoff Schedule")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your Budget Summary and Chart Data.",
+                "To recreate the bar chart in Excel:",
+                "1. Go to the 'Chart Data' sheet.",
+                "2. Select the 'Category' and 'Amount (R)' columns.",
+                "3. Click Insert > Bar Chart in Excel to visualize the budget breakdown."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the budget inputs and store the calculated results in session state on submit."""
     st.write("Enter your monthly income and expenses to create a budget and see your savings potential.")
     monthly_income = st.number_input("Monthly Income (R)", min_value=0.0, step=1000.0, value=39500.0)
-    st.write("**Add Your Monthly Expenses**")
-    with st.form(key="expense_form"):
-        num_expenses = st.number_input("Number of Expense Categories", min_value=1, max_value=10, step=1, value=3)
-        expenses = []
-        for i in range(num_expenses):
-            col1, col2 = st.columns(2)
-            with col1:
-                category = st.text_input(f"Expense Category {i+1}", value=f"Category {i+1}", key=f"category_{i}")
-            with col2:
-                amount = st.number_input(f"Amount (R)", min_value=0.0, step=100.0, key=f"amount_{i}")
-            expenses.append((category, amount))
-        submit_button = st.form_submit_button("Calculate Budget")
+    expense_source = st.radio("Expense Source", ["Enter Manually", "Upload Bank Statements"], horizontal=True)
+    statement_month = None
+    if expense_source == "Upload Bank Statements":
+        expenses, submit_button, statement_month = statement_expenses()
+    else:
+        st.write("**Add Your Monthly Expenses**")
+        with st.form(key="expense_form"):
+            num_expenses = st.number_input("Number of Expense Categories", min_value=1, max_value=10, step=1, value=3)
+            expenses = []
+            for i in range(num_expenses):
+                col1, col2 = st.columns(2)
+                with col1:
+                    category = st.text_input(f"Expense Category {i+1}", value=f"Category {i+1}", key=f"category_{i}")
+                with col2:
+                    amount = st.number_input(f"Amount (R)", min_value=0.0, step=100.0, key=f"amount_{i}")
+                expenses.append((category, amount))
+            submit_button = st.form_submit_button("Calculate Budget")
+    with st.expander("Budget History"):
+        history_name = st.text_input("History Name", value="My Budget", key="budget_history_name")
+        if statement_month is None:
+            history_month = st.date_input("Budget Month", key="budget_history_month")
+        else:
+            history_month = statement_month
+            st.write(f"The selected statement month ({statement_month}) is saved to history.")
+        save_to_history = st.checkbox("Save this budget to history when calculating", key="budget_history_save")
+    debts, goals, savings_rate = debt_plan_inputs()
 
     if submit_button:
-        if monthly_income < 0:
-            st.error("Monthly income must be non-negative.")
+        _, expense_errors = validation.validate(pd.DataFrame(expenses, columns=["category", "amount"]), EXPENSE_SCHEMA)
+        _, debt_errors = validation.validate(debts, DEBT_SCHEMA)
+        _, goal_errors = validation.validate(goals, GOAL_SCHEMA)
+        errors = (
+            validation.validate_inputs({"monthly_income": monthly_income}, INPUT_SCHEMA) + validation.error_messages(expense_errors, "Expense")
+            + validation.error_messages(debt_errors, "Debt") + validation.error_messages(goal_errors, "Goal")
+        )
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                total_expenses, remaining_budget, savings_potential = calculate_budget(monthly_income, expenses)
-                st.success("--- Budget Summary ---")
-                st.write(f"**Monthly Income**: R {monthly_income:,.2f}")
-                st.write("**Expenses Breakdown**:")
-                expenses_data = []
-                for category, amount in expenses:
-                    st.write(f"- {category}: R {amount:,.2f}")
-                    expenses_data.append({"Category": category, "Amount (R)": amount})
-                st.write(f"**Total Monthly Expenses**: R {total_expenses:,.2f}")
-                st.write(f"**Remaining Budget**: R {remaining_budget:,.2f}")
-                summary_data = {
-                    "Monthly Income (R)": [monthly_income],
-                    "Total Monthly Expenses (R)": [total_expenses],
-                    "Remaining Budget (R)": [remaining_budget]
-                }
-                if remaining_budget < 0:
-                    st.warning("You're overspending! Consider reducing expenses to avoid debt.")
-                else:
-                    st.write(f"**Savings Potential**: R {savings_potential:,.2f}")
-                    summary_data["Savings Potential (R)"] = [savings_potential]
-                st.write("**Budget Breakdown Visualization**")
-                chart_data = pd.DataFrame({
-                    "Category": [category for category, amount in expenses] + ["Remaining Budget"],
-                    "Amount (R)": [amount for category, amount in expenses] + [max(0, remaining_budget)]
-                })
-                st.bar_chart(chart_data.set_index("Category"))
-                summary_df = pd.DataFrame(summary_data)
-                expenses_df = pd.DataFrame(expenses_data)
-                chart_df = pd.DataFrame(chart_data).reset_index()
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    summary_df.to_excel(writer, index=False, sheet_name="Budget Summary")
-                    expenses_df.to_excel(writer, startrow=len(summary_df) + 2, index=False, sheet_name="Budget Summary")
-                    chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your Budget Summary and Chart Data.",
-                            "To recreate the bar chart in Excel:",
-                            "1. Go to the 'Chart Data' sheet.",
-                            "2. Select the 'Category' and 'Amount (R)' columns.",
-                            "3. Click Insert > Bar Chart in Excel to visualize the budget breakdown."
-                        ]
+                with memory_profile.track(__name__, "calculation"):
+                    total_expenses, remaining_budget, savings_potential = budget_totals.calculate_budget(monthly_income, expenses)
+                    expenses_data = [{"Category": category, "Amount (R)": amount} for category, amount in expenses]
+                    summary_data = {
+                        "Monthly Income (R)": [monthly_income],
+                        "Total Monthly Expenses (R)": [total_expenses],
+                        "Remaining Budget (R)": [remaining_budget]
+                    }
+                    if remaining_budget >= 0:
+                        summary_data["Savings Potential (R)"] = [savings_potential]
+                    chart_data = pd.DataFrame({
+                        "Category": [category for category, amount in expenses] + ["Remaining Budget"],
+                        "Amount (R)": [amount for category, amount in expenses] + [max(0, remaining_budget)]
                     })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="budget_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                    debt_plan = calculate_debt_plan(debts, goals, remaining_budget, savings_rate)
+                    saved_month = None
+                    if save_to_history:
+                        get_budget_history().add_snapshot(history_name, history_month, monthly_income, expenses)
+                        saved_month = budget_history.month_label(budget_history.month_ordinal(history_month))
+                    st.session_state[RESULTS_KEY] = {
+                        "monthly_income": monthly_income,
+                        "expenses": expenses,
+                        "total_expenses": total_expenses,
+                        "remaining_budget": remaining_budget,
+                        "savings_potential": savings_potential,
+                        "chart_data": chart_data,
+                        "history_name": history_name,
+                        "saved_month": saved_month,
+                        "debt_plan": debt_plan,
+                        "workbook_args": (summary_data, expenses_data, chart_data) + (
+                            (debt_plan["comparison"], debt_plan["schedule"]) if debt_plan is not None else ()
+                        )
+                    }
             except Exception as e:
-                st.error(f"Error: {e}")
\ No newline at end of file
+                st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+def show_debt_plan(plan):
+    """Compare the strategies at a chosen extra payment from the stored simulation, without simulating again."""
+    st.write("**Debt Payoff and Savings Plan**")
+    if plan["minimum_below_interest"]:
+        st.warning(
+            "These minimum payments do not cover the monthly interest, so on minimums alone the balance grows: "
+            + "; ".join(f"{name} (R {minimum:,.2f} against R {interest:,.2f} interest)" for name, minimum, interest in plan["minimum_below_interest"])
+            + f". Unless extra payments clear them, their interest below runs for the full {debt_payoff.MAX_MONTHS // debt_payoff.MONTHS_PER_YEAR} years simulated."
+        )
+    e = 0
+    if len(plan["extras"]) > 1:
+        options = [float(extra) for extra in plan["extras"]]
+        extra = st.select_slider(
+            "Extra Monthly Payment Towards Debt (R)",
+            options=options,
+            value=options[-1],
+            format_func=lambda extra: f"R {extra:,.0f}",
+            key="budget_plan_extra"
+        )
+        e = options.index(extra)
+    else:
+        st.write("There is no remaining budget for extra payments, so only minimum payments are shown.")
+    rows = plan["comparison"][plan["comparison"]["Extra Monthly Payment (R)"] == plan["extras"][e]]
+    st.dataframe(rows.drop(columns="Extra Monthly Payment (R)"), use_container_width=True, hide_index=True)
+    if plan["debt_names"]:
+        st.write("**Total Debt Outstanding (R)**")
+        st.line_chart(pd.DataFrame({strategy: plan["total_debt"][s, e] for s, strategy in enumerate(plan["strategies"])}))
+    else:
+        st.write("**Savings Balance (R)**")
+        st.line_chart(pd.DataFrame({"Savings Balance (R)": plan["savings"][0, e]}))
+    with st.expander("All Strategies and Extra Payments"):
+        st.dataframe(plan["comparison"], use_container_width=True, hide_index=True)
+    schedule_note = (
+        f"the monthly schedule for {plan['best_strategy']}, the strategy with the least interest at the largest extra payment"
+        if plan["debt_names"] else "the monthly savings schedule"
+    )
+    st.markdown(
+        f"<p style='font-size: 14px; color: #888888;'>Months are counted from this month. The Excel download includes {schedule_note}.</p>",
+        unsafe_allow_html=True
+    )
+
+@st.fragment
+def show_results():
+    """Render the most recently calculated budget from session state without recalculating it."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    st.success("--- Budget Summary ---")
+    st.write(f"**Monthly Income**: R {results['monthly_income']:,.2f}")
+    st.write("**Expenses Breakdown**:")
+    for category, amount in results["expenses"]:
+        st.write(f"- {category}: R {amount:,.2f}")
+    st.write(f"**Total Monthly Expenses**: R {results['total_expenses']:,.2f}")
+    st.write(f"**Remaining Budget**: R {results['remaining_budget']:,.2f}")
+    if results["remaining_budget"] < 0:
+        st.warning("You're overspending! Consider reducing expenses to avoid debt.")
+    else:
+        st.write(f"**Savings Potential**: R {results['savings_potential']:,.2f}")
+    st.write("**Budget Breakdown Visualization**")
+    st.bar_chart(results["chart_data"].set_index("Category"))
+    if results["debt_plan"] is not None:
+        show_debt_plan(results["debt_plan"])
+    excel_exports.download_button("Download Summary as Excel", "budget_summary.xlsx", build_budget_workbook, *results["workbook_args"])
+    if results["saved_month"] is not None:
+        st.write(f"**Saved to Budget History**: {results['history_name']} ({results['saved_month']})")
+    show_budget_history(results["history_name"])
+
+def show():
+    show_inputs()
+    show_results()
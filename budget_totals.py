@@ -0,0 +1,6 @@
+def calculate_budget(monthly_income, expenses):
+    """Calculate total expenses, remaining budget, and savings potential."""
+    total_expenses = sum(expense for category, expense in expenses)
+    remaining_budget = monthly_income - total_expenses
+    savings_potential = max(0, remaining_budget)
+    return total_expenses, remaining_budget, savings_potential
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+MONTHS_PER_YEAR = 12
+MAX_DRAWDOWN_RATE = 0.175  # Legislative maximum, as in calculate_years_until_depletion
+CAPITAL_FLOOR = 125000  # Capital at or below this at an anniversary is withdrawn in full
+HORIZON_YEARS = 100  # Retirement years modelled; capital still left after this is reported as not depleted
+NOT_DEPLETED = -1
+LEDGER_COLUMNS = ["Month", "Age", "Contribution (R)", "Growth (R)", "Withdrawal (R)", "Closing Balance (R)", "Inflation Index"]
+
+PROVISION_FIELDS = ["current_value", "annual_return", "monthly_contribution", "contribution_increase"]
+
+def provision_columns(clients):
+    """Flatten each client's provision dicts into columns, with client giving the position of each provision's client."""
+    return {
+        "client": np.array([client for client, inputs in enumerate(clients) for _ in inputs["provisions"]], dtype=np.int64),
+        **{key: np.array([provision[key] for inputs in clients for provision in inputs["provisions"]], dtype=float) for key in PROVISION_FIELDS}
+    }
+
+def _accumulate(provisions, retirement_months, months):
+    """Contributions and end-of-month balances up to each client's retirement, with each provision's value at retirement.
+
+    Each provision compounds at its own monthly rate with contributions at the end of every month,
+    rising by the contribution increase each year, which is calculate_future_value month by month.
+    A balance is a closed form over cumulative products, (1 + m)^t * (value + cumsum(contribution / (1 + m)^s)),
+    so every provision and month is evaluated in one pass.
+    """
+    count = len(retirement_months)
+    # A leading zero provision per client keeps every client's group non-empty for reduceat
+    is_provision = np.concatenate([np.zeros(count, dtype=bool), np.ones(len(provisions["client"]), dtype=bool)])
+    order = np.lexsort((is_provision, np.concatenate([np.arange(count), provisions["client"]])))
+    is_provision = is_provision[order]
+    starts = np.flatnonzero(~is_provision)
+    def column(key):
+        return np.concatenate([np.zeros(count), provisions[key]])[order][:, None]
+    current_value, annual_rate = column("current_value"), column("annual_return")
+    monthly_contribution, increase = column("monthly_contribution"), column("contribution_increase")
+    retire_at = np.repeat(retirement_months, np.diff(np.append(starts, len(order))))[:, None]
+
+    month = np.arange(1, months + 1)
+    active = month <= retire_at
+    growth_factor = (1 + ((1 + annual_rate) ** (1 / MONTHS_PER_YEAR) - 1)) ** month
+    contributions = np.where(active, monthly_contribution * (1 + increase) ** ((month - 1) // MONTHS_PER_YEAR), 0.0)
+    balances = np.where(active, growth_factor * (current_value + np.cumsum(contributions / growth_factor, axis=1)), 0.0)
+    at_retirement = np.where(
+        retire_at[:, 0] > 0, balances[np.arange(len(order)), np.maximum(retire_at[:, 0] - 1, 0)] if months else 0.0, current_value[:, 0]
+    )
+    provision_values = np.empty(len(provisions["client"]))
+    provision_values[order[is_provision] - count] = at_retirement[is_provision]
+    return {
+        "contributions": np.add.reduceat(contributions, starts, axis=0) if months else np.zeros((count, 0)),
+        "balance": np.add.reduceat(balances, starts, axis=0) if months else np.zeros((count, 0)),
+        "opening_balance": np.add.reduceat(current_value[:, 0], starts),
+        "capital_at_retirement": np.add.reduceat(at_retirement, starts),
+        "provision_values": provision_values,
+        "provision_client": provisions["client"]
+    }
+
+def build_ledger(clients, horizon_years=HORIZON_YEARS):
+    """Build a monthly ledger from today to the end of the horizon for every client at once.
+
+    Each client is a dict with current_age, retirement_age, provisions (as in calculate_retirement_report),
+    inflation_rate, assumed_return (after retirement) and annual_income, the level annual income drawn
+    from retirement (0 for none). See ledger_from_columns for the rules and the result.
+    """
+    return ledger_from_columns(
+        [inputs["current_age"] for inputs in clients],
+        [inputs["retirement_age"] for inputs in clients],
+        [inputs["inflation_rate"] for inputs in clients],
+        [inputs["assumed_return"] for inputs in clients],
+        [inputs["annual_income"] or 0.0 for inputs in clients],
+        provision_columns(clients),
+        horizon_years
+    )
+
+def ledger_from_columns(current_age, retirement_age, inflation_rate, assumed_return, annual_income, provisions, horizon_years=HORIZON_YEARS):
+    """Build the monthly ledger for clients held as equal-length columns.
+
+    provisions is a dict of arrays keyed by PROVISION_FIELDS, plus client, the position of each
+    provision's client. Provisions grow until retirement; the combined capital then grows monthly
+    at the assumed return. At each retirement anniversary the year's income is elected and drawn
+    under the drawdown rules of calculate_years_until_depletion: at most 17.5% of capital, and all
+    of it once capital is at or below the floor. Month t of the ledger runs from (t - 1) / 12 to
+    t / 12 years from today; withdrawals are at the start of a month, contributions at its end and
+    the inflation index is at its start.
+
+    Returns a dict of (clients x months) arrays (contributions, growth, withdrawals, balance,
+    inflation_index) and per-client results: capital_at_retirement, first_withdrawal,
+    depletion_years (NOT_DEPLETED when capital outlasts the horizon) and provision_values with
+    provision_client giving each provision's value at retirement and its client.
+    """
+    current_age = np.asarray(current_age, dtype=np.int64)
+    retirement_months = (np.asarray(retirement_age, dtype=np.int64) - current_age) * MONTHS_PER_YEAR
+    inflation_rate = np.asarray(inflation_rate, dtype=float)
+    assumed_return = np.asarray(assumed_return, dtype=float)
+    annual_income = np.asarray(annual_income, dtype=float)
+    count = len(current_age)
+    accumulation_months = int(retirement_months.max()) if count else 0
+    months = accumulation_months + horizon_years * MONTHS_PER_YEAR
+
+    accumulation = _accumulate(provisions, retirement_months, accumulation_months)
+    contributions = np.zeros((count, months))
+    withdrawals = np.zeros((count, months))
+    balance = np.zeros((count, months))
+    contributions[:, :accumulation_months] = accumulation["contributions"]
+    balance[:, :accumulation_months] = accumulation["balance"]
+
+    # Retirement is path dependent through the drawdown rules, so step a year at a time across all clients
+    capital = accumulation["capital_at_retirement"].copy()
+    drawing = annual_income > 0
+    active = np.ones(count, dtype=bool)
+    depletion_years = np.full(count, NOT_DEPLETED)
+    depletion_years[drawing & (capital <= 0)] = 0
+    active &= ~(drawing & (capital <= 0))
+    first_withdrawal = np.zeros(count)
+    monthly_growth = (1 + assumed_return[:, None]) ** (np.arange(1, MONTHS_PER_YEAR + 1) / MONTHS_PER_YEAR)
+    monthly_growth[:, -1] = 1 + assumed_return  # Year end exactly as calculate_years_until_depletion compounds it
+    last_month = retirement_months.copy()
+    for year in range(horizon_years):
+        if not active.any():
+            break
+        floor = active & drawing & (capital <= CAPITAL_FLOOR)
+        withdrawal = np.where(floor, capital, np.where(active & drawing, np.minimum(annual_income, capital * MAX_DRAWDOWN_RATE), 0.0))
+        remaining = np.where(floor, 0.0, capital - withdrawal)
+        rows = np.flatnonzero(active)
+        start = retirement_months[rows] + year * MONTHS_PER_YEAR
+        withdrawals[rows, start] = withdrawal[rows]
+        balance[rows[:, None], start[:, None] + np.arange(MONTHS_PER_YEAR)] = remaining[rows, None] * monthly_growth[rows]
+        if year == 0:
+            first_withdrawal = withdrawal
+        last_month[rows] = start + MONTHS_PER_YEAR
+        depletion_years[floor] = year + 1
+        capital = remaining * (1 + assumed_return)
+        active &= ~floor
+
+    used = int(last_month.max()) if count else 0
+    contributions, withdrawals, balance = contributions[:, :used], withdrawals[:, :used], balance[:, :used]
+    opening = np.concatenate([accumulation["opening_balance"][:, None], balance[:, :-1]], axis=1)[:, :used]
+    return {
+        "current_age": current_age,
+        "retirement_months": retirement_months,
+        "inflation_rate": inflation_rate,
+        "contributions": contributions,
+        "withdrawals": withdrawals,
+        "growth": balance - opening + withdrawals - contributions,
+        "balance": balance,
+        "inflation_index": (1 + inflation_rate[:, None]) ** (np.arange(used) / MONTHS_PER_YEAR),
+        "capital_at_retirement": accumulation["capital_at_retirement"],
+        "first_withdrawal": first_withdrawal,
+        "depletion_years": depletion_years,
+        "provision_values": accumulation["provision_values"],
+        "provision_client": accumulation["provision_client"]
+    }
+
+def inflation_index(ledger, client, month):
+    """The client's inflation index at the start of a month counted from today (months may run past the ledger)."""
+    return (1 + ledger["inflation_rate"][client]) ** (month / MONTHS_PER_YEAR)
+
+def drawdown_schedule(ledger, client):
+    """Return a client's capital and income at each retirement anniversary until depletion (or the horizon).
+
+    Lists are keyed like calculate_retirement_report's chart data; the last anniversary has the
+    capital left (nil once depleted) and no withdrawal. Today's values are deflated by the
+    inflation index in the month the income is paid.
+    """
+    years = ledger["depletion_years"][client]
+    retirement_month = ledger["retirement_months"][client]
+    balance, withdrawals = ledger["balance"][client], ledger["withdrawals"][client]
+    if years == NOT_DEPLETED:
+        years = (len(balance) - retirement_month) // MONTHS_PER_YEAR
+    anniversaries = retirement_month + np.arange(years + 1) * MONTHS_PER_YEAR
+    capital = np.concatenate([[ledger["capital_at_retirement"][client]], balance[anniversaries[1:] - 1]])
+    withdrawal = np.append(withdrawals[anniversaries[:-1]], 0.0)
+    retirement_age = int(ledger["current_age"][client] + retirement_month // MONTHS_PER_YEAR)
+    return {
+        "Age": list(range(retirement_age, retirement_age + len(anniversaries))),
+        "Capital (R)": capital.tolist(),
+        "Annual Withdrawal (R)": withdrawal.tolist(),
+        "Monthly Income (R)": (withdrawal / MONTHS_PER_YEAR).tolist(),
+        "Monthly Income in Today's Value (R)": (withdrawal / MONTHS_PER_YEAR / inflation_index(ledger, client, anniversaries)).tolist()
+    }
+
+def ledger_frame(ledger, client):
+    """Return one client's monthly ledger as a table, one row per month."""
+    months = ledger["balance"].shape[1]
+    return pd.DataFrame({
+        "Month": np.arange(1, months + 1),
+        "Age": ledger["current_age"][client] + np.arange(months) / MONTHS_PER_YEAR,
+        "Contribution (R)": ledger["contributions"][client],
+        "Growth (R)": ledger["growth"][client],
+        "Withdrawal (R)": ledger["withdrawals"][client],
+        "Closing Balance (R)": ledger["balance"][client],
+        "Inflation Index": ledger["inflation_index"][client]
+    }, columns=LEDGER_COLUMNS)
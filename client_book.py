@@ -0,0 +1,407 @@
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+import cashflow_ledger
+import estate_liquidity
+import second_death
+import tax_years
+
+INITIAL_CAPACITY = 1024
+INDEXED_COLUMNS = ["gross_salary", "current_age"]  # Columns with a sorted index for range lookups
+
+# One row per client, named like calculate_retirement_report's and calculate_salary_tax's arguments
+CLIENT_COLUMNS = {
+    "current_age": np.int32,
+    "retirement_age": np.int32,
+    "gross_salary": np.float64,
+    "pension_contribution": np.float64,
+    "medical_contributions": np.float64,
+    "dependants": np.int32,
+    "monthly_income": np.float64,
+    "desired_monthly_income": np.float64,
+    "desired_annual_increase": np.float64,
+    "inflation_rate": np.float64,
+    "assumed_return": np.float64,
+    "preserve_capital": np.bool_,
+    "preservation_years": np.int32,
+    "marginal_tax_rate": np.float64
+}
+# Each client's provisions, estate assets and budget lines are one block of rows in their own table
+CHILD_TABLES = {
+    "provisions": {
+        "type": np.int32,
+        "current_value": np.float64,
+        "annual_return": np.float64,
+        "monthly_contribution": np.float64,
+        "contribution_increase": np.float64
+    },
+    "assets": {
+        "kind": np.int32,
+        "market_value": np.float64,
+        "base_cost": np.float64,
+        "liquid": np.bool_
+    },
+    "expenses": {
+        "category": np.int32,
+        "amount": np.float64
+    }
+}
+CODED_COLUMNS = ["type", "kind", "category"]  # Text stored as int codes, decoded through ClientBook.codes
+RETIREMENT_COLUMNS = [
+    "current_age", "retirement_age", "desired_monthly_income", "desired_annual_increase", "inflation_rate", "assumed_return",
+    "preserve_capital", "preservation_years"
+]  # calculate_retirement_report's arguments besides name and provisions
+
+def _empty_columns(spec, capacity):
+    return {name: np.full(capacity, np.nan) if dtype == np.float64 else np.zeros(capacity, dtype=dtype) for name, dtype in spec.items()}
+
+def _reserve(columns, count, extra):
+    """Make room for extra rows after count, doubling each column's capacity until they fit."""
+    capacity = len(next(iter(columns.values())))
+    if count + extra <= capacity:
+        return
+    while capacity < count + extra:
+        capacity *= 2
+    for name, column in columns.items():
+        grown = np.full(capacity, np.nan) if column.dtype == np.float64 else np.zeros(capacity, dtype=column.dtype)
+        grown[:count] = column[:count]
+        columns[name] = grown
+
+def _block_rows(starts, counts):
+    """Concatenate the row ranges [start, start + count) of several blocks."""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, counts) + np.arange(counts.sum())
+
+class ClientBook:
+    """Columnar store of client demographics, income, provisions, estate assets and budget lines.
+
+    Clients are rows of parallel NumPy columns, found by id through a hash index (client_codes)
+    or by range through sorted indexes on INDEXED_COLUMNS. Provisions, assets and expenses live in
+    their own tables, each client's rows as one block located by the client's start and count.
+    Calculators read columns through a ClientView, which is a zero-copy slice of storage whenever
+    the selection is contiguous: always for the whole book, and for range lookups on the column
+    the book was last clustered on.
+    """
+
+    def __init__(self):
+        self.client_codes = {}  # client id -> row
+        self.codes = {name: {} for name in CODED_COLUMNS}
+        client_spec = dict(CLIENT_COLUMNS)
+        for table in CHILD_TABLES:
+            client_spec.update({f"{table}_start": np.int64, f"{table}_count": np.int64})
+        self._clients = _empty_columns(client_spec, INITIAL_CAPACITY)
+        self._children = {table: _empty_columns({"client": np.int32, **spec}, INITIAL_CAPACITY) for table, spec in CHILD_TABLES.items()}
+        self._count = 0
+        self._child_counts = {table: 0 for table in CHILD_TABLES}
+        self._contiguous = True  # Child blocks are in client row order with no rows left by replaced clients
+        self._sorted = {}  # column -> (row order, sorted values), rebuilt after the book changes
+        self.clustered_on = None
+
+    def __len__(self):
+        return self._count
+
+    def _code(self, name, key):
+        codes = self.codes[name]
+        if key not in codes:
+            codes[key] = len(codes)
+        return codes[key]
+
+    def add_client(self, client_id, record):
+        """Store one client, replacing any stored under the same id.
+
+        record uses the CLIENT_COLUMNS names (missing numbers are NaN, or 0 for counts and ages),
+        with optional lists: provisions as calculate_retirement_report takes them, assets as dicts
+        with kind, market_value, base_cost (default: market_value) and liquid, and expenses as the
+        (category, amount) pairs calculate_budget takes. Every value is converted before any is
+        stored, so a record that fails leaves the book as it was.
+        """
+        values = {name: dtype(record.get(name, np.nan if dtype == np.float64 else 0)) for name, dtype in CLIENT_COLUMNS.items()}
+        items = {
+            "provisions": [{**provision, "type": self._code("type", provision.get("type", ""))} for provision in record.get("provisions", [])],
+            "assets": [
+                {**asset, "kind": self._code("kind", asset.get("kind", "")), "base_cost": asset.get("base_cost", asset["market_value"])}
+                for asset in record.get("assets", [])
+            ],
+            "expenses": [{"category": self._code("category", category), "amount": amount} for category, amount in record.get("expenses", [])]
+        }
+        items = {
+            table: [{name: dtype(item.get(name, np.nan if dtype == np.float64 else 0)) for name, dtype in CHILD_TABLES[table].items()} for item in rows]
+            for table, rows in items.items()
+        }
+
+        if client_id in self.client_codes:
+            row = self.client_codes[client_id]
+            self._contiguous = False  # The replaced blocks stay behind until cluster
+        else:
+            _reserve(self._clients, self._count, 1)
+            row = self._count
+            self._count += 1
+            self.client_codes[client_id] = row
+        for name, value in values.items():
+            self._clients[name][row] = value
+        for table, spec in CHILD_TABLES.items():
+            columns = self._children[table]
+            start = self._child_counts[table]
+            _reserve(columns, start, len(items[table]))
+            for offset, item in enumerate(items[table]):
+                columns["client"][start + offset] = row
+                for name, value in item.items():
+                    columns[name][start + offset] = value
+            self._child_counts[table] += len(items[table])
+            self._clients[f"{table}_start"][row] = start
+            self._clients[f"{table}_count"][row] = len(items[table])
+        self._sorted.clear()
+        self.clustered_on = None
+
+    @classmethod
+    def from_records(cls, records, id_key="name"):
+        """Build a book from client dicts, such as client_pack's JSON Lines records, keyed by record[id_key]."""
+        book = cls()
+        for record in records:
+            book.add_client(record[id_key], record)
+        return book
+
+    def _index(self, column):
+        if column not in self._sorted:
+            values = self._clients[column][:self._count]
+            order = np.argsort(values, kind="stable")
+            self._sorted[column] = (order, values[order])
+        return self._sorted[column]
+
+    def view(self):
+        """Return every client, as a zero-copy view."""
+        return ClientView(self, slice(0, self._count))
+
+    def lookup(self, client_ids):
+        """Return the clients with the given ids, in that order."""
+        missing = [client_id for client_id in client_ids if client_id not in self.client_codes]
+        if missing:
+            raise KeyError(f"Clients not in the book: {', '.join(map(str, missing))}")
+        return ClientView(self, np.array([self.client_codes[client_id] for client_id in client_ids], dtype=np.int64))
+
+    def between(self, column, low, high):
+        """Return the clients with low <= column <= high, in ascending order of column."""
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"'{column}' has no sorted index. Choose from: {', '.join(INDEXED_COLUMNS)}.")
+        order, values = self._index(column)
+        start, end = np.searchsorted(values, low, side="left"), np.searchsorted(values, high, side="right")
+        if self.clustered_on == column:
+            return ClientView(self, slice(int(start), int(end)))
+        return ClientView(self, order[start:end])
+
+    def cluster(self, column):
+        """Reorder storage by column, so range lookups on it become zero-copy slices.
+
+        Child blocks are rewritten in the new client order, which also drops rows left behind by
+        replaced clients.
+        """
+        order, _ = self._index(column)
+        ids = np.empty(self._count, dtype=object)
+        for client_id, row in self.client_codes.items():
+            ids[row] = client_id
+        for name, values in self._clients.items():
+            values[:self._count] = values[:self._count][order]
+        for table, columns in self._children.items():
+            counts = self._clients[f"{table}_count"][:self._count]
+            rows = _block_rows(self._clients[f"{table}_start"][:self._count], counts)
+            for name, values in columns.items():
+                values[:len(rows)] = values[rows]
+            columns["client"][:len(rows)] = np.repeat(np.arange(self._count), counts)
+            self._clients[f"{table}_start"][:self._count] = np.cumsum(counts) - counts
+            self._child_counts[table] = len(rows)
+        self.client_codes = {client_id: row for row, client_id in enumerate(ids[order])}
+        self._contiguous = True
+        self._sorted.clear()
+        self.clustered_on = column
+
+    def nbytes(self):
+        """Bytes held by the stored rows (excluding spare capacity)."""
+        total = sum(values[:self._count].nbytes for values in self._clients.values())
+        for table, columns in self._children.items():
+            total += sum(values[:self._child_counts[table]].nbytes for values in columns.values())
+        return total
+
+class ClientView:
+    """A selection of a book's clients that the calculators read columns from.
+
+    rows is a slice for a contiguous selection, whose columns are NumPy views of the book's
+    storage, or an array of rows, whose columns are gathered when read.
+    """
+
+    def __init__(self, book, rows):
+        self.book = book
+        self.rows = rows
+
+    def __len__(self):
+        if isinstance(self.rows, slice):
+            return self.rows.stop - self.rows.start
+        return len(self.rows)
+
+    def column(self, name):
+        return self.book._clients[name][:self.book._count][self.rows]
+
+    def ids(self):
+        ids = np.empty(len(self.book), dtype=object)
+        for client_id, row in self.book.client_codes.items():
+            ids[row] = client_id
+        return ids[self.rows]
+
+    def children(self, table):
+        """Return a child table's columns for the selected clients, with client as the position in this view."""
+        starts, counts = self.column(f"{table}_start"), self.column(f"{table}_count")
+        columns = self.book._children[table]
+        if isinstance(self.rows, slice) and self.book._contiguous:
+            rows = slice(int(starts[0]), int(starts[-1] + counts[-1])) if len(self) else slice(0, 0)
+        else:
+            rows = _block_rows(starts, counts)
+        selected = {name: values[rows] for name, values in columns.items() if name != "client"}
+        selected["client"] = np.repeat(np.arange(len(self)), counts)
+        return selected
+
+    def retirement_inputs(self):
+        """Yield (client id, calculate_retirement_report's arguments other than name) for each selected client, one at a time.
+
+        Values are plain Python numbers and provision types are decoded back to their text, so the
+        report matches one calculated from the record the client was stored from.
+        """
+        types = {code: text for text, code in self.book.codes["type"].items()}
+        columns = {name: self.column(name) for name in RETIREMENT_COLUMNS}
+        provisions = self.children("provisions")
+        ends = np.cumsum(self.column("provisions_count"))
+        for position, client_id in enumerate(self.ids()):
+            rows = range(ends[position - 1] if position else 0, ends[position])
+            yield client_id, {
+                **{name: values[position].item() for name, values in columns.items()},
+                "provisions": [
+                    {"type": types[int(provisions["type"][row])], **{name: provisions[name][row].item() for name in CHILD_TABLES["provisions"] if name != "type"}}
+                    for row in rows
+                ]
+            }
+
+    def frame(self):
+        """Return the selected clients as a DataFrame, one row per client."""
+        return pd.DataFrame({"client_id": self.ids(), **{name: self.column(name) for name in CLIENT_COLUMNS}})
+
+def salary_tax(view, tax_year=tax_years.BASE_TAX_YEAR):
+    """evaluate_salary_tax for the view's clients under one tax year, as (clients,) arrays."""
+    stacked = tax_years.stack_tax_tables({tax_year: tax_years.TAX_YEARS[tax_year]})
+    tax = tax_years.evaluate_salary_tax(
+        stacked, view.column("gross_salary"), view.column("pension_contribution"), view.column("current_age"),
+        view.column("medical_contributions"), view.column("dependants")
+    )
+    return {name: values[:, 0] for name, values in tax.items()}
+
+def retirement_ledger(view, horizon_years=cashflow_ledger.HORIZON_YEARS):
+    """The cash-flow ledger for the view's clients, drawing the income calculate_retirement_plan projects (none when preserving capital)."""
+    years = view.column("retirement_age") - view.column("current_age")
+    future_annual_income = (
+        view.column("desired_monthly_income") * 12
+        * (1 + view.column("inflation_rate")) ** years * (1 + view.column("desired_annual_increase")) ** years
+    )
+    return cashflow_ledger.ledger_from_columns(
+        view.column("current_age"), view.column("retirement_age"), view.column("inflation_rate"), view.column("assumed_return"),
+        np.where(view.column("preserve_capital"), 0.0, future_annual_income), view.children("provisions"), horizon_years
+    )
+
+def budget_totals(view):
+    """calculate_budget for the view's clients: total expenses, remaining budget and savings potential."""
+    expenses = view.children("expenses")
+    total_expenses = np.bincount(expenses["client"], weights=expenses["amount"], minlength=len(view))
+    remaining_budget = view.column("monthly_income") - total_expenses
+    return {"total_expenses": total_expenses, "remaining_budget": remaining_budget, "savings_potential": np.maximum(0, remaining_budget)}
+
+def estate_totals(view, executor_fee_rate=None):
+    """Gross and liquid estate, capital gains tax (as calculate_cgt) and executor fees for the view's clients."""
+    if executor_fee_rate is None:
+        executor_fee_rate = estate_liquidity.EXECUTOR_FEE_RATE_DEFAULT
+    assets = view.children("assets")
+    def total(values):
+        return np.bincount(assets["client"], weights=values, minlength=len(view))
+    gross_estate = total(assets["market_value"])
+    capital_gains = total(np.maximum(0, assets["market_value"] - assets["base_cost"]))
+    return {
+        "gross_estate": gross_estate,
+        "liquid_assets": total(np.where(assets["liquid"], assets["market_value"], 0.0)),
+        "capital_gains": capital_gains,
+        "cgt": second_death.capital_gains_tax(capital_gains, view.column("marginal_tax_rate")),
+        "executor_fees": gross_estate * executor_fee_rate
+    }
+
+def sample_records(count, seed=0):
+    """Yield synthetic client records with salaries, provisions, estate assets and budget lines."""
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        age = int(rng.integers(20, 64))
+        gross = float(np.round(rng.lognormal(np.log(350000), 0.7), -2))
+        yield {
+            "name": f"Client {i}",
+            "current_age": age,
+            "retirement_age": int(rng.integers(age + 1, 71)),
+            "gross_salary": gross,
+            "pension_contribution": float(np.round(gross * rng.uniform(0, 0.2), -2)),
+            "medical_contributions": 0.0,
+            "dependants": int(rng.integers(0, 5)),
+            "monthly_income": gross / 12,
+            "desired_monthly_income": float(np.round(gross / 12 * 0.7, -2)),
+            "desired_annual_increase": 0.03,
+            "inflation_rate": 0.06,
+            "assumed_return": 0.07,
+            "marginal_tax_rate": 0.45,
+            "provisions": [
+                {"type": "Retirement Annuity", "current_value": float(rng.uniform(0, 2000000)), "annual_return": 0.08,
+                 "monthly_contribution": float(np.round(gross * 0.1 / 12, -2)), "contribution_increase": 0.05}
+                for _ in range(rng.integers(1, 4))
+            ],
+            "assets": [
+                {"kind": "Property", "market_value": float(rng.uniform(1000000, 8000000)), "base_cost": float(rng.uniform(500000, 1000000)), "liquid": False},
+                {"kind": "Cash", "market_value": float(rng.uniform(0, 500000)), "liquid": True}
+            ],
+            "expenses": [("Housing", gross / 12 * 0.3), ("Groceries", gross / 12 * 0.15), ("Transport", gross / 12 * 0.1)]
+        }
+
+def benchmark(count, seed=0):
+    """Compare the book's memory with a list of client dicts, and time indexed lookups and calculators on slices."""
+    tracemalloc.start()
+    records = list(sample_records(count, seed))
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    book = ClientBook.from_records(records)
+    build_seconds = time.perf_counter() - start
+    del records
+    report = {"clients": count, "book_bytes": book.nbytes(), "dict_bytes": dict_bytes, "build_seconds": build_seconds}
+
+    ids = [f"Client {i}" for i in np.random.default_rng(seed).integers(0, count, 1000)]
+    start = time.perf_counter()
+    book.lookup(ids)
+    report["lookup_1000_seconds"] = time.perf_counter() - start
+    for clustered in [False, True]:
+        if clustered:
+            book.cluster("gross_salary")
+        start = time.perf_counter()
+        view = book.between("gross_salary", 250000, 750000)
+        tax = salary_tax(view)
+        totals = budget_totals(view)
+        estate = estate_totals(view)
+        report["clustered" if clustered else "unclustered"] = {
+            "clients": len(view),
+            "zero_copy": bool(np.shares_memory(view.column("gross_salary"), book._clients["gross_salary"])),
+            "seconds": time.perf_counter() - start,
+            "paye_total": float(tax["paye"].sum()),
+            "savings_total": float(totals["savings_potential"].sum()),
+            "cgt_total": float(estate["cgt"].sum())
+        }
+    start = time.perf_counter()
+    ledger = retirement_ledger(book.between("current_age", 55, 63))
+    report["ledger_ages_55_to_63"] = {"clients": len(ledger["capital_at_retirement"]), "seconds": time.perf_counter() - start}
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the columnar client book against lists of client dicts.")
+    parser.add_argument("--clients", type=int, default=100000, help="Number of synthetic clients (default: 100000)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.clients), indent=2))
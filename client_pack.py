@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import zipfile
+import argparse
+from itertools import islice
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import xlsxwriter
+import client_book
+import retirement_calculator
+
+# Each worker may have this many clients queued ahead of the writer, which bounds memory use
+MAX_IN_FLIGHT_PER_WORKER = 2
+SHEET_NAME_LIMIT = 31  # Excel's maximum worksheet name length
+INVALID_SHEET_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+INVALID_FILE_CHARACTERS = re.compile(r"[^\w\- ]")
+REQUIRED_FIELDS = [*client_book.RETIREMENT_COLUMNS, "provisions"]
+PROVISION_FIELDS = list(client_book.CHILD_TABLES["provisions"])
+
+def load_clients(path):
+    """Lazily read client records from a JSON Lines file, one client per line."""
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+def load_book(clients):
+    """Load client records into a ClientBook keyed by their position, returning (book, names, errors).
+
+    names lists every record's name in order and errors maps the position of each record that
+    could not be stored to the reason, so it can still be reported in its place.
+    """
+    book = client_book.ClientBook()
+    names, errors = [], {}
+    for position, client in enumerate(clients):
+        names.append(client.get("name", ""))
+        missing = [field for field in REQUIRED_FIELDS if field not in client]
+        missing += sorted({field for provision in client.get("provisions", []) for field in PROVISION_FIELDS if field not in provision})
+        if missing:
+            errors[position] = f"Missing fields: {', '.join(missing)}"
+            continue
+        try:
+            book.add_client(position, client)
+        except (TypeError, ValueError) as e:
+            errors[position] = str(e)
+    return book, names, errors
+
+def calculate_client_report(client):
+    """Calculate the retirement report for one client, returning (name, report, error)."""
+    name = client.get("name", "")
+    try:
+        return name, retirement_calculator.calculate_retirement_report(**client), None
+    except Exception as e:
+        return name, None, str(e)
+
+def build_client_workbook(client):
+    """Calculate one client's report and render it as xlsx bytes, returning (name, workbook, error)."""
+    name, report, error = calculate_client_report(client)
+    if report is None:
+        return name, None, error
+    try:
+        return name, retirement_calculator.build_retirement_workbook(report).getvalue(), None
+    except Exception as e:
+        return name, None, str(e)
+
+def iter_client_results(clients, worker, max_workers=None):
+    """Run worker over clients on a process pool, yielding results in order with a bounded queue."""
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * MAX_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for client in clients:
+            pending.append(executor.submit(worker, client))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_book_results(clients, worker, max_workers=None):
+    """Run worker over clients on a process pool through a ClientBook, yielding results in record order with a bounded queue.
+
+    Records are read a window at a time into a ClientBook, and each worker gets one client's
+    report inputs rebuilt from the book's columns; records the book could not store are yielded
+    as errors in their place. Only one window's book and the pool's queue are held at once.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * MAX_IN_FLIGHT_PER_WORKER
+    clients = iter(clients)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        while True:
+            book, names, errors = load_book(islice(clients, window))
+            if not names:
+                break
+            inputs = book.view().retirement_inputs()
+            for position, name in enumerate(names):
+                if position in errors:
+                    future = Future()
+                    future.set_result((name, None, errors[position]))
+                else:
+                    future = executor.submit(worker, {"name": name, **next(inputs)[1]})
+                pending.append(future)
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def iter_client_reports(clients, max_workers=None):
+    """Yield (name, report, error) for each client, one at a time."""
+    return iter_book_results(clients, calculate_client_report, max_workers)
+
+def unique_name(name, used, limit=None, pattern=INVALID_SHEET_CHARACTERS):
+    """Return a cleaned version of name that is not already in used, and record it."""
+    base = pattern.sub("_", name.strip()) or "Client"
+    if limit:
+        base = base[:limit]
+    candidate = base
+    counter = 2
+    while candidate.lower() in used:
+        suffix = f" ({counter})"
+        candidate = (base[:limit - len(suffix)] if limit else base) + suffix
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+def write_table(worksheet, row, columns, rows):
+    """Write a header and data rows starting at row, returning the next free row."""
+    worksheet.write_row(row, 0, columns)
+    row += 1
+    for values in rows:
+        worksheet.write_row(row, 0, values)
+        row += 1
+    return row
+
+def write_report_sheet(worksheet, report):
+    """Write a client's summary, provisions and depletion chart data to one worksheet, row by row."""
+    summary = report["summary_data"]
+    row = write_table(worksheet, 0, list(summary), [[values[0] for values in summary.values()]])
+    provisions = report["provisions_data"]
+    if provisions:
+        row = write_table(worksheet, row + 1, list(provisions[0]), [list(p.values()) for p in provisions])
+    chart_data = report["chart_data"]
+    if chart_data is not None:
+        worksheet.write(row + 1, 0, "Chart Data")
+        write_table(worksheet, row + 2, list(chart_data), zip(*chart_data.values()))
+
+def write_compliance_workbook(clients, path, max_workers=None):
+    """Stream every client's retirement report into one workbook on disk, one sheet per client.
+
+    Clients are read a window at a time into a ClientBook, and reports are computed on a process
+    pool and written by this process alone. The workbook is opened in xlsxwriter's
+    constant_memory mode, so each row is flushed to disk once written and only one window of
+    clients and the reports waiting in the pool's bounded queue are ever held in memory.
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+    index_sheet = workbook.add_worksheet("Clients")
+    index_sheet.write_row(0, 0, ["Client", "Sheet", "Status"])
+    used_names = {"clients"}
+    written = failed = 0
+    for row, (name, report, error) in enumerate(iter_client_reports(clients, max_workers), start=1):
+        if report is None:
+            index_sheet.write_row(row, 0, [name, "", f"Error: {error}"])
+            failed += 1
+            continue
+        sheet_name = unique_name(name, used_names, SHEET_NAME_LIMIT)
+        write_report_sheet(workbook.add_worksheet(sheet_name), report)
+        index_sheet.write_row(row, 0, [name, sheet_name, "OK"])
+        written += 1
+    workbook.close()
+    return written, failed
+
+def write_compliance_zip(clients, path, max_workers=None):
+    """Stream one workbook per client into a zip archive on disk.
+
+    Clients are read a window at a time into a ClientBook, and workbooks are built on the process
+    pool and appended to the archive by this process as they arrive, so only one window of
+    clients and the pool's bounded queue of workbooks are ever held in memory.
+    """
+    used_names = set()
+    errors = []
+    written = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, workbook, error in iter_book_results(clients, build_client_workbook, max_workers):
+            if workbook is None:
+                errors.append(f"{name}: {error}")
+                continue
+            file_name = unique_name(name, used_names, pattern=INVALID_FILE_CHARACTERS)
+            archive.writestr(f"{file_name}.xlsx", workbook)
+            written += 1
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors))
+    return written, len(errors)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a retirement compliance pack for a book of clients.")
+    parser.add_argument("clients", help="JSON Lines file with one retirement_calculator.calculate_retirement_report input per line")
+    parser.add_argument("output", help="Output .xlsx workbook, or .zip archive of per-client workbooks")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+    writer = write_compliance_zip if args.output.lower().endswith(".zip") else write_compliance_workbook
+    written, failed = writer(load_clients(args.clients), args.output, args.workers)
+    print(f"Wrote {written} client reports to {args.output} ({failed} failed).")
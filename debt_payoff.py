@@ -0,0 +1,236 @@
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+MONTHS_PER_YEAR = 12
+MAX_MONTHS = 360  # Months simulated; debts or goals not reached by then are reported as NOT_REACHED
+STRATEGIES = ["Avalanche", "Snowball", "Custom"]
+EXTRA_PAYMENT_STEPS = 5  # Extra payments compared, evenly spaced from nothing to the whole remaining budget
+PAID_TOLERANCE = 0.005  # A balance under half a cent is settled
+NOT_REACHED = -1
+
+def payment_orders(balance, rate, priority):
+    """Each strategy's order of paying debts, as a (strategies x debts) array of debt positions.
+
+    Avalanche pays the highest rate first and snowball the smallest balance first, each breaking
+    ties with the other's rule. Custom follows priority (1 first); debts without one (NaN) come
+    last, and equal priorities keep the order the debts were entered.
+    """
+    balance = np.asarray(balance, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    priority = np.nan_to_num(np.asarray(priority, dtype=float), nan=np.inf)
+    entered = np.arange(len(balance))
+    return np.array([
+        np.lexsort((entered, balance, -rate)),
+        np.lexsort((entered, -rate, balance)),
+        np.lexsort((entered, priority))
+    ]).reshape(len(STRATEGIES), len(balance))
+
+def minimum_below_interest(balance, rate, minimum_payment):
+    """Mask of the debts whose minimum payment does not cover their first month's interest.
+
+    On minimum payments alone such a balance never falls, so it is only paid off by extra
+    payments or, once other debts are cleared, by their minimums rolling on to it.
+    """
+    balance = np.asarray(balance, dtype=float)
+    return (balance > 0) & (np.asarray(minimum_payment, dtype=float) <= balance * np.asarray(rate, dtype=float) / MONTHS_PER_YEAR)
+
+def extra_payments(remaining_budget, steps=EXTRA_PAYMENT_STEPS):
+    """The grid of monthly extra payments to compare: nothing up to the whole remaining budget."""
+    if remaining_budget <= 0:
+        return np.zeros(1)
+    return np.linspace(0, remaining_budget, steps)
+
+def simulate(balance, rate, minimum_payment, priority, goal_targets, remaining_budget, extras=None, savings_rate=0.0, max_months=MAX_MONTHS):
+    """Project every strategy and extra payment month by month at once.
+
+    Minimum payments are part of the budget's expenses, so each month every debt gets its minimum
+    (or what is left of it) and the extra payment goes to debts in the strategy's order. A paid-off
+    debt's minimum rolls on to the next debt. Whatever the remaining budget does not pay towards
+    debts, including the whole debt budget once debts are cleared, is saved. Savings grow at
+    savings_rate a year and fill the goals in the order given.
+
+    Debt interest is the annual rate / 12 on the balance at the start of the month; payments are at
+    its end. The loop is over months only: each month works on (strategies x extras x debts) arrays,
+    and stops early once every debt is paid and every goal reached in every scenario.
+
+    Returns (strategies x extras x months x debts) balances, payments and interest, (strategies x
+    extras x months) savings and the summaries total_interest, payoff_month (per debt),
+    debt_free_month and goal_month (per goal), as 1-based months or NOT_REACHED.
+    """
+    balance = np.asarray(balance, dtype=float)
+    monthly_rate = np.asarray(rate, dtype=float) / MONTHS_PER_YEAR
+    minimum_payment = np.asarray(minimum_payment, dtype=float)
+    goal_targets = np.asarray(goal_targets, dtype=float)
+    extras = extra_payments(remaining_budget) if extras is None else np.asarray(extras, dtype=float)
+    orders = payment_orders(balance, rate, priority)
+    strategies, debts = orders.shape
+    shape = (strategies, len(extras))
+    # Debts are worked in each strategy's order so the extra can cascade down a cumulative sum
+    balance_by_order = np.broadcast_to(balance[orders][:, None, :], shape + (debts,)).copy()
+    rate_by_order = monthly_rate[orders][:, None, :]
+    minimum_by_order = minimum_payment[orders][:, None, :]
+    debt_budget = minimum_payment.sum() + extras[None, :]
+    saved_from_budget = np.maximum(0, remaining_budget) - extras[None, :]
+    savings_growth = (1 + savings_rate) ** (1 / MONTHS_PER_YEAR) - 1
+    total_target = goal_targets.sum()
+
+    balances = np.zeros(shape + (max_months, debts))
+    payments = np.zeros(shape + (max_months, debts))
+    interest = np.zeros(shape + (max_months, debts))
+    savings = np.zeros(shape + (max_months,))
+    saved = np.zeros(shape)
+    months = max_months
+    for month in range(max_months):
+        month_interest = balance_by_order * rate_by_order
+        owing = balance_by_order + month_interest
+        minimum = np.minimum(minimum_by_order, owing)
+        after_minimum = owing - minimum
+        pool = debt_budget - minimum.sum(axis=-1)
+        ahead = np.cumsum(after_minimum, axis=-1) - after_minimum
+        extra = np.clip(pool[..., None] - ahead, 0, after_minimum)
+        payment = minimum + extra
+        balance_by_order = owing - payment
+        balance_by_order[balance_by_order < PAID_TOLERANCE] = 0.0
+        saved = saved * (1 + savings_growth) + saved_from_budget + pool - extra.sum(axis=-1)
+        balances[:, :, month] = balance_by_order
+        payments[:, :, month] = payment
+        interest[:, :, month] = month_interest
+        savings[:, :, month] = saved
+        if not balance_by_order.any() and (saved >= total_target).all():
+            months = month + 1
+            break
+
+    # Back from payment order to the order the debts were entered
+    entered = np.argsort(orders, axis=1)[:, None, None, :]
+    balances = np.take_along_axis(balances[:, :, :months], entered, axis=-1)
+    payments = np.take_along_axis(payments[:, :, :months], entered, axis=-1)
+    interest = np.take_along_axis(interest[:, :, :months], entered, axis=-1)
+    savings = savings[:, :, :months]
+    paid = balances == 0
+    payoff_month = np.where(paid.any(axis=2), paid.argmax(axis=2) + 1, NOT_REACHED)
+    payoff_month[:, :, balance == 0] = 0
+    reached = savings[..., None] >= np.cumsum(goal_targets)
+    return {
+        "strategies": STRATEGIES[:strategies],
+        "extras": extras,
+        "balances": balances,
+        "payments": payments,
+        "interest": interest,
+        "savings": savings,
+        "total_interest": interest.sum(axis=(2, 3)),
+        "payoff_month": payoff_month,
+        "debt_free_month": np.where((payoff_month == NOT_REACHED).any(axis=-1), NOT_REACHED, payoff_month.max(axis=-1, initial=0)),
+        "goal_month": np.where(reached.any(axis=2), reached.argmax(axis=2) + 1, NOT_REACHED)
+    }
+
+def month_label(months, start=None):
+    """A month counted from start (this month by default) as e.g. 'Mar 2028', or 'Not within 30 years'."""
+    if months == NOT_REACHED:
+        return f"Not within {MAX_MONTHS // MONTHS_PER_YEAR} years"
+    start = pd.Period.now("M") if start is None else start
+    return (start + int(months)).strftime("%b %Y")
+
+def comparison_frame(plan, goal_names=(), start=None):
+    """One row per strategy and extra payment with total interest, the interest saved and when debts and goals are reached.
+
+    Without debts the strategies are all the same, so there is one row per extra payment with the goals only.
+    """
+    has_debts = plan["balances"].shape[-1] > 0
+    rows = []
+    for s, strategy in enumerate(plan["strategies"] if has_debts else plan["strategies"][:1]):
+        for e, extra in enumerate(plan["extras"]):
+            row = {"Extra Monthly Payment (R)": extra}
+            if has_debts:
+                row = {
+                    "Strategy": strategy,
+                    **row,
+                    "Total Interest (R)": plan["total_interest"][s, e],
+                    "Interest Saved vs No Extra (R)": plan["total_interest"][s, 0] - plan["total_interest"][s, e],
+                    "Debt-Free By": month_label(plan["debt_free_month"][s, e], start)
+                }
+            for g, goal in enumerate(goal_names):
+                row[f"{goal} Reached By"] = month_label(plan["goal_month"][s, e, g], start)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def schedule_frame(plan, strategy, extra_index, debt_names, start=None):
+    """The month-by-month schedule of one strategy and extra payment: each debt's balance, total payment, interest and savings."""
+    s = plan["strategies"].index(strategy)
+    start = pd.Period.now("M") if start is None else start
+    months = plan["balances"].shape[2]
+    schedule = pd.DataFrame({"Month": [(start + month).strftime("%b %Y") for month in range(1, months + 1)]})
+    for d, name in enumerate(debt_names):
+        schedule[f"{name} Balance (R)"] = plan["balances"][s, extra_index, :, d]
+    schedule["Debt Payments (R)"] = plan["payments"][s, extra_index].sum(axis=-1)
+    schedule["Interest (R)"] = plan["interest"][s, extra_index].sum(axis=-1)
+    schedule["Savings Balance (R)"] = plan["savings"][s, extra_index]
+    return schedule
+
+def _simulate_scenario(balance, monthly_rate, minimum_payment, order, extra, max_months):
+    """One strategy and extra payment, a debt at a time, to check simulate against."""
+    balance = list(balance)
+    total_interest = 0.0
+    payoff = [0 if value == 0 else NOT_REACHED for value in balance]
+    for month in range(1, max_months + 1):
+        if not any(balance):
+            break
+        pool = extra
+        for d in range(len(balance)):
+            interest = balance[d] * monthly_rate[d]
+            total_interest += interest
+            balance[d] += interest
+            minimum = min(minimum_payment[d], balance[d])
+            balance[d] -= minimum
+            pool += minimum_payment[d] - minimum
+        for d in order:
+            payment = min(pool, balance[d])
+            balance[d] -= payment
+            pool -= payment
+        for d in range(len(balance)):
+            if balance[d] < PAID_TOLERANCE:
+                balance[d] = 0.0
+                if payoff[d] == NOT_REACHED:
+                    payoff[d] = month
+    return total_interest, payoff
+
+def benchmark(debts, steps=EXTRA_PAYMENT_STEPS, seed=0):
+    """Time simulate against a scenario-at-a-time loop and report the largest differences."""
+    rng = np.random.default_rng(seed)
+    balance = np.round(rng.uniform(2000, 250000, debts), 2)
+    rate = np.round(rng.uniform(0.07, 0.28, debts), 4)
+    minimum_payment = np.round(np.maximum(balance * rate / MONTHS_PER_YEAR * 1.2, balance * 0.02), 2)
+    priority = rng.permutation(debts) + 1.0
+    remaining_budget = 5000.0
+    extras = extra_payments(remaining_budget, steps)
+
+    start = time.perf_counter()
+    plan = simulate(balance, rate, minimum_payment, priority, [], remaining_budget, extras)
+    vectorized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    orders = payment_orders(balance, rate, priority)
+    looped = [
+        [_simulate_scenario(balance, rate / MONTHS_PER_YEAR, minimum_payment, orders[s], extra, MAX_MONTHS) for extra in extras]
+        for s in range(len(orders))
+    ]
+    loop_seconds = time.perf_counter() - start
+    return {
+        "debts": debts,
+        "scenarios": len(STRATEGIES) * len(extras),
+        "months": plan["balances"].shape[2],
+        "vectorized_seconds": vectorized_seconds,
+        "loop_seconds": loop_seconds,
+        "max_interest_difference": float(np.abs(plan["total_interest"] - np.array([[interest for interest, _ in row] for row in looped])).max()),
+        "payoff_month_differences": int((plan["payoff_month"] != np.array([[payoff for _, payoff in row] for row in looped])).sum()),
+        "total_interest": dict(zip(STRATEGIES, plan["total_interest"][:, -1].round(2).tolist()))
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the vectorized debt payoff simulation with a scenario-at-a-time loop.")
+    parser.add_argument("--debts", type=int, default=10, help="Number of synthetic debts (default: 10)")
+    parser.add_argument("--steps", type=int, default=EXTRA_PAYMENT_STEPS, help=f"Extra payments compared (default: {EXTRA_PAYMENT_STEPS})")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.debts, args.steps), indent=2))
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Drawdown rules, as in retirement_calculator.calculate_years_until_depletion
+MAX_DRAWDOWN_RATE = 0.175  # Legislative maximum
+CAPITAL_FLOOR = 125000  # Capital at or below this is withdrawn in full in one year
+DEFAULT_HORIZON = 40
+RETURN_HISTORY_COLUMNS = ["Year", "Inflation"]  # Plus one column of annual returns per asset class
+
+def load_return_history(file):
+    """Read a CSV of annual returns and inflation, in percent, with one row per consecutive year.
+
+    The file needs a Year column, an Inflation column (e.g. CPI) and one column per asset class
+    (e.g. Equity, Bonds, Cash). Returns a DataFrame indexed by year with values as decimals.
+    """
+    history = pd.read_csv(file)
+    history.columns = [column.strip() for column in history.columns]
+    missing = [column for column in RETURN_HISTORY_COLUMNS if column not in history.columns]
+    if missing:
+        raise ValueError(f"Return history is missing columns: {', '.join(missing)}")
+    if len(history.columns) < 3:
+        raise ValueError("Return history needs at least one asset return column.")
+    history = history.set_index("Year").sort_index()
+    if history.isna().any().any():
+        raise ValueError("Return history has missing values.")
+    if not (np.diff(history.index) == 1).all():
+        raise ValueError("Return history must have one row for every consecutive year.")
+    return history.astype(float) / 100
+
+def asset_classes(history):
+    """Return the asset return columns of a return history."""
+    return [column for column in history.columns if column != "Inflation"]
+
+def portfolio_returns(history, weights):
+    """Return the annual return of a portfolio rebalanced yearly to weights (asset class -> weight)."""
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Portfolio weights must add up to more than zero.")
+    return sum(history[asset] * weight for asset, weight in weights.items()) / total
+
+def backtest_drawdown(capital, annual_income, returns, inflation, horizon=DEFAULT_HORIZON):
+    """Replay the drawdown rules through every historical window of horizon years at once.
+
+    returns and inflation are equal-length annual series. Window i starts in year i: its first
+    withdrawal is annual_income, later withdrawals grow with that window's inflation, each is capped
+    at the legislative maximum drawdown, and capital at or below the floor is paid out in full.
+    sliding_window_view gives every window as a strided (windows x horizon) view without copying, so
+    the replay is one vectorized step per year across all start years.
+
+    Returns (depletion_years, final_capital), where depletion_years is counted like
+    calculate_years_until_depletion and is NaN for windows that last the whole horizon.
+    """
+    returns = np.asarray(returns, dtype=float)
+    inflation = np.asarray(inflation, dtype=float)
+    if len(returns) < horizon:
+        raise ValueError(f"Return history covers {len(returns)} years, fewer than the {horizon}-year horizon.")
+    return_windows = sliding_window_view(returns, horizon)
+    inflation_windows = sliding_window_view(inflation, horizon)
+    # Withdrawal targets: the first year is annual_income, then it compounds with each window's inflation
+    growth = np.cumprod(1 + inflation_windows, axis=1)
+    targets = annual_income * np.concatenate([np.ones((len(growth), 1)), growth[:, :-1]], axis=1)
+
+    current_capital = np.full(len(return_windows), float(capital))
+    # With no capital there is nothing to draw, which calculate_years_until_depletion counts as 0 years
+    depletion_years = np.full(len(return_windows), 0.0 if capital <= 0 else np.nan)
+    alive = current_capital > 0
+    for year in range(horizon):
+        at_floor = alive & (current_capital <= CAPITAL_FLOOR)
+        depletion_years[at_floor] = year + 1
+        current_capital[at_floor] = 0
+        alive &= ~at_floor
+        withdrawal = np.minimum(targets[:, year], current_capital * MAX_DRAWDOWN_RATE)
+        current_capital = np.where(alive, (current_capital - withdrawal) * (1 + return_windows[:, year]), current_capital)
+    return depletion_years, current_capital
+
+def summarise_backtest(start_years, depletion_years, retirement_age, horizon=DEFAULT_HORIZON):
+    """Return the failure rate, worst-case and median depletion ages and a per-start-year table.
+
+    A window fails when capital is depleted within the horizon. The median depletion age counts
+    surviving windows as lasting beyond the horizon, so it is None when half or more survive.
+    """
+    depletion_ages = retirement_age + depletion_years
+    failed = ~np.isnan(depletion_years)
+    ordered = np.sort(np.where(failed, depletion_ages, np.inf))
+    median = np.median(ordered)
+    table = pd.DataFrame({
+        "Start Year": start_years,
+        "Depletion Age": depletion_ages,
+        "Depleted": failed
+    })
+    return {
+        "windows": len(depletion_years),
+        "failure_rate": failed.mean() * 100 if len(failed) else 0.0,
+        "worst_case_age": float(ordered[0]) if failed.any() else None,
+        "median_age": float(median) if np.isfinite(median) else None,
+        "horizon_age": retirement_age + horizon,
+        "table": table
+    }
+
+def backtest_history(history, weights, capital, annual_income, retirement_age, horizon=DEFAULT_HORIZON):
+    """Backtest a portfolio mix over every start year of a return history and summarise the outcome."""
+    returns = portfolio_returns(history, weights)
+    depletion_years, _ = backtest_drawdown(capital, annual_income, returns.to_numpy(), history["Inflation"].to_numpy(), horizon)
+    return summarise_backtest(history.index[:len(depletion_years)].to_numpy(), depletion_years, retirement_age, horizon)
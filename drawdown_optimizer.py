@@ -0,0 +1,70 @@
+import numpy as np
+
+MIN_DRAWDOWN_RATE = 0.025  # Legislative minimum
+MAX_DRAWDOWN_RATE = 0.175  # Legislative maximum
+CAPITAL_FLOOR = 125000  # Capital at or below this counts as depleted, as in calculate_years_until_depletion
+DEFAULT_PATHS = 5000
+DEFAULT_VOLATILITY = 0.12
+BISECTION_STEPS = 20  # Halves the 15-point band to well under 0.01% per path
+SEED = 0  # Fixed so the same inputs always give the same answer
+
+def simulate_returns(assumed_return, volatility, years, paths=DEFAULT_PATHS, seed=SEED):
+    """Return a (paths x years) array of normally distributed annual returns, floored at -99%."""
+    rng = np.random.default_rng(seed)
+    return np.maximum(assumed_return + volatility * rng.standard_normal((paths, years)), -0.99)
+
+def survives(capital, drawdown_rates, returns, inflation_rate):
+    """Return, per path, whether capital stays above the floor for every simulated year.
+
+    Each path starts by drawing drawdown_rates[path] of capital; the rand income then rises with
+    inflation, kept within the legislative drawdown band of the capital left each year.
+    """
+    current_capital = np.full(len(returns), float(capital))
+    income = current_capital * drawdown_rates
+    alive = current_capital > CAPITAL_FLOOR
+    for year in range(returns.shape[1]):
+        withdrawal = np.clip(income, current_capital * MIN_DRAWDOWN_RATE, current_capital * MAX_DRAWDOWN_RATE)
+        current_capital = (current_capital - withdrawal) * (1 + returns[:, year])
+        alive &= current_capital > CAPITAL_FLOOR
+        income = income * (1 + inflation_rate)
+    return alive
+
+def max_safe_rates(capital, returns, inflation_rate, steps=BISECTION_STEPS):
+    """Bisect every path at once for the highest initial drawdown rate it survives.
+
+    The capital left on a path only falls as the initial rate rises, so each path has one
+    threshold rate. All paths share the same returns (common random numbers) and are bisected
+    together, so each step is one batched simulation. Paths that fail even at the legislative
+    minimum get -inf; paths that survive the legislative maximum get the maximum.
+    """
+    paths = len(returns)
+    low = np.full(paths, MIN_DRAWDOWN_RATE)
+    high = np.full(paths, MAX_DRAWDOWN_RATE)
+    safe_at_low = survives(capital, low, returns, inflation_rate)
+    safe_at_high = survives(capital, high, returns, inflation_rate)
+    for _ in range(steps):
+        middle = (low + high) / 2
+        safe = survives(capital, middle, returns, inflation_rate)
+        low = np.where(safe, middle, low)
+        high = np.where(safe, high, middle)
+    return np.where(safe_at_high, MAX_DRAWDOWN_RATE, np.where(safe_at_low, low, -np.inf))
+
+def safe_drawdown_rate(capital, assumed_return, inflation_rate, years, success_probability, volatility=DEFAULT_VOLATILITY, paths=DEFAULT_PATHS, seed=SEED, current_rate=None):
+    """Find the highest initial drawdown rate that keeps capital above the floor for years with the given probability.
+
+    Returns a dict with the rate (None if even the legislative minimum falls short), the share of
+    simulated paths that survive at that rate and, if current_rate is given, at current_rate.
+    """
+    returns = simulate_returns(assumed_return, volatility, years, paths, seed)
+    thresholds = max_safe_rates(capital, returns, inflation_rate)
+    # The rate that a success_probability share of paths can sustain
+    rate = np.quantile(thresholds, 1 - success_probability, method="lower")
+    result = {
+        "rate": float(rate) if np.isfinite(rate) else None,
+        "success_probability": float((thresholds >= rate).mean()) if np.isfinite(rate) else float(np.isfinite(thresholds).mean()),
+        "paths": paths,
+        "years": years
+    }
+    if current_rate is not None:
+        result["current_success_probability"] = float((thresholds >= current_rate).mean())
+    return result
@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
 import io
+import excel_exports
+import memory_profile
+import second_death
+import validation
 
 # Estate Duty Rates (2025)
 ESTATE_DUTY_ABATEMENT = 3500000
@@ -41,7 +45,61 @@ def calculate_executor_fees(gross_value, executor_fee_rate):
     base_fee = gross_value * executor_fee_rate
     return base_fee
 
-def show():
+RESULTS_KEY = "estate_liquidity_results"
+INPUT_SCHEMA = validation.schema({
+    "name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "cash": validation.field("Cash in Bank/Savings (R)", minimum=0),
+    "life_insurance_to_estate": validation.field("Life Insurance Payable to Estate (R)", minimum=0),
+    "other_assets": validation.field("Other Non-Liquid Assets (R)", minimum=0),
+    "debts": validation.field("Outstanding Debts (R)", minimum=0),
+    "medical_bills": validation.field("Medical Bills or Pre-Death Expenses (R)", minimum=0),
+    "cash_bequests": validation.field("Cash Bequests to Beneficiaries (R)", minimum=0),
+    "spouse_bequest_value": validation.field("Bequests to Surviving Spouse (R)", minimum=0),
+    "pbo_bequest_value": validation.field("Bequests to Public Benefit Organizations (R)", minimum=0),
+    "marginal_tax_rate": validation.field("Marginal Tax Rate for CGT", minimum=0, maximum=0.45, message="Marginal tax rate must be between 0 and 45%."),
+    "executor_fee_rate": validation.field("Executor Fee Rate", minimum=0, message="Executor fee rate must be non-negative.")
+})
+PROPERTY_SCHEMA = validation.schema({"market_value": validation.field("Market Value (R)", minimum=0)})
+INVESTMENT_SCHEMA = validation.schema({
+    "market_value": validation.field("Market Value (R)", minimum=0),
+    "base_cost": validation.field("Base Cost (R)", minimum=0)
+})
+COUPLE_SCHEMA = validation.schema({
+    "Couple": validation.field("Couple", text=True),
+    "First Gross Estate (R)": validation.field("First Gross Estate (R)", minimum=0),
+    "First Liquid Assets (R)": validation.field("First Liquid Assets (R)", minimum=0),
+    "First Capital Gains (R)": validation.field("First Capital Gains (R)", minimum=0),
+    "First Liabilities (R)": validation.field("First Liabilities (R)", minimum=0),
+    "Spouse Share (%)": validation.field("Spouse Share (%)", minimum=0, maximum=100),
+    "PBO Bequests (R)": validation.field("PBO Bequests (R)", minimum=0),
+    "Survivor Gross Estate (R)": validation.field("Survivor Gross Estate (R)", minimum=0),
+    "Survivor Liquid Assets (R)": validation.field("Survivor Liquid Assets (R)", minimum=0),
+    "Survivor Capital Gains (R)": validation.field("Survivor Capital Gains (R)", minimum=0),
+    "Survivor Liabilities (R)": validation.field("Survivor Liabilities (R)", minimum=0)
+}, [
+    validation.rule(["First Gross Estate (R)", "First Liquid Assets (R)"], lambda table: table["First Liquid Assets (R)"] <= table["First Gross Estate (R)"], "Liquid assets cannot exceed the gross estate."),
+    validation.rule(["Survivor Gross Estate (R)", "Survivor Liquid Assets (R)"], lambda table: table["Survivor Liquid Assets (R)"] <= table["Survivor Gross Estate (R)"], "Liquid assets cannot exceed the gross estate.")
+])
+
+def build_estate_workbook(summary_data):
+    """Write the estate liquidity summary to Excel and return the workbook bytes."""
+    summary_df = pd.DataFrame(summary_data)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, index=False, sheet_name="Estate Liquidity Summary")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your Estate Liquidity Summary.",
+                "There are no charts in this tool, but you can create your own in Excel.",
+                "For example, select your data and use Insert > Chart to visualize your results."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the estate inputs and store the calculated results in session state on submit."""
     st.write("Enter details to assess your estate's liquidity and ensure your beneficiaries are protected.")
     st.markdown(
         "<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>Note: Estate duty rates are based on 2025 South African laws: R3.5M abatement, 20% up to R30M, 25% above R30M. Verify with a tax professional for your specific case.</p>",
@@ -79,63 +137,159 @@ def show():
     marginal_tax_rate = st.number_input("Marginal Tax Rate for CGT (e.g., 0.45 for 45%)", min_value=0.0, max_value=0.45, value=0.45, step=0.01)
     executor_fee_rate = st.number_input("Executor Fee Rate (%)", min_value=0.0, max_value=10.0, value=EXECUTOR_FEE_RATE_DEFAULT * 100, step=0.1) / 100
     if st.button("Calculate Estate Liquidity"):
-        if not name.strip():
-            st.error("Please enter a name.")
-        elif cash < 0 or life_insurance_to_estate < 0 or any(p < 0 for p in properties) or any(i["market_value"] < 0 or i["base_cost"] < 0 for i in investments) or other_assets < 0 or debts < 0 or medical_bills < 0 or cash_bequests < 0 or spouse_bequest_value < 0 or pbo_bequest_value < 0 or marginal_tax_rate < 0 or marginal_tax_rate > 0.45 or executor_fee_rate < 0:
-            st.error("All financial inputs must be non-negative, marginal tax rate must be between 0 and 45%, and executor fee rate must be non-negative.")
+        _, property_errors = validation.validate(pd.DataFrame({"market_value": properties}, dtype=float), PROPERTY_SCHEMA)
+        _, investment_errors = validation.validate(pd.DataFrame(investments, columns=["market_value", "base_cost"]), INVESTMENT_SCHEMA)
+        errors = validation.validate_inputs({
+            "name": name, "cash": cash, "life_insurance_to_estate": life_insurance_to_estate, "other_assets": other_assets,
+            "debts": debts, "medical_bills": medical_bills, "cash_bequests": cash_bequests, "spouse_bequest_value": spouse_bequest_value,
+            "pbo_bequest_value": pbo_bequest_value, "marginal_tax_rate": marginal_tax_rate, "executor_fee_rate": executor_fee_rate
+        }, INPUT_SCHEMA) + validation.error_messages(property_errors, "Property") + validation.error_messages(investment_errors, "Investment")
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                gross_estate = cash + life_insurance_to_estate + sum(properties) + sum(i["market_value"] for i in investments) + other_assets
-                net_estate = gross_estate - debts - medical_bills - cash_bequests
-                cgt = calculate_cgt(investments, marginal_tax_rate)
-                estate_duty = calculate_estate_duty(net_estate, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value)
-                executor_fees = calculate_executor_fees(gross_estate, executor_fee_rate)
-                total_costs = cgt + estate_duty + executor_fees
-                liquid_assets = cash + life_insurance_to_estate
-                liquidity_shortfall = max(0, total_costs - liquid_assets)
-                st.success("--- Estate Liquidity Summary ---")
-                st.write(f"**Client**: {name}")
-                st.write(f"**Gross Estate Value**: R {gross_estate:,.2f}")
-                st.write(f"**Net Estate Value (after debts, medical bills, and cash bequests)**: R {net_estate:,.2f}")
-                st.write(f"**Capital Gains Tax**: R {cgt:,.2f}")
-                st.write(f"**Estate Duty**: R {estate_duty:,.2f}")
-                st.write(f"**Executor Fees**: R {executor_fees:,.2f}")
-                st.write(f"**Total Costs**: R {total_costs:,.2f}")
-                st.write(f"**Liquid Assets Available**: R {liquid_assets:,.2f}")
-                if liquidity_shortfall > 0:
-                    st.warning(f"**Liquidity Shortfall**: R {liquidity_shortfall:,.2f}")
-                    st.write("**Recommendation**: Consider increasing life insurance payable to the estate or liquidating non-liquid assets to cover the shortfall.")
-                else:
-                    st.write("**Liquidity Status**: Sufficient liquid assets to cover costs.")
-                summary_data = {
-                    "Client": [name],
-                    "Gross Estate Value (R)": [gross_estate],
-                    "Net Estate Value (R)": [net_estate],
-                    "Capital Gains Tax (R)": [cgt],
-                    "Estate Duty (R)": [estate_duty],
-                    "Executor Fees (R)": [executor_fees],
-                    "Total Costs (R)": [total_costs],
-                    "Liquid Assets Available (R)": [liquid_assets],
-                    "Liquidity Shortfall (R)": [liquidity_shortfall if liquidity_shortfall > 0 else 0]
-                }
-                summary_df = pd.DataFrame(summary_data)
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    summary_df.to_excel(writer, index=False, sheet_name="Estate Liquidity Summary")
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your Estate Liquidity Summary.",
-                            "There are no charts in this tool, but you can create your own in Excel.",
-                            "For example, select your data and use Insert > Chart to visualize your results."
-                        ]
-                    })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="estate_liquidity_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                with memory_profile.track(__name__, "calculation"):
+                    gross_estate = cash + life_insurance_to_estate + sum(properties) + sum(i["market_value"] for i in investments) + other_assets
+                    net_estate = gross_estate - debts - medical_bills - cash_bequests
+                    cgt = calculate_cgt(investments, marginal_tax_rate)
+                    estate_duty = calculate_estate_duty(net_estate, has_surviving_spouse, spouse_bequest_value, pbo_bequest_value)
+                    executor_fees = calculate_executor_fees(gross_estate, executor_fee_rate)
+                    total_costs = cgt + estate_duty + executor_fees
+                    liquid_assets = cash + life_insurance_to_estate
+                    liquidity_shortfall = max(0, total_costs - liquid_assets)
+                    summary_data = {
+                        "Client": [name],
+                        "Gross Estate Value (R)": [gross_estate],
+                        "Net Estate Value (R)": [net_estate],
+                        "Capital Gains Tax (R)": [cgt],
+                        "Estate Duty (R)": [estate_duty],
+                        "Executor Fees (R)": [executor_fees],
+                        "Total Costs (R)": [total_costs],
+                        "Liquid Assets Available (R)": [liquid_assets],
+                        "Liquidity Shortfall (R)": [liquidity_shortfall if liquidity_shortfall > 0 else 0]
+                    }
+                    st.session_state[RESULTS_KEY] = {
+                        "name": name,
+                        "gross_estate": gross_estate,
+                        "net_estate": net_estate,
+                        "cgt": cgt,
+                        "estate_duty": estate_duty,
+                        "executor_fees": executor_fees,
+                        "total_costs": total_costs,
+                        "liquid_assets": liquid_assets,
+                        "liquidity_shortfall": liquidity_shortfall,
+                        "has_surviving_spouse": has_surviving_spouse,
+                        "capital_gains": sum(max(0, i["market_value"] - i["base_cost"]) for i in investments),
+                        "liabilities": debts + medical_bills + cash_bequests,
+                        "spouse_bequest_value": spouse_bequest_value,
+                        "pbo_bequest_value": pbo_bequest_value,
+                        "marginal_tax_rate": marginal_tax_rate,
+                        "executor_fee_rate": executor_fee_rate,
+                        "workbook_args": (summary_data,)
+                    }
             except Exception as e:
                 st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+def show_couple_screening(growth, max_gap, marginal_tax_rate, executor_fee_rate):
+    """Screen an uploaded couple book for liquidity shortfalls at the second death."""
+    uploaded_file = st.file_uploader(
+        "Screen a Couple Book (optional CSV)",
+        type="csv",
+        key="estate_couples",
+        help=f"Columns: {', '.join(second_death.COUPLE_COLUMNS)}. The first estate belongs to the spouse assumed to die first."
+    )
+    if uploaded_file is None:
+        return
+    try:
+        couples, errors = validation.validate(pd.read_csv(uploaded_file), COUPLE_SCHEMA)
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        return
+    if len(errors):
+        st.warning(f"{errors['Row'].nunique():,} couple rows with errors were left out of the screening.")
+        st.dataframe(errors, hide_index=True)
+    if couples.empty:
+        return
+    result = second_death.simulate_second_death(couples, range(max_gap + 1), growth, marginal_tax_rate, executor_fee_rate)
+    screening = second_death.screen_couples(couples, result).sort_values("Worst Second Death Shortfall (R)", ascending=False)
+    at_risk = (screening["Worst Second Death Shortfall (R)"] > 0).sum()
+    st.write(f"**Couples With a Second-Death Shortfall**: {at_risk:,} of {len(screening):,}")
+    st.dataframe(screening, use_container_width=True, hide_index=True)
+
+def show_second_death(results):
+    """Model the survivor's death after inheriting, for a range of years between the two deaths."""
+    with st.expander("Second-Death Liquidity"):
+        st.write("Estate duty is deferred, not avoided, when assets pass to a surviving spouse. Enter the spouse's own estate to see the costs and liquidity when they die holding the combined estate.")
+        residue = results["net_estate"] - results["pbo_bequest_value"]
+        default_share = min(results["spouse_bequest_value"] / residue * 100, 100.0) if residue > 0 else 100.0
+        share = st.number_input("Share of the Residue Left to the Spouse (%)", min_value=0.0, max_value=100.0, value=float(default_share), step=5.0, key="estate_spouse_share")
+        survivor_gross = st.number_input("Spouse's Own Gross Estate (R)", min_value=0.0, step=100000.0, key="estate_survivor_gross")
+        survivor_liquid = st.number_input("Spouse's Own Liquid Assets (R)", min_value=0.0, step=10000.0, key="estate_survivor_liquid")
+        survivor_gains = st.number_input("Unrealised Capital Gains in the Spouse's Assets (R)", min_value=0.0, step=10000.0, key="estate_survivor_gains")
+        survivor_liabilities = st.number_input("Spouse's Liabilities (R)", min_value=0.0, step=10000.0, key="estate_survivor_liabilities")
+        growth = st.number_input("Estate Growth (% per year)", min_value=0.0, max_value=20.0, value=6.0, step=0.5, key="estate_survivor_growth") / 100
+        max_gap = st.slider("Years Between Deaths", min_value=0, max_value=40, value=int(second_death.DEFAULT_GAPS[-1]), key="estate_max_gap")
+        if survivor_liquid > survivor_gross:
+            st.error("The spouse's liquid assets cannot exceed their gross estate.")
+            return
+        couple = pd.DataFrame([{
+            "Couple": results["name"],
+            "First Gross Estate (R)": results["gross_estate"],
+            "First Liquid Assets (R)": results["liquid_assets"],
+            "First Capital Gains (R)": results["capital_gains"],
+            "First Liabilities (R)": results["liabilities"],
+            "Spouse Share (%)": share,
+            "PBO Bequests (R)": results["pbo_bequest_value"],
+            "Survivor Gross Estate (R)": survivor_gross,
+            "Survivor Liquid Assets (R)": survivor_liquid,
+            "Survivor Capital Gains (R)": survivor_gains,
+            "Survivor Liabilities (R)": survivor_liabilities
+        }], columns=second_death.COUPLE_COLUMNS)
+        result = second_death.simulate_second_death(couple, range(max_gap + 1), growth, results["marginal_tax_rate"], results["executor_fee_rate"])
+        st.write(f"**Costs at First Death (with spousal roll-over)**: R {result['first_costs'][0]:,.2f}")
+        st.write(f"**Inherited by the Spouse**: R {result['spouse_bequest'][0]:,.2f}")
+        st.write(f"**Abatement Ported to the Spouse**: R {result['ported_abatement'][0]:,.2f}")
+        table = second_death.second_death_table(result)
+        shortfalls = table[table["Liquidity Shortfall (R)"] > 0]
+        if len(shortfalls):
+            st.warning(f"**Liquidity Shortfall at Second Death**: up to R {shortfalls['Liquidity Shortfall (R)'].max():,.2f}, from {shortfalls['Years Between Deaths'].min()} years after the first death.")
+        else:
+            st.write("**Liquidity Status at Second Death**: Sufficient liquid assets for every gap shown.")
+        st.line_chart(table.set_index("Years Between Deaths")[["Total Costs (R)", "Liquid Assets Available (R)"]])
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.markdown(
+            "<p style='font-size: 14px; color: #888888;'>Assets left to the spouse are free of estate duty and CGT at the first death; the spouse takes over their base cost and the unused abatement. Both estates grow at the chosen rate; liabilities are held at today's amounts.</p>",
+            unsafe_allow_html=True
+        )
+        show_couple_screening(growth, max_gap, results["marginal_tax_rate"], results["executor_fee_rate"])
+
+@st.fragment
+def show_results():
+    """Render the most recently calculated estate liquidity from session state without recalculating it."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    st.success("--- Estate Liquidity Summary ---")
+    st.write(f"**Client**: {results['name']}")
+    st.write(f"**Gross Estate Value**: R {results['gross_estate']:,.2f}")
+    st.write(f"**Net Estate Value (after debts, medical bills, and cash bequests)**: R {results['net_estate']:,.2f}")
+    st.write(f"**Capital Gains Tax**: R {results['cgt']:,.2f}")
+    st.write(f"**Estate Duty**: R {results['estate_duty']:,.2f}")
+    st.write(f"**Executor Fees**: R {results['executor_fees']:,.2f}")
+    st.write(f"**Total Costs**: R {results['total_costs']:,.2f}")
+    st.write(f"**Liquid Assets Available**: R {results['liquid_assets']:,.2f}")
+    if results["liquidity_shortfall"] > 0:
+        st.warning(f"**Liquidity Shortfall**: R {results['liquidity_shortfall']:,.2f}")
+        st.write("**Recommendation**: Consider increasing life insurance payable to the estate or liquidating non-liquid assets to cover the shortfall.")
+    else:
+        st.write("**Liquidity Status**: Sufficient liquid assets to cover costs.")
+    excel_exports.download_button("Download Summary as Excel", "estate_liquidity_summary.xlsx", build_estate_workbook, *results["workbook_args"])
+    if results["has_surviving_spouse"]:
+        show_second_death(results)
+
+def show():
+    show_inputs()
+    show_results()
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import io
+import everest_yield
+import excel_exports
+import memory_profile
+import validation
 
 # Constants for Everest Wealth Products
 ONYX_INCOME_PLUS_RATE = 0.142  # 14.2% annual return
@@ -13,6 +17,7 @@ ONYX_BROKER_COMMISSION = 0.04  # 4% commission for Onyx Income Plus
 STRATEGIC_BROKER_COMMISSION = 0.05  # 5% commission for Strategic Income
 MINIMUM_INVESTMENT = 100000  # R100,000 minimum
 INVESTMENT_INCREMENT = 5000  # Must be divisible by R5,000
+PAYOFF_TABLE_MAX_INVESTMENT = 10000000  # Largest amount in the precomputed payoff table
 
 def calculate_investment_results(investment_amount, product):
     """Calculate gross and net returns for the selected Everest Wealth product."""
@@ -50,7 +55,44 @@ def calculate_investment_results(investment_amount, product):
         "broker_fee": broker_fee
     }
 
-def show():
+@st.cache_data(show_spinner=False)
+def payoff_table():
+    """Return calculate_investment_results for both products at every valid amount up to PAYOFF_TABLE_MAX_INVESTMENT."""
+    amounts = range(MINIMUM_INVESTMENT, PAYOFF_TABLE_MAX_INVESTMENT + 1, INVESTMENT_INCREMENT)
+    rows = {(product, amount): calculate_investment_results(amount, product) for product in everest_yield.PRODUCTS for amount in amounts}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+def investment_results(investment_amount, product):
+    """Return calculate_investment_results, read from the payoff table when the amount is in it."""
+    table = payoff_table()
+    if (product, investment_amount) in table.index:
+        return table.loc[(product, investment_amount)].to_dict()
+    return calculate_investment_results(investment_amount, product)
+
+RESULTS_KEY = "everest_wealth_results"
+INPUT_SCHEMA = validation.schema({
+    "name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "investment_amount": validation.field("Investment Amount (R)", minimum=MINIMUM_INVESTMENT, multiple_of=INVESTMENT_INCREMENT)
+})
+
+def build_everest_workbook(summary_df):
+    """Write the Everest Wealth summary to Excel and return the workbook bytes."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, index=False, sheet_name="Everest Wealth Summary")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your Everest Wealth Investment Summary.",
+                "The bar chart compares Gross vs Net Monthly Income.",
+                "You can recreate the chart in Excel by selecting the Gross and Net Monthly Income rows and using Insert > Bar Chart."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the investment inputs and store the calculated results in session state on submit."""
     st.write("Calculate returns for Everest Wealth investment products.")
     st.markdown(
         "<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>Note: Returns are based on fixed rates for Onyx Income Plus (14.2% p.a.) and Strategic Income (12.8% p.a.) over a 5-year term. Dividend tax is deducted at 20%. Verify with Everest Wealth for your specific case.</p>",
@@ -78,113 +120,144 @@ def show():
         return
 
     if st.button("Calculate Investment Returns"):
-        if not name.strip():
-            st.error("Please enter a name.")
-        elif investment_amount < MINIMUM_INVESTMENT:
-            st.error(f"Investment amount must be at least R{MINIMUM_INVESTMENT:,}.")
+        errors = validation.validate_inputs({"name": name, "investment_amount": investment_amount}, INPUT_SCHEMA)
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                # Calculate results
-                results = calculate_investment_results(investment_amount, product)
-
-                # Display summary
-                st.success("--- Everest Wealth Investment Summary ---")
-                st.write(f"**Client**: {name}")
-                st.write(f"**Product**: {product}")
-                st.write(f"**Investment Amount**: R {investment_amount:,.2f}")
-
-                # Summary table with improved styling
-                summary_data = {
-                    "Metric": [
-                        "Gross Monthly Income (R)",
-                        "Gross Annual Return (R)",
-                        "Gross Total Return Over Term (R)",
-                        "Net Monthly Income (R)",
-                        "Net Annual Return (R)",
-                        "Net Total Return Over Term (R)",
-                        "Broker Fee Earned (R)"
-                    ],
-                    "Value": [
-                        results["gross_monthly_income"],
-                        results["gross_annual_return"],
-                        results["gross_total_return"],
-                        results["net_monthly_income"],
-                        results["net_annual_return"],
-                        results["net_total_return"],
-                        results["broker_fee"]
-                    ]
-                }
-                summary_df = pd.DataFrame(summary_data)
-                summary_df["Value"] = summary_df["Value"].apply(lambda x: f"R {x:,.2f}")
-
-                # Add custom CSS for the dataframe to improve visibility
-                st.markdown(
-                    """
-                    <style>
-                    .dataframe {
-                        background-color: #555555;
-                        color: white;
-                        border: 1px solid #777777;
-                    }
-                    .dataframe th {
-                        background-color: #666666;
-                        color: white;
-                        border: 1px solid #777777;
+                with memory_profile.track(__name__, "calculation"):
+                    # Calculate results
+                    results = investment_results(investment_amount, product)
+
+                    # Summary table with improved styling
+                    summary_data = {
+                        "Metric": [
+                            "Gross Monthly Income (R)",
+                            "Gross Annual Return (R)",
+                            "Gross Total Return Over Term (R)",
+                            "Net Monthly Income (R)",
+                            "Net Annual Return (R)",
+                            "Net Total Return Over Term (R)",
+                            "Broker Fee Earned (R)"
+                        ],
+                        "Value": [
+                            results["gross_monthly_income"],
+                            results["gross_annual_return"],
+                            results["gross_total_return"],
+                            results["net_monthly_income"],
+                            results["net_annual_return"],
+                            results["net_total_return"],
+                            results["broker_fee"]
+                        ]
                     }
-                    .dataframe td {
-                        background-color: #555555;
-                        color: white;
-                        border: 1px solid #777777;
+                    summary_df = pd.DataFrame(summary_data)
+                    summary_df["Value"] = summary_df["Value"].apply(lambda x: f"R {x:,.2f}")
+                    st.session_state[RESULTS_KEY] = {
+                        "name": name,
+                        "product": product,
+                        "investment_amount": investment_amount,
+                        "results": results,
+                        "summary_df": summary_df,
+                        "workbook_args": (summary_df,)
                     }
-                    </style>
-                    """,
-                    unsafe_allow_html=True
-                )
-                st.write("**Investment Returns**")
-                st.dataframe(summary_df, use_container_width=True)
-
-                # Bar chart for gross vs net monthly income
-                fig = go.Figure(data=[
-                    go.Bar(name="Gross Monthly Income", x=["Gross"], y=[results["gross_monthly_income"]], marker_color="#1f77b4"),
-                    go.Bar(name="Net Monthly Income", x=["Net"], y=[results["net_monthly_income"]], marker_color="#ff7f0e")
-                ])
-                fig.update_layout(
-                    title="Gross vs Net Monthly Income",
-                    xaxis_title="Income Type",
-                    yaxis_title="Amount (R)",
-                    barmode="group",
-                    showlegend=True
-                )
-                st.plotly_chart(fig)
-
-                # Additional note for Strategic Income
-                if product == "Strategic Income":
-                    bonus = investment_amount * STRATEGIC_INCOME_BONUS
-                    net_bonus = bonus * (1 - DIVIDEND_TAX_RATE)
-                    st.write(f"**Note**: Strategic Income includes a special dividend bonus of R {bonus:,.2f} (Net: R {net_bonus:,.2f} after 20% dividend tax) at the end of the term.")
-
-                # Downloadable summary
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    summary_df.to_excel(writer, index=False, sheet_name="Everest Wealth Summary")
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your Everest Wealth Investment Summary.",
-                            "The bar chart compares Gross vs Net Monthly Income.",
-                            "You can recreate the chart in Excel by selecting the Gross and Net Monthly Income rows and using Insert > Bar Chart."
-                        ]
-                    })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="everest_wealth_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-
             except Exception as e:
                 st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+def show_yield_comparison(investment_amount):
+    """Compare the effective annual yield of both products under different tax, commission and reinvestment assumptions."""
+    with st.expander("Effective Yield Comparison"):
+        st.write("Effective annual yield (IRR) of the monthly payouts, capital returned at the end of the term and any terminal bonus, so both products can be compared with each other and with other investments.")
+        dividend_tax_rate = st.number_input("Dividend Tax Rate (%)", min_value=0.0, max_value=100.0, value=DIVIDEND_TAX_RATE * 100, step=1.0, key="everest_yield_tax") / 100
+        reinvestment_rate = st.number_input("Reinvest Payouts At (% p.a., 0 to take them as income)", min_value=0.0, max_value=30.0, value=0.0, step=0.5, key="everest_yield_reinvest") / 100
+        benchmark_rate = st.number_input("Benchmark Interest Rate (% p.a.)", min_value=0.0, max_value=30.0, value=9.0, step=0.25, key="everest_yield_benchmark_rate") / 100
+        benchmark_tax_rate = st.number_input("Benchmark Interest Tax Rate (%)", min_value=0.0, max_value=45.0, value=31.0, step=1.0, key="everest_yield_benchmark_tax") / 100
+        catalog = everest_yield.yield_catalog(
+            [investment_amount],
+            dividend_tax_rates=(dividend_tax_rate,),
+            reinvestment_rates=(reinvestment_rate if reinvestment_rate > 0 else float("nan"),)
+        )
+        benchmark = everest_yield.benchmark_yield(benchmark_rate, benchmark_tax_rate) * 100
+        catalog["Versus Benchmark (% points)"] = catalog["Effective Annual Yield (%)"] - benchmark
+        st.dataframe(
+            catalog[["Product", "Investor Pays Commission", "Net Total Received (R)", "Effective Annual Yield (%)", "Versus Benchmark (% points)"]],
+            use_container_width=True,
+            hide_index=True
+        )
+        st.write(f"**Benchmark Effective Yield After Tax**: {benchmark:.2f}%")
+
+@st.fragment
+@memory_profile.tracked("figures")
+def show_results():
+    """Render the most recently calculated investment returns from session state without recalculating them."""
+    stored = st.session_state.get(RESULTS_KEY)
+    if stored is None:
+        return
+    results = stored["results"]
+    product = stored["product"]
+    investment_amount = stored["investment_amount"]
+
+    # Display summary
+    st.success("--- Everest Wealth Investment Summary ---")
+    st.write(f"**Client**: {stored['name']}")
+    st.write(f"**Product**: {product}")
+    st.write(f"**Investment Amount**: R {investment_amount:,.2f}")
+
+    # Add custom CSS for the dataframe to improve visibility
+    st.markdown(
+        """
+        <style>
+        .dataframe {
+            background-color: #555555;
+            color: white;
+            border: 1px solid #777777;
+        }
+        .dataframe th {
+            background-color: #666666;
+            color: white;
+            border: 1px solid #777777;
+        }
+        .dataframe td {
+            background-color: #555555;
+            color: white;
+            border: 1px solid #777777;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+    st.write("**Investment Returns**")
+    st.dataframe(stored["summary_df"], use_container_width=True)
+
+    # Bar chart for gross vs net monthly income
+    fig = go.Figure(data=[
+        go.Bar(name="Gross Monthly Income", x=["Gross"], y=[results["gross_monthly_income"]], marker_color="#1f77b4"),
+        go.Bar(name="Net Monthly Income", x=["Net"], y=[results["net_monthly_income"]], marker_color="#ff7f0e")
+    ])
+    fig.update_layout(
+        title="Gross vs Net Monthly Income",
+        xaxis_title="Income Type",
+        yaxis_title="Amount (R)",
+        barmode="group",
+        showlegend=True
+    )
+    st.plotly_chart(fig)
+
+    # Additional note for Strategic Income
+    if product == "Strategic Income":
+        bonus = investment_amount * STRATEGIC_INCOME_BONUS
+        net_bonus = bonus * (1 - DIVIDEND_TAX_RATE)
+        st.write(f"**Note**: Strategic Income includes a special dividend bonus of R {bonus:,.2f} (Net: R {net_bonus:,.2f} after 20% dividend tax) at the end of the term.")
+
+    # Downloadable summary
+    excel_exports.download_button("Download Summary as Excel", "everest_wealth_summary.xlsx", build_everest_workbook, *stored["workbook_args"])
+    show_yield_comparison(investment_amount)
+
+def show():
+    show_inputs()
+    show_results()
 
 if __name__ == "__main__":
     show()
@@ -0,0 +1,119 @@
+import itertools
+import numpy as np
+import pandas as pd
+import everest_wealth
+
+TERM_MONTHS = 60  # everest_wealth.TERM_YEARS of monthly payouts
+PRODUCTS = ["Onyx Income Plus", "Strategic Income"]
+NEWTON_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-10
+BISECTION_ITERATIONS = 100
+MIN_RATE = -0.99  # Lowest annual rate the solver will consider
+
+def product_terms(product):
+    """Return (annual rate, broker commission rate, terminal bonus rate) for an Everest Wealth product."""
+    if product == "Onyx Income Plus":
+        return everest_wealth.ONYX_INCOME_PLUS_RATE, everest_wealth.ONYX_BROKER_COMMISSION, 0.0
+    return everest_wealth.STRATEGIC_INCOME_RATE, everest_wealth.STRATEGIC_BROKER_COMMISSION, everest_wealth.STRATEGIC_INCOME_BONUS
+
+def payout_schedule(amounts, products, dividend_tax_rates, investor_pays_commission=False, reinvestment_rates=np.nan):
+    """Build monthly investor cash flows for many investments at once, as an (investments x months + 1) array.
+
+    Month 0 is the investment (plus the broker commission if the investor pays it). Months 1 to
+    TERM_MONTHS pay the product's income after dividend tax, and the last month also returns the
+    capital and, for Strategic Income, the after-tax terminal bonus. Where a reinvestment rate is
+    given (NaN means none), payouts are reinvested at that annual rate and paid out at the end.
+    Every argument is a scalar or an array of one value per investment.
+    """
+    names, codes = np.unique(np.atleast_1d(products), return_inverse=True)
+    terms = np.array([product_terms(name) for name in names])[codes]
+    amounts, annual_rates, commissions, bonuses, tax_rates, pays, reinvest = np.broadcast_arrays(
+        np.asarray(amounts, dtype=float), terms[:, 0], terms[:, 1], terms[:, 2],
+        np.asarray(dividend_tax_rates, dtype=float), np.asarray(investor_pays_commission, dtype=bool),
+        np.asarray(reinvestment_rates, dtype=float)
+    )
+    monthly_income = amounts * annual_rates / 12 * (1 - tax_rates)
+    cash_flows = np.zeros((len(amounts), TERM_MONTHS + 1))
+    cash_flows[:, 0] = -(amounts + np.where(pays, amounts * commissions, 0))
+    cash_flows[:, 1:] = monthly_income[:, None]
+    cash_flows[:, -1] += amounts + amounts * bonuses * (1 - tax_rates)
+
+    reinvested = ~np.isnan(reinvest)
+    if reinvested.any():
+        monthly_rate = (1 + reinvest[reinvested]) ** (1 / 12) - 1
+        # Payout in month t earns TERM_MONTHS - t months of growth
+        growth = (1 + monthly_rate[:, None]) ** np.arange(TERM_MONTHS - 1, -1, -1)
+        cash_flows[reinvested, -1] += (monthly_income[reinvested, None] * growth).sum(axis=1) - monthly_income[reinvested]
+        cash_flows[reinvested, 1:-1] = 0
+    return cash_flows
+
+def _npv(rates, cash_flows, times):
+    return (cash_flows * (1 + rates[:, None]) ** -times).sum(axis=1)
+
+def solve_irr(cash_flows, times):
+    """Return the annual internal rate of return of each row of cash flows, solved together.
+
+    times are the years from the first cash flow (one row, or one per cash flow row), so monthly
+    schedules give the effective annual yield and actual day counts / 365 give XIRR. Rows are solved
+    with a vectorized Newton iteration; any that fail to converge fall back to bisection, which is
+    safe for investments (one outflow followed by inflows) because their NPV falls as the rate rises.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    times = np.broadcast_to(np.asarray(times, dtype=float), cash_flows.shape)
+    rates = np.full(len(cash_flows), 0.1)
+    converged = np.zeros(len(cash_flows), dtype=bool)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(NEWTON_ITERATIONS):
+            discount = (1 + rates[:, None]) ** -times
+            npv = (cash_flows * discount).sum(axis=1)
+            slope = (-times * cash_flows * discount / (1 + rates[:, None])).sum(axis=1)
+            step = npv / slope
+            rates = np.where(converged, rates, np.maximum(rates - step, MIN_RATE))
+            converged |= np.abs(step) < NEWTON_TOLERANCE
+            if converged.all():
+                break
+        pending = ~converged | ~np.isfinite(rates)
+        if pending.any():
+            low = np.full(pending.sum(), MIN_RATE)
+            high = np.full(pending.sum(), 10.0)
+            flows, row_times = cash_flows[pending], times[pending]
+            for _ in range(BISECTION_ITERATIONS):
+                middle = (low + high) / 2
+                above = _npv(middle, flows, row_times) > 0
+                low = np.where(above, middle, low)
+                high = np.where(above, high, middle)
+            rates[pending] = (low + high) / 2
+    return rates
+
+def effective_yields(cash_flows):
+    """Return the effective annual yield of monthly cash flow schedules from payout_schedule."""
+    return solve_irr(cash_flows, np.arange(cash_flows.shape[1]) / 12)
+
+def xirr(cash_flows, dates):
+    """Return the XIRR of each row of cash flows paid on the given dates (actual/365 day count)."""
+    dates = pd.to_datetime(pd.Series(dates))
+    return solve_irr(cash_flows, ((dates - dates.iloc[0]).dt.days / 365).to_numpy())
+
+def schedule_dates(start_date):
+    """Return the payout dates of a monthly schedule that starts on start_date."""
+    return pd.date_range(start_date, periods=TERM_MONTHS + 1, freq=pd.DateOffset(months=1))
+
+def benchmark_yield(annual_rate, tax_rate):
+    """Return the effective annual yield of a benchmark paying monthly interest at annual_rate, taxed at tax_rate."""
+    return (1 + annual_rate / 12 * (1 - tax_rate)) ** 12 - 1
+
+def yield_catalog(amounts, products=PRODUCTS, dividend_tax_rates=None, investor_pays_commission=(False, True), reinvestment_rates=(np.nan,)):
+    """Return the effective yield of every combination of amount, product and assumption in one solve."""
+    dividend_tax_rates = (everest_wealth.DIVIDEND_TAX_RATE,) if dividend_tax_rates is None else dividend_tax_rates
+    combinations = list(itertools.product(amounts, products, dividend_tax_rates, investor_pays_commission, reinvestment_rates))
+    amount, product, tax_rate, pays, reinvest = (np.array(values) for values in zip(*combinations))
+    cash_flows = payout_schedule(amount, product, tax_rate, pays, reinvest)
+    return pd.DataFrame({
+        "Investment Amount (R)": amount,
+        "Product": product,
+        "Dividend Tax (%)": tax_rate * 100,
+        "Investor Pays Commission": np.where(pays, "Yes", "No"),
+        "Reinvestment Rate (%)": reinvest * 100,
+        "Net Total Received (R)": cash_flows[:, 1:].sum(axis=1),
+        "Effective Annual Yield (%)": effective_yields(cash_flows) * 100
+    })
@@ -0,0 +1,79 @@
+import io
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+import memory_profile
+
+EXPORT_WORKERS = 2  # Workbooks building at once across all sessions; more wait in the pool's queue
+MAX_FINISHED_EXPORTS = 32  # Finished workbooks kept for repeat downloads
+POLL_INTERVAL = "0.5s"
+EXPORTS_STATE_KEY = "excel_exports"  # Session state: download file name -> export key
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="excel-export")
+_lock = threading.Lock()
+_jobs = OrderedDict()  # Export key -> Future, least recently requested first
+
+def export_key(builder, args):
+    """Return a key identifying an export by its builder and the content of its inputs."""
+    return hashlib.sha256(pickle.dumps((builder.__module__, builder.__qualname__, args))).hexdigest()
+
+def _build(builder, args, session):
+    with memory_profile.track(builder.__module__, "excel export", session):
+        data = builder(*args)
+        return data.getvalue() if isinstance(data, io.BytesIO) else data
+
+def submit(builder, *args):
+    """Start building builder(*args) on the export pool and return (key, future).
+
+    A request for an export that is already building, built or failed shares that job instead of
+    starting another; a failed export is only built again after discard.
+    """
+    key = export_key(builder, args)
+    with _lock:
+        future = _jobs.get(key)
+        if future is None:
+            future = _executor.submit(_build, builder, args, memory_profile.session_id())
+            _jobs[key] = future
+        _jobs.move_to_end(key)
+        finished = [job for job, pending in _jobs.items() if pending.done()]
+        for job in finished[:max(len(finished) - MAX_FINISHED_EXPORTS, 0)]:
+            del _jobs[job]
+    return key, future
+
+def discard(key):
+    """Forget the export with this key, so the next request builds it again, e.g. to retry one that failed."""
+    with _lock:
+        _jobs.pop(key, None)
+
+def wait(key, timeout=None):
+    """Block until the export with this key is built and return its bytes."""
+    with _lock:
+        future = _jobs[key]
+    return future.result(timeout)
+
+@st.fragment(run_every=POLL_INTERVAL)
+def _wait_for_export(key):
+    """Poll until the export finishes, then rerun the app so the download button replaces this message."""
+    with _lock:
+        future = _jobs.get(key)
+    if future is None or future.done():
+        st.rerun()
+    st.markdown("<p style='font-size: 14px; color: #888888;'>Preparing Excel download...</p>", unsafe_allow_html=True)
+
+def download_button(label, file_name, builder, *args):
+    """Show a download button for the workbook builder(*args) returns, once it has been built off the script thread."""
+    key, future = submit(builder, *args)
+    st.session_state.setdefault(EXPORTS_STATE_KEY, {})[file_name] = key
+    if not future.done():
+        _wait_for_export(key)
+    elif future.exception() is not None:
+        st.error(f"Error: {future.exception()}")
+        if st.button("Retry Excel Export", key=f"retry_export_{file_name}"):
+            discard(key)
+            st.rerun()
+    else:
+        st.download_button(label=label, data=future.result(), file_name=file_name, mime=XLSX_MIME)
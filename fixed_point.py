@@ -0,0 +1,164 @@
+import json
+import time
+import argparse
+import numpy as np
+import tax_years
+
+# Money is held as int64 cents and rates as int64 basis points, so every statutory rate used by the
+# calculators (18%, 27.5%, 3.5%, 1%, ...) is exact. Sums of cents never drift; the only rounding is
+# the documented round-half-up wherever a rate is applied.
+CENTS_PER_RAND = 100
+RATE_SCALE = 10000  # Basis points per 1 (100%)
+NO_UPPER = np.iinfo(np.int64).max  # Upper bound of the top bracket
+
+def round_half_up(numerator, denominator):
+    """Divide int64 arrays, rounding to the nearest integer and halves away from zero, as ROUND_HALF_UP does."""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    magnitude = (np.abs(numerator) + denominator // 2) // denominator
+    return np.where(numerator < 0, -magnitude, magnitude)
+
+def to_cents(rand):
+    """Convert rand amounts to int64 cents, rounding to the nearest cent (halves away from zero)."""
+    rand = np.asarray(rand, dtype=float)
+    return (np.sign(rand) * np.floor(np.abs(rand) * CENTS_PER_RAND + 0.5)).astype(np.int64)
+
+def to_rand(cents):
+    """Convert int64 cents back to rand for display; each value is the float nearest its exact two-decimal amount."""
+    return np.asarray(cents, dtype=np.int64) / CENTS_PER_RAND
+
+def to_basis_points(rate):
+    """Convert a rate such as 0.275 to basis points, raising ValueError if it is not a whole basis point."""
+    points = np.rint(np.asarray(rate, dtype=float) * RATE_SCALE)
+    if not np.allclose(points, np.asarray(rate, dtype=float) * RATE_SCALE, rtol=0, atol=1e-6):
+        raise ValueError(f"Rate {rate} is not a whole number of basis points.")
+    return points.astype(np.int64)
+
+def apply_rate(cents, basis_points):
+    """Multiply cents by a rate in basis points, rounding the product to the nearest cent (halves up)."""
+    return round_half_up(np.asarray(cents, dtype=np.int64) * np.asarray(basis_points, dtype=np.int64), RATE_SCALE)
+
+def table_in_cents(table):
+    """Convert a tax table (as in tax_years.TAX_YEARS) to cents and basis points."""
+    brackets = table["brackets"]
+    return {
+        "lowers": to_cents([lower for lower, _, _, _ in brackets]),
+        "uppers": np.array([NO_UPPER if np.isinf(upper) else to_cents(upper) for _, upper, _, _ in brackets], dtype=np.int64),
+        "rates": to_basis_points([rate for _, _, rate, _ in brackets]),
+        "bases": to_cents([base for _, _, _, base in brackets]),
+        "rebates": to_cents([table["rebates"][name] for name in tax_years.REBATE_TYPES]),
+        "mtc_per_person": int(to_cents(table["mtc_per_person"] * 12)),
+        "mtc_additional_dependant": int(to_cents(table["mtc_additional_dependant"] * 12)),
+        "uif_annual_cap": int(to_cents(table["uif_monthly_cap"] * 12))
+    }
+
+def salary_tax(table, gross_salary, pension_contribution, age, num_dependants):
+    """calculate_salary_tax for arrays of clients, with every amount in int64 cents.
+
+    Rounding, each to the nearest cent with halves up:
+    - the retirement deduction limit (27.5% of gross) is rounded before it is compared;
+    - tax before rebates is the bracket's base tax plus its rate on the income above the bracket's
+      lower bound, rounded once; an income in the R1 gap after a bracket's upper bound is taxed in
+      that bracket;
+    - rebates, medical credits and the UIF cap are whole rand, so subtracting them is exact;
+    - UIF is 1% of salary up to the cap, rounded once.
+    Returns a dict of int64 cent arrays named like tax_years.evaluate_salary_tax's outputs, with
+    marginal_rate in basis points.
+    """
+    cents = table_in_cents(table)
+    gross = np.asarray(gross_salary, dtype=np.int64)
+    pension = np.asarray(pension_contribution, dtype=np.int64)
+    age = np.asarray(age)
+    num_dependants = np.asarray(num_dependants, dtype=np.int64)
+
+    max_deductible = np.minimum(apply_rate(gross, to_basis_points(tax_years.RA_DEDUCTION_RATE)), to_cents(tax_years.RA_DEDUCTION_CAP))
+    taxable_income = np.maximum(0, gross - np.minimum(pension, max_deductible))
+    # The last bracket whose lower bound the income exceeds; -1 for no taxable income
+    bracket = np.searchsorted(cents["lowers"], taxable_income, side="left") - 1
+    taxed = bracket >= 0
+    bracket = np.maximum(bracket, 0)
+    tax_before_rebates = np.where(
+        taxed, cents["bases"][bracket] + apply_rate(taxable_income - cents["lowers"][bracket], cents["rates"][bracket]), 0
+    )
+    marginal_rate = np.where(taxed, cents["rates"][bracket], 0)
+
+    primary, secondary, tertiary = cents["rebates"]
+    total_rebate = primary + np.where(age >= 65, secondary, 0) + np.where(age >= 75, tertiary, 0)
+    paye_before_mtc = np.maximum(0, tax_before_rebates - total_rebate)
+    mtc_annual = np.where(
+        num_dependants <= 0, 0,
+        np.where(
+            num_dependants <= 2, num_dependants * cents["mtc_per_person"],
+            2 * cents["mtc_per_person"] + (num_dependants - 2) * cents["mtc_additional_dependant"]
+        )
+    )
+    paye = np.maximum(0, paye_before_mtc - mtc_annual)
+    uif = apply_rate(np.minimum(gross, cents["uif_annual_cap"]), to_basis_points(tax_years.UIF_RATE))
+    return {
+        "taxable_income": taxable_income,
+        "tax_before_rebates": tax_before_rebates,
+        "paye_before_mtc": paye_before_mtc,
+        "mtc_annual": mtc_annual,
+        "paye": paye,
+        "uif": uif,
+        "net_income": gross - paye - uif,
+        "marginal_rate": marginal_rate
+    }
+
+def capital_gains_tax(gain, marginal_tax_rate, exclusion, inclusion_rate):
+    """calculate_cgt in cents: the taxable amount after the inclusion rate is rounded, then the tax on it is rounded."""
+    taxable_amount = apply_rate(np.maximum(0, np.asarray(gain, dtype=np.int64) - to_cents(exclusion)), to_basis_points(inclusion_rate))
+    return apply_rate(taxable_amount, to_basis_points(marginal_tax_rate))
+
+def estate_duty(dutiable_value, abatement, threshold, rate_1, rate_2):
+    """Estate duty in cents on dutiable values before abatement; the duty in each rate band is rounded separately."""
+    dutiable_value = np.maximum(0, np.asarray(dutiable_value, dtype=np.int64) - np.asarray(abatement, dtype=np.int64))
+    threshold = to_cents(threshold)
+    return (
+        apply_rate(np.minimum(dutiable_value, threshold), to_basis_points(rate_1))
+        + apply_rate(np.maximum(0, dutiable_value - threshold), to_basis_points(rate_2))
+    )
+
+def frame_to_rand(frame, columns):
+    """Return frame with the given int64 cent columns converted to rand for display and export."""
+    return frame.assign(**{column: to_rand(frame[column].to_numpy()) for column in columns})
+
+def benchmark(count, seed=0):
+    """Time payroll-style salary tax on the float and cent paths and compare their totals.
+
+    A cent total is the exact sum of its rows as displayed. A float total differs from the sum of its
+    own rows rounded to cents, which is the gap a line-by-line reconciliation would find.
+    """
+    rng = np.random.default_rng(seed)
+    gross = np.round(rng.lognormal(np.log(350000), 0.7, count), 2)
+    pension = np.round(gross * rng.uniform(0, 0.3, count), 2)
+    age = rng.integers(18, 80, count)
+    dependants = rng.integers(0, 6, count)
+    table = tax_years.TAX_YEARS[tax_years.BASE_TAX_YEAR]
+    stacked = tax_years.stack_tax_tables({tax_years.BASE_TAX_YEAR: table})
+
+    start = time.perf_counter()
+    float_tax = tax_years.evaluate_salary_tax(stacked, gross, pension, age, 0, dependants)
+    float_seconds = time.perf_counter() - start
+    gross_cents, pension_cents = to_cents(gross), to_cents(pension)
+    start = time.perf_counter()
+    cent_tax = salary_tax(table, gross_cents, pension_cents, age, dependants)
+    cent_seconds = time.perf_counter() - start
+    # The float path taxes incomes in the R1 gap between brackets at zero; leave those rows out so the drift is arithmetic only
+    gap = (float_tax["tax_before_rebates"][:, 0] == 0) & (float_tax["taxable_income"][:, 0] > 0)
+    report = {"employees": count, "float_seconds": float_seconds, "cents_seconds": cent_seconds, "bracket_gap_rows": int(gap.sum()), "totals": {}}
+    for name in ["paye", "uif", "net_income"]:
+        exact = int(cent_tax[name][~gap].sum())
+        float_values = float_tax[name][~gap, 0]
+        report["totals"][name] = {
+            "cents_total": f"{exact // CENTS_PER_RAND}.{exact % CENTS_PER_RAND:02d}",
+            "float_total": float(float_values.sum()),
+            "float_rounded_rows_total": float(np.round(float_values, 2).sum()),
+            "float_reconciliation_gap": float(float_values.sum() - np.round(float_values, 2).sum())
+        }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare float and integer-cent salary tax totals over a synthetic payroll.")
+    parser.add_argument("--employees", type=int, default=1000000, help="Number of synthetic employees (default: 1000000)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.employees), indent=2))
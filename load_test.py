@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import random
+import resource
+import argparse
+import tracemalloc
+from datetime import datetime, timezone
+import multiprocessing
+import numpy as np
+from streamlit.testing.v1 import AppTest
+import excel_exports
+import memory_profile
+import warmup
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SCRIPT_TIMEOUT = 60  # Seconds a single scripted interaction may take before the session fails
+PERCENTILES = [50, 90, 95, 99]
+XLSX_SIGNATURE = b"PK"  # xlsx workbooks are zip archives
+
+def fill_allocation(at, rng):
+    at.text_input(key="allocation_name").input(f"Client {rng.randint(1, 9999)}")
+    at.number_input[0].set_value(float(rng.randrange(100000, 5000000, 5000)))
+    at.number_input[1].set_value(float(rng.randrange(200000, 3000000, 1000)))
+    at.number_input[2].set_value(rng.randint(25, 70))
+    return "allocation_optimizer_results"
+
+def fill_budget(at, rng):
+    at.number_input[0].set_value(float(rng.randrange(15000, 120000, 500)))
+    num_expenses = rng.randint(3, 8)
+    at.number_input[1].set_value(num_expenses).run()
+    for i in range(num_expenses):
+        at.text_input(key=f"category_{i}").input(f"Category {i + 1}")
+        at.number_input(key=f"amount_{i}").set_value(float(rng.randrange(500, 8000, 100)))
+    return "budget_tool_results"
+
+def fill_estate(at, rng):
+    at.text_input(key="estate_name").input(f"Client {rng.randint(1, 9999)}")
+    at.number_input[0].set_value(float(rng.randrange(0, 2000000, 1000)))
+    at.number_input[1].set_value(float(rng.randrange(0, 3000000, 1000)))
+    num_properties = rng.randint(0, 3)
+    at.number_input[2].set_value(num_properties).run()
+    for i in range(num_properties):
+        at.number_input(key=f"prop_value_{i}").set_value(float(rng.randrange(500000, 5000000, 1000)))
+    num_investments = rng.randint(0, 3)
+    at.number_input[3 + num_properties].set_value(num_investments).run()
+    for i in range(num_investments):
+        market_value = rng.randrange(100000, 3000000, 1000)
+        at.number_input(key=f"inv_value_{i}").set_value(float(market_value))
+        at.number_input(key=f"inv_base_{i}").set_value(float(rng.randrange(0, market_value, 1000)))
+    return "estate_liquidity_results"
+
+def fill_everest(at, rng):
+    at.text_input(key="everest_wealth_name").input(f"Client {rng.randint(1, 9999)}")
+    at.selectbox[1].select(rng.choice(["Onyx Income Plus", "Strategic Income"]))
+    at.number_input[0].set_value(rng.randrange(100000, 5000000, 5000))
+    return "everest_wealth_results"
+
+def fill_ra(at, rng):
+    at.text_input[0].input(f"Client {rng.randint(1, 9999)}")
+    income = float(rng.randrange(200000, 3000000, 1000))
+    at.number_input[0].set_value(income)
+    at.number_input[1].set_value(float(rng.randrange(0, int(income * 0.4), 1000)))
+    return "ra_calculator_results"
+
+def fill_retirement(at, rng):
+    at.text_input(key="retirement_calc_name").input(f"Client {rng.randint(1, 9999)}")
+    at.number_input[0].set_value(float(rng.randrange(10000, 100000, 1000)))
+    at.number_input[2].set_value(rng.randint(25, 50))
+    at.selectbox[1].select(rng.choice([55, 60, 65]))
+    if rng.random() < 0.5:
+        at.checkbox(key="preserve_capital").check()
+    # The provision count sits inside the form, so sessions fill the single default provision
+    at.number_input(key="prov_value_0").set_value(float(rng.randrange(0, 3000000, 1000)))
+    at.number_input(key="prov_contrib_0").set_value(float(rng.randrange(0, 20000, 100)))
+    return "retirement_calculator_results"
+
+def fill_salary(at, rng):
+    at.text_input(key="tax_calc_name").input(f"Client {rng.randint(1, 9999)}")
+    gross = float(rng.randrange(100000, 3000000, 1000))
+    at.number_input[0].set_value(gross)
+    at.number_input[1].set_value(float(rng.randrange(0, int(gross * 0.2), 1000)))
+    at.number_input[3].set_value(rng.randint(0, 5))
+    at.number_input[4].set_value(rng.randint(18, 80))
+    return "salary_calculator_results"
+
+# Tool name -> function that fills the tool's inputs and returns its session-state results key
+SCENARIOS = {
+    "Allocation Optimizer": fill_allocation,
+    "Budget Tool": fill_budget,
+    "Estate Liquidity Tool": fill_estate,
+    "Everest Wealth": fill_everest,
+    "RA Tax Rebate Calculator": fill_ra,
+    "Retirement Calculator": fill_retirement,
+    "Salary Tax Calculator": fill_salary
+}
+
+def run_session(args):
+    """Script one user session against the app and return its timings, memory and CPU use."""
+    session_id, tool, seed = args
+    rng = random.Random(seed)
+    timings = {}
+    # With profiling on, tracing starts at the first tracked block, so snapshots leave out the app's imports
+    if memory_profile.enabled():
+        memory_profile.reset_peak()
+    else:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    result = {"session": session_id, "tool": tool, "pid": os.getpid(), "error": None}
+    started = datetime.now(timezone.utc).isoformat()
+
+    def timed(interaction, action):
+        start = time.perf_counter()
+        value = action()
+        timings[interaction] = time.perf_counter() - start
+        return value
+
+    try:
+        at = timed("load", lambda: AppTest.from_file(APP_PATH, default_timeout=SCRIPT_TIMEOUT).run())
+        if memory_profile.enabled():
+            # Let the worker's warm-up finish first, so its allocations are not counted in the session's blocks
+            warmup.start(warmup.TOOL_MODULES).join()
+        timed("select_tool", lambda: at.selectbox[0].select(tool).run())
+        results_key = timed("fill_inputs", lambda: SCENARIOS[tool](at, rng))
+        timed("submit", lambda: at.button[0].click().run())
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        if results_key not in at.session_state:
+            raise RuntimeError("; ".join(error.value for error in at.error) or "No results were stored")
+        # The tool starts its Excel export when the results render; downloading waits for it to finish
+        export_key = next(iter(at.session_state[excel_exports.EXPORTS_STATE_KEY].values()))
+        workbook = timed("download", lambda: excel_exports.wait(export_key, SCRIPT_TIMEOUT))
+        if not workbook.startswith(XLSX_SIGNATURE):
+            raise RuntimeError("Downloaded Excel export is not a valid workbook")
+        result["workbook_bytes"] = len(workbook)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["timings"] = timings
+    result["cpu_seconds"] = time.process_time() - cpu_start
+    result["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+    if memory_profile.enabled():
+        # Tracked blocks reset tracemalloc's peak, so take the profile's running peak as well
+        result["peak_traced_bytes"] = max(result["peak_traced_bytes"], memory_profile.peak_traced_bytes())
+        result["profile_blocks"] = [record for record in memory_profile.records() if record["timestamp"] >= started]
+        result["profile_sessions"] = [record for record in memory_profile.sessions() if record["timestamp"] >= started]
+    tracemalloc.stop()
+    result["worker_max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return result
+
+def summarise(values):
+    """Return count, mean, max and percentiles (in milliseconds) for a list of durations in seconds."""
+    if not values:
+        return {"count": 0}
+    milliseconds = np.array(values) * 1000
+    summary = {"count": len(values), "mean_ms": float(milliseconds.mean()), "max_ms": float(milliseconds.max())}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_ms"] = float(np.percentile(milliseconds, percentile))
+    return summary
+
+def summarise_profile(results, max_allocated_mb=None, max_retained_mb=None):
+    """Combine the sessions' memory profiles and list any stage or session over its budget.
+
+    Growth trends are per worker process, since each has its own heap; the worst one is reported.
+    """
+    blocks = [record for result in results for record in result.get("profile_blocks", [])]
+    snapshots = [record for result in results for record in result.get("profile_sessions", [])]
+    profile = memory_profile.summarise(blocks, snapshots)
+    by_worker = {}
+    for result in results:
+        by_worker.setdefault(result["pid"], []).extend(result.get("profile_blocks", []))
+    profile["traced_growth_bytes_per_block"] = max(
+        (memory_profile.summarise(sorted(worker, key=lambda record: record["timestamp"]), [])["traced_growth_bytes_per_block"] for worker in by_worker.values()),
+        default=0.0
+    )
+    violations = []
+    if max_allocated_mb is not None:
+        violations += [
+            f"{name} allocated {stats['max_allocated_bytes'] / 1e6:.1f} MB (budget {max_allocated_mb} MB)"
+            for name, stats in profile["stages"].items() if stats["max_allocated_bytes"] > max_allocated_mb * 1e6
+        ]
+    if max_retained_mb is not None and profile["retained_bytes_per_session_max"] > max_retained_mb * 1e6:
+        violations.append(f"A session retained {profile['retained_bytes_per_session_max'] / 1e6:.1f} MB (budget {max_retained_mb} MB)")
+    profile["budget_violations"] = violations
+    return profile
+
+def run_load_test(sessions, concurrency, tools=None, seed=0, max_allocated_mb=None, max_retained_mb=None):
+    """Run sessions scripted sessions across concurrency worker processes and return a JSON-ready report.
+
+    With memory profiling enabled (memory_profile.ENABLE_ENV_VAR, inherited by the workers) the
+    report's memory section includes the combined profile, checked against the optional budgets.
+    """
+    tools = tools or list(SCENARIOS)
+    rng = random.Random(seed)
+    plan = [(i, tools[i % len(tools)], rng.randrange(2 ** 32)) for i in range(sessions)]
+    wall_start = time.perf_counter()
+    # Spawned workers start from a clean interpreter; AppTest's mocked runtime is per process, not per thread
+    with multiprocessing.get_context("spawn").Pool(processes=concurrency) as pool:
+        results = pool.map(run_session, plan, chunksize=1)
+    wall_seconds = time.perf_counter() - wall_start
+
+    interactions = {}
+    per_tool = {}
+    for result in results:
+        for interaction, seconds in result["timings"].items():
+            interactions.setdefault(interaction, []).append(seconds)
+            per_tool.setdefault(result["tool"], {}).setdefault(interaction, []).append(seconds)
+    worker_rss = {}
+    for result in results:
+        worker_rss[result["pid"]] = max(worker_rss.get(result["pid"], 0), result["worker_max_rss_bytes"])
+    cpu_seconds = sum(result["cpu_seconds"] for result in results)
+    peak_traced = [result["peak_traced_bytes"] for result in results]
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {"sessions": sessions, "concurrency": concurrency, "tools": tools, "seed": seed},
+        "wall_seconds": wall_seconds,
+        "sessions_per_second": sessions / wall_seconds if wall_seconds > 0 else None,
+        "failed_sessions": sum(result["error"] is not None for result in results),
+        "errors": [{"session": r["session"], "tool": r["tool"], "error": r["error"]} for r in results if r["error"]],
+        "interactions": {name: summarise(values) for name, values in interactions.items()},
+        "per_tool": {tool: {name: summarise(values) for name, values in timings.items()} for tool, timings in per_tool.items()},
+        "memory": {
+            "peak_traced_bytes_per_session_mean": float(np.mean(peak_traced)),
+            "peak_traced_bytes_per_session_max": int(max(peak_traced)),
+            "worker_max_rss_bytes": worker_rss
+        },
+        "cpu": {
+            "total_cpu_seconds": cpu_seconds,
+            "cpu_seconds_per_session": cpu_seconds / sessions,
+            "worker_utilisation": cpu_seconds / (wall_seconds * concurrency) if wall_seconds > 0 else None
+        }
+    }
+    if memory_profile.enabled():
+        report["memory"]["profile"] = summarise_profile(results, max_allocated_mb, max_retained_mb)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Navigate Wealth tools with concurrent scripted sessions.")
+    parser.add_argument("--sessions", type=int, default=50, help="Total number of scripted sessions (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1, help="Sessions run at once, one worker process each (default: CPU count)")
+    parser.add_argument("--tool", action="append", choices=sorted(SCENARIOS), help="Limit sessions to this tool (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated inputs")
+    parser.add_argument("--output", help="Append the JSON report as one line to this file instead of printing it")
+    parser.add_argument("--memory-profile", action="store_true", help="Track allocations around each calculation, figure and export")
+    parser.add_argument("--max-allocated-mb", type=float, help="With --memory-profile, fail if any tracked block allocates more than this")
+    parser.add_argument("--max-retained-mb", type=float, help="With --memory-profile, fail if any session's state retains more than this")
+    args = parser.parse_args()
+    if args.memory_profile:
+        os.environ[memory_profile.ENABLE_ENV_VAR] = "1"
+    # Run through the importable module so spawned workers can unpickle run_session
+    import load_test
+    report = load_test.run_load_test(args.sessions, args.concurrency, args.tool, args.seed, args.max_allocated_mb, args.max_retained_mb)
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(report) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+    if report["memory"].get("profile", {}).get("budget_violations"):
+        raise SystemExit("Memory budget exceeded: " + "; ".join(report["memory"]["profile"]["budget_violations"]))
@@ -0,0 +1,261 @@
+import io
+import os
+import sys
+import hmac
+import json
+import time
+import functools
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.logger import get_logger
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ENABLE_ENV_VAR = "NAVIGATE_MEMORY_PROFILE"  # Set to 1 to record allocations around calculations, figures and exports
+TRACE_FRAMES = 1  # Stack frames kept per allocation; more attributes better but costs memory while tracing
+TOP_ALLOCATORS = 10  # Source lines reported per tracked block
+TOP_SESSION_KEYS = 5  # Largest session state entries reported per session
+ADMIN_TOKEN_ENV_VAR = "NAVIGATE_ADMIN_TOKEN"  # The admin view is shown only when the page URL has ?admin=<this token>
+ADMIN_QUERY_PARAM = "admin"
+MAX_RECORDS = 2000  # Tracked blocks kept for the admin view; older ones are only in the logs
+MAX_SESSIONS = 500  # Sessions whose latest snapshot is kept; the least recently recorded are dropped
+logger = get_logger(__name__)  # Streamlit's logger, so the JSON lines show in the server log
+_lock = threading.Lock()
+_records = deque(maxlen=MAX_RECORDS)
+_sessions = OrderedDict()  # Session id -> latest retained-size snapshot, least recently recorded first
+_peak = {"traced_bytes": 0}  # Highest traced memory seen before a block reset tracemalloc's peak
+
+def enabled():
+    """Whether memory profiling is switched on for this process."""
+    return os.environ.get(ENABLE_ENV_VAR, "").strip().lower() not in ("", "0", "false", "no")
+
+def session_id():
+    """The id of the Streamlit session running this thread, or None off the script thread."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+def _log(record):
+    logger.info(json.dumps(record, default=str))
+
+def retained_bytes(value, seen=None):
+    """Approximate bytes held by value and everything it references, counting shared objects once.
+
+    DataFrames and arrays report their buffers, workbooks their bytes and plotly figures the size
+    of their JSON, since getsizeof only sees the Python wrapper of each.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, io.BytesIO):
+        return value.getbuffer().nbytes
+    if hasattr(value, "to_plotly_json"):
+        return len(value.to_json())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(retained_bytes(key, seen) + retained_bytes(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(retained_bytes(item, seen) for item in value)
+    return size
+
+@contextmanager
+def track(tool, stage, session=None):
+    """Record what the block allocates, when profiling is enabled; otherwise do nothing.
+
+    Snapshots are taken before and after, so the record has the net growth, the peak above the
+    starting point and the source lines that allocated most. tracemalloc traces the whole process,
+    so blocks running at the same time on other threads are counted too.
+    """
+    if not enabled():
+        yield
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    session = session or session_id()
+    before = tracemalloc.take_snapshot()
+    start_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    with _lock:
+        _peak["traced_bytes"] = max(_peak["traced_bytes"], peak_bytes)
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        # Dropping the profiler's own lines after grouping is much cheaper than filtering every trace
+        growth = [
+            stat for stat in after.compare_to(before, "lineno")
+            if stat.traceback[0].filename not in (tracemalloc.__file__, __file__)
+        ]
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "session": session,
+            "tool": tool,
+            "stage": stage,
+            "seconds": seconds,
+            "allocated_bytes": end_bytes - start_bytes,
+            "peak_bytes": peak_bytes - start_bytes,
+            "traced_bytes": end_bytes,
+            "top_allocators": [
+                {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in growth[:TOP_ALLOCATORS] if stat.size_diff > 0
+            ]
+        }
+        with _lock:
+            _peak["traced_bytes"] = max(_peak["traced_bytes"], peak_bytes)
+            _records.append(record)
+        _log(record)
+
+def tracked(stage):
+    """Decorate a function so each call is tracked as stage of the function's module."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with track(function.__module__, stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record_session(state):
+    """Record how much the current session's state retains, when profiling is enabled."""
+    if not enabled():
+        return
+    sizes = {str(key): retained_bytes(value) for key, value in state.items()}
+    largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:TOP_SESSION_KEYS]
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "session": session_id(),
+        "stage": "session state",
+        "retained_bytes": sum(sizes.values()),
+        "keys": len(sizes),
+        "largest": dict(largest)
+    }
+    with _lock:
+        _sessions.pop(record["session"], None)
+        _sessions[record["session"]] = record
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    _log(record)
+
+def peak_traced_bytes():
+    """The highest traced memory since tracing started, including peaks before each tracked block."""
+    with _lock:
+        return max(_peak["traced_bytes"], tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0)
+
+def records():
+    """Return copies of the tracked blocks, oldest first."""
+    with _lock:
+        return [dict(record) for record in _records]
+
+def reset_peak():
+    """Start the running peak again, e.g. at the start of each benchmark session."""
+    with _lock:
+        _peak["traced_bytes"] = 0
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+def reset():
+    """Forget every record, e.g. between benchmark sessions."""
+    with _lock:
+        _records.clear()
+        _sessions.clear()
+        _peak["traced_bytes"] = 0
+
+def sessions():
+    """Return copies of the latest retained-size snapshot of each session."""
+    with _lock:
+        return [dict(record) for record in _sessions.values()]
+
+def summarise(blocks, session_snapshots):
+    """Summarise tracked blocks and session snapshots: allocation per tool and stage, top allocators, retained state and the growth trend.
+
+    The trend is the least-squares slope of traced memory over successive blocks, so a steady
+    positive slope across many sessions is memory that is never given back.
+    """
+    stages = {}
+    for record in blocks:
+        stats = stages.setdefault(f"{record['tool']} / {record['stage']}", {"count": 0, "allocated_bytes": [], "peak_bytes": []})
+        stats["count"] += 1
+        stats["allocated_bytes"].append(record["allocated_bytes"])
+        stats["peak_bytes"].append(record["peak_bytes"])
+    allocators = {}
+    for record in blocks:
+        for allocator in record["top_allocators"]:
+            allocators[allocator["location"]] = allocators.get(allocator["location"], 0) + allocator["size_diff"]
+    traced = np.array([record["traced_bytes"] for record in blocks], dtype=float)
+    retained = [session["retained_bytes"] for session in session_snapshots]
+    return {
+        "blocks": len(blocks),
+        "stages": {
+            name: {
+                "count": stats["count"],
+                "mean_allocated_bytes": float(np.mean(stats["allocated_bytes"])),
+                "max_allocated_bytes": int(max(stats["allocated_bytes"])),
+                "max_peak_bytes": int(max(stats["peak_bytes"]))
+            }
+            for name, stats in stages.items()
+        },
+        "top_allocators": dict(sorted(allocators.items(), key=lambda item: item[1], reverse=True)[:TOP_ALLOCATORS]),
+        "sessions": len(session_snapshots),
+        "retained_bytes_per_session_mean": float(np.mean(retained)) if retained else 0.0,
+        "retained_bytes_per_session_max": int(max(retained)) if retained else 0,
+        "traced_growth_bytes_per_block": float(np.polyfit(np.arange(len(traced)), traced, 1)[0]) if len(traced) > 1 else 0.0
+    }
+
+def summary():
+    """Summarise everything recorded in this process, with its peak traced memory."""
+    return {**summarise(records(), sessions()), "peak_traced_bytes": peak_traced_bytes()}
+
+def is_admin():
+    """Whether this page was opened with the admin token from ADMIN_TOKEN_ENV_VAR; never when no token is set."""
+    token = os.environ.get(ADMIN_TOKEN_ENV_VAR, "")
+    supplied = st.query_params.get(ADMIN_QUERY_PARAM, "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+def show_admin():
+    """Render the memory profile for this server process, when profiling is enabled and the page was opened as admin."""
+    if not (enabled() and is_admin()):
+        return
+    with st.expander("Memory Profile (Admin)"):
+        report = summary()
+        blocks = records()
+        st.write(f"**Tracked Blocks**: {report['blocks']:,} across {report['sessions']:,} sessions")
+        st.write(f"**Peak Traced Memory**: {report['peak_traced_bytes'] / 1e6:,.1f} MB")
+        st.write(f"**Growth Trend**: {report['traced_growth_bytes_per_block'] / 1e3:,.1f} KB per tracked block")
+        if blocks:
+            st.write("**Traced Memory Over Time (MB)**")
+            st.line_chart(pd.DataFrame({"Traced Memory (MB)": [record["traced_bytes"] / 1e6 for record in blocks]}))
+            st.write("**Allocation by Tool and Stage**")
+            st.dataframe(pd.DataFrame([
+                {"Tool / Stage": name, "Count": stats["count"], "Mean Allocated (KB)": stats["mean_allocated_bytes"] / 1e3,
+                 "Max Allocated (KB)": stats["max_allocated_bytes"] / 1e3, "Max Peak (KB)": stats["max_peak_bytes"] / 1e3}
+                for name, stats in report["stages"].items()
+            ]), hide_index=True)
+            st.write("**Top Allocators**")
+            st.dataframe(pd.DataFrame(
+                [{"Source Line": location, "Net Allocated (KB)": size / 1e3} for location, size in report["top_allocators"].items()]
+            ), hide_index=True)
+        snapshots = sessions()
+        if snapshots:
+            st.write("**Retained Session State**")
+            st.dataframe(pd.DataFrame([
+                {"Session": session["session"], "Retained (KB)": session["retained_bytes"] / 1e3, "Keys": session["keys"],
+                 "Largest Entries": ", ".join(f"{key} ({size / 1e3:,.0f} KB)" for key, size in session["largest"].items())}
+                for session in snapshots
+            ]), hide_index=True)
+        st.markdown(
+            f"<p style='font-size: 14px; color: #888888;'>Shown because {ENABLE_ENV_VAR} is set and this page was opened with the {ADMIN_TOKEN_ENV_VAR} token. Every record is also logged as a JSON line.</p>",
+            unsafe_allow_html=True
+        )
@@ -0,0 +1,274 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import io
+import tax_years
+import fixed_point
+import excel_exports
+import memory_profile
+import validation
+
+SDL_RATE = 0.01  # Skills Development Levy on leviable remuneration
+SDL_EXEMPTION_THRESHOLD = 500000  # Employers with annual payroll below this do not pay SDL
+REQUIRED_COLUMNS = ["Employee", "Department", "Cost Centre", "Gross Salary"]
+# Optional columns and the value used when a file leaves them out
+OPTIONAL_COLUMNS = {
+    "Employee Pension Contribution": 0.0,
+    "Employer Pension Contribution": 0.0,
+    "Fringe Benefits": 0.0,
+    "Age": 0,
+    "Medical Contributions": 0.0,
+    "Dependants": 0
+}
+GROUP_COLUMNS = ["Department", "Cost Centre"]
+EMPLOYEE_SCHEMA = validation.schema({
+    "Employee": validation.field("Employee", text=True),
+    "Department": validation.field("Department", text=True),
+    "Cost Centre": validation.field("Cost Centre", text=True),
+    "Gross Salary": validation.field("Gross Salary", minimum=0),
+    "Employee Pension Contribution": validation.field("Employee Pension Contribution", minimum=0),
+    "Employer Pension Contribution": validation.field("Employer Pension Contribution", minimum=0),
+    "Fringe Benefits": validation.field("Fringe Benefits", minimum=0),
+    "Age": validation.field("Age", minimum=0, maximum=120),
+    "Medical Contributions": validation.field("Medical Contributions", minimum=0),
+    "Dependants": validation.field("Dependants", minimum=0, multiple_of=1)
+})
+COST_COLUMNS = [
+    "Gross Salary", "Fringe Benefits", "Employer Pension Contribution", "Taxable Income", "PAYE",
+    "Employee UIF", "Employer UIF", "SDL", "Net Pay", "Cost to Company"
+]
+
+def prepare_employees(employees):
+    """Fill optional columns, reject invalid rows and store groupings as categoricals.
+
+    Returns (valid employees, errors) where errors lists each rejected row's problems.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in employees.columns]
+    if missing:
+        raise ValueError(f"Employee file is missing columns: {', '.join(missing)}")
+    employees = employees.copy()
+    for column, default in OPTIONAL_COLUMNS.items():
+        employees[column] = employees[column].fillna(default) if column in employees else default
+    employees, errors = validation.validate(employees, EMPLOYEE_SCHEMA)
+    for column in GROUP_COLUMNS:
+        employees[column] = employees[column].astype(str).astype("category")
+    return employees, errors
+
+def load_employees(file):
+    """Read an employee CSV with one row per employee and annual amounts in rand, returning (employees, errors)."""
+    return prepare_employees(pd.read_csv(file))
+
+def calculate_payroll(employees, tax_year=tax_years.BASE_TAX_YEAR, in_cents=False):
+    """Calculate every employee's PAYE, UIF, SDL, net pay and cost to company in one vectorized pass.
+
+    Employer pension contributions and fringe benefits are taxable for the employee, and the
+    employer's contributions count towards the employee's retirement deduction. PAYE uses the
+    bracket, rebate and medical credit logic of calculate_salary_tax for the chosen tax year. UIF is
+    charged on cash salary up to the UIF cap, by employee and employer alike, and SDL applies to all
+    remuneration once the company's payroll reaches the exemption threshold.
+
+    With in_cents the cost columns are int64 cents, rounded at each statutory step as documented in
+    fixed_point, so any sum of them is exact.
+    """
+    if in_cents:
+        return _calculate_payroll_in_cents(employees, tax_year)
+    stacked = tax_years.stack_tax_tables({tax_year: tax_years.TAX_YEARS[tax_year]})
+    salary = employees["Gross Salary"].to_numpy(dtype=float)
+    fringe_benefits = employees["Fringe Benefits"].to_numpy(dtype=float)
+    employee_pension = employees["Employee Pension Contribution"].to_numpy(dtype=float)
+    employer_pension = employees["Employer Pension Contribution"].to_numpy(dtype=float)
+    remuneration = salary + fringe_benefits + employer_pension
+    tax = tax_years.evaluate_salary_tax(
+        stacked, remuneration, employee_pension + employer_pension, employees["Age"].to_numpy(),
+        employees["Medical Contributions"].to_numpy(), employees["Dependants"].to_numpy()
+    )
+    uif = np.minimum(salary, stacked["uif_annual_cap"][0]) * tax_years.UIF_RATE
+    sdl = remuneration * SDL_RATE if remuneration.sum() >= SDL_EXEMPTION_THRESHOLD else np.zeros(len(remuneration))
+    paye = tax["paye"][:, 0]
+    costs = employees[["Employee"] + GROUP_COLUMNS].copy()
+    costs["Gross Salary"] = salary
+    costs["Fringe Benefits"] = fringe_benefits
+    costs["Employer Pension Contribution"] = employer_pension
+    costs["Taxable Income"] = tax["taxable_income"][:, 0]
+    costs["PAYE"] = paye
+    costs["Employee UIF"] = uif
+    costs["Employer UIF"] = uif
+    costs["SDL"] = sdl
+    costs["Net Pay"] = salary - employee_pension - paye - uif
+    costs["Cost to Company"] = remuneration + uif + sdl
+    return costs
+
+def _calculate_payroll_in_cents(employees, tax_year):
+    salary = fixed_point.to_cents(employees["Gross Salary"])
+    fringe_benefits = fixed_point.to_cents(employees["Fringe Benefits"])
+    employee_pension = fixed_point.to_cents(employees["Employee Pension Contribution"])
+    employer_pension = fixed_point.to_cents(employees["Employer Pension Contribution"])
+    remuneration = salary + fringe_benefits + employer_pension
+    table = tax_years.TAX_YEARS[tax_year]
+    tax = fixed_point.salary_tax(
+        table, remuneration, employee_pension + employer_pension, employees["Age"].to_numpy(), employees["Dependants"].to_numpy(dtype=np.int64)
+    )
+    uif = fixed_point.apply_rate(np.minimum(salary, fixed_point.to_cents(table["uif_monthly_cap"] * 12)), fixed_point.to_basis_points(tax_years.UIF_RATE))
+    if remuneration.sum() >= fixed_point.to_cents(SDL_EXEMPTION_THRESHOLD):
+        sdl = fixed_point.apply_rate(remuneration, fixed_point.to_basis_points(SDL_RATE))
+    else:
+        sdl = np.zeros(len(remuneration), dtype=np.int64)
+    costs = employees[["Employee"] + GROUP_COLUMNS].copy()
+    costs["Gross Salary"] = salary
+    costs["Fringe Benefits"] = fringe_benefits
+    costs["Employer Pension Contribution"] = employer_pension
+    costs["Taxable Income"] = tax["taxable_income"]
+    costs["PAYE"] = tax["paye"]
+    costs["Employee UIF"] = uif
+    costs["Employer UIF"] = uif
+    costs["SDL"] = sdl
+    costs["Net Pay"] = salary - employee_pension - tax["paye"] - uif
+    costs["Cost to Company"] = remuneration + uif + sdl
+    return costs
+
+def summarise_payroll(costs, by):
+    """Total the cost columns and count employees per group (a column name or list of names)."""
+    grouped = costs.groupby(by, observed=True)
+    summary = grouped[COST_COLUMNS].sum()
+    summary.insert(0, "Headcount", grouped.size())
+    return summary.reset_index()
+
+def apply_increase(employees, increase, departments=None):
+    """Return employees with gross salaries raised by increase, for everyone or only the given departments."""
+    raised = employees.copy()
+    factor = np.full(len(raised), 1 + increase)
+    if departments:
+        factor = np.where(raised["Department"].isin(departments), factor, 1.0)
+    raised["Gross Salary"] = raised["Gross Salary"].to_numpy(dtype=float) * factor
+    return raised
+
+RESULTS_KEY = "payroll_costs_results"
+
+@st.cache_data(show_spinner=False)
+def load_uploaded_employees(contents):
+    """Load an uploaded employee CSV, cached on the file contents."""
+    return load_employees(io.BytesIO(contents))
+
+def build_payroll_workbook(totals, by_department, by_cost_centre):
+    """Write the payroll totals and roll-ups to Excel and return the workbook bytes."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        totals.to_excel(writer, index=False, sheet_name="Payroll Summary")
+        by_department.to_excel(writer, index=False, sheet_name="By Department")
+        by_cost_centre.to_excel(writer, index=False, sheet_name="By Cost Centre")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your annual payroll cost summary.",
+                "The 'By Department' and 'By Cost Centre' sheets total each cost per group.",
+                "Cost to Company is gross salary plus fringe benefits, employer pension contributions, employer UIF and SDL.",
+                "Download the employee-level costs as CSV from the tool."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the payroll upload and what-if inputs and store the calculated costs in session state on submit."""
+    st.write("Upload your employee list to calculate annual PAYE, UIF, SDL and cost to company by department and cost centre.")
+    uploaded_file = st.file_uploader(
+        "Employee List (CSV)",
+        type="csv",
+        key="payroll_employees",
+        help=f"Required columns: {', '.join(REQUIRED_COLUMNS)}. Optional: {', '.join(OPTIONAL_COLUMNS)}. Amounts are annual."
+    )
+    tax_year = st.selectbox("Tax Year", list(tax_years.TAX_YEARS), index=list(tax_years.TAX_YEARS).index(tax_years.BASE_TAX_YEAR), key="payroll_tax_year")
+    increase = st.number_input("What-If Salary Increase (%)", min_value=-50.0, max_value=100.0, value=0.0, step=0.5, key="payroll_increase") / 100
+    in_cents = st.checkbox(
+        "Calculate in Exact Cents",
+        value=False,
+        key="payroll_in_cents",
+        help="Holds every amount as whole cents and rounds each statutory step to the cent, so totals reconcile exactly with payroll system reports."
+    )
+    employees = None
+    departments = []
+    if uploaded_file is not None:
+        try:
+            employees, errors = load_uploaded_employees(uploaded_file.getvalue())
+        except ValueError as e:
+            st.error(f"Error: {e}")
+        else:
+            if len(errors):
+                st.warning(f"{errors['Row'].nunique():,} employee rows with errors were left out. Row numbers count data rows from 1.")
+                st.dataframe(errors, hide_index=True)
+            departments = st.multiselect("Apply Increase Only To (leave empty for everyone)", list(employees["Department"].cat.categories), key="payroll_departments")
+
+    if st.button("Calculate Payroll Costs"):
+        if employees is None:
+            st.error("Please upload an employee list.")
+        elif employees.empty:
+            st.error("The employee list has no valid rows to calculate.")
+        else:
+            try:
+                with memory_profile.track(__name__, "calculation"):
+                    baseline = calculate_payroll(employees, tax_year, in_cents)
+                    scenario = calculate_payroll(apply_increase(employees, increase, departments), tax_year, in_cents) if increase else baseline
+                    current = baseline[COST_COLUMNS].sum().to_numpy()
+                    what_if = scenario[COST_COLUMNS].sum().to_numpy()
+                    by_department = summarise_payroll(scenario, "Department")
+                    by_cost_centre = summarise_payroll(scenario, GROUP_COLUMNS)
+                    if in_cents:
+                        # Totalled in cents above, so the rand figures shown are the exact sums of the employee rows
+                        current, what_if, change = fixed_point.to_rand(current), fixed_point.to_rand(what_if), fixed_point.to_rand(what_if - current)
+                        by_department = fixed_point.frame_to_rand(by_department, COST_COLUMNS)
+                        by_cost_centre = fixed_point.frame_to_rand(by_cost_centre, COST_COLUMNS)
+                        scenario = fixed_point.frame_to_rand(scenario, COST_COLUMNS)
+                    else:
+                        change = what_if - current
+                    totals = pd.DataFrame({"Metric": COST_COLUMNS, "Current (R)": current, "What-If (R)": what_if, "Change (R)": change})
+                    st.session_state[RESULTS_KEY] = {
+                        "tax_year": tax_year,
+                        "increase": increase,
+                        "headcount": len(scenario),
+                        "totals": totals,
+                        "by_department": by_department,
+                        "by_cost_centre": by_cost_centre,
+                        "employee_csv": scenario.to_csv(index=False).encode("utf-8"),
+                        "workbook_args": (totals, by_department, by_cost_centre)
+                    }
+            except Exception as e:
+                st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+@st.fragment
+def show_results():
+    """Render the most recently calculated payroll costs from session state without recalculating them."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    totals = results["totals"].set_index("Metric")
+    st.success("--- Payroll Cost Summary ---")
+    st.write(f"**Tax Year**: {results['tax_year']}")
+    st.write(f"**Employees**: {results['headcount']:,}")
+    if results["increase"]:
+        st.write(f"**What-If Salary Increase**: {results['increase'] * 100:.1f}%")
+    st.write(f"**Total Cost to Company (Annual)**: R {totals.loc['Cost to Company', 'What-If (R)']:,.2f}")
+    if results["increase"]:
+        st.write(f"**Change in Cost to Company**: R {totals.loc['Cost to Company', 'Change (R)']:,.2f}")
+    st.dataframe(results["totals"], use_container_width=True, hide_index=True)
+    st.write("**Cost to Company by Department**")
+    st.bar_chart(results["by_department"].set_index("Department")["Cost to Company"])
+    st.dataframe(results["by_department"], use_container_width=True, hide_index=True)
+    st.write("**Cost to Company by Cost Centre**")
+    st.dataframe(results["by_cost_centre"], use_container_width=True, hide_index=True)
+    st.markdown(
+        "<p style='font-size: 14px; color: #888888;'>Note: PAYE uses the annual SARS tables for the selected tax year. Employer pension contributions and fringe benefits are taxed as remuneration; UIF is 1% each for employee and employer on salary up to the UIF cap, and SDL is 1% of remuneration once annual payroll reaches R500,000.</p>",
+        unsafe_allow_html=True
+    )
+    excel_exports.download_button("Download Summary as Excel", "payroll_cost_summary.xlsx", build_payroll_workbook, *results["workbook_args"])
+    st.download_button(
+        label="Download Employee Costs as CSV",
+        data=results["employee_csv"],
+        file_name="payroll_employee_costs.csv",
+        mime="text/csv"
+    )
+
+def show():
+    show_inputs()
+    show_results()
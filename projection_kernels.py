@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+# numba is optional: without it the same kernels run as plain Python loops
+try:
+    import numba
+    prange = numba.prange  # Behaves like range when a kernel runs uncompiled
+    # Kernels run on Streamlit's script threads: TBB stops the process exiting once a parallel kernel has run off
+    # the main thread, and workqueue aborts on concurrent launches, so prefer OpenMP unless numba is configured
+    if "NUMBA_THREADING_LAYER" not in os.environ and "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+except ImportError:
+    numba = None
+    prange = range
+
+BACKENDS = ["numba", "python"]
+BACKEND_ENV_VAR = "NAVIGATE_KERNEL_BACKEND"
+MAX_DRAWDOWN_RATE = 0.175  # Legislative maximum, as in calculate_years_until_depletion
+CAPITAL_FLOOR = 125000  # Capital at or below this is withdrawn in full in one year
+NOT_DEPLETED = -1  # Depletion years reported for paths that outlast their returns
+
+def _future_values(current_values, annual_rates, years, monthly_contributions, contribution_increases, out):
+    """calculate_future_value for each path, writing results into out."""
+    for i in prange(len(current_values)):
+        future_value = current_values[i]
+        annual_rate = annual_rates[i]
+        monthly_rate = (1 + annual_rate) ** (1/12) - 1
+        annual_contributions = monthly_contributions[i] * 12
+        for year in range(years[i]):
+            future_value = future_value * (1 + annual_rate)
+            for month in range(12):
+                future_value += (annual_contributions / 12) * (1 + monthly_rate) ** (11 - month)
+            annual_contributions *= (1 + contribution_increases[i])
+        out[i] = future_value
+
+def _depletion_years(capitals, annual_incomes, returns, out):
+    """calculate_years_until_depletion's year count for each path, with one return per path per year."""
+    for i in prange(len(capitals)):
+        current_capital = capitals[i]
+        years = 0
+        depleted = current_capital <= 0
+        while not depleted and years < returns.shape[1]:
+            if current_capital <= CAPITAL_FLOOR:
+                years += 1
+                depleted = True
+                break
+            withdrawal = min(annual_incomes[i], current_capital * MAX_DRAWDOWN_RATE)
+            current_capital -= withdrawal
+            current_capital = current_capital * (1 + returns[i, years])
+            years += 1
+        out[i] = years if depleted else NOT_DEPLETED
+
+if numba is not None:
+    # Compiled on first use and cached beside this file, so later server starts load machine code from disk
+    KERNELS = {
+        "numba": {
+            "future_values": numba.njit(cache=True, parallel=True)(_future_values),
+            "depletion_years": numba.njit(cache=True, parallel=True)(_depletion_years)
+        }
+    }
+else:
+    KERNELS = {}
+KERNELS["python"] = {"future_values": _future_values, "depletion_years": _depletion_years}
+
+_backend = os.environ.get(BACKEND_ENV_VAR, "numba" if numba is not None else "python")
+
+def available_backends():
+    """Return the backends that can run here."""
+    return [backend for backend in BACKENDS if backend in KERNELS]
+
+def set_backend(backend):
+    """Select the kernel backend used when a call does not name one."""
+    global _backend
+    if backend not in KERNELS:
+        raise ValueError(f"Backend '{backend}' is not available. Choose from: {', '.join(available_backends())}.")
+    _backend = backend
+
+def get_backend():
+    """Return the active kernel backend, falling back to Python when numba is not installed."""
+    return _backend if _backend in KERNELS else "python"
+
+def _kernel(name, backend):
+    backend = backend or get_backend()
+    if backend not in KERNELS:
+        raise ValueError(f"Backend '{backend}' is not available. Choose from: {', '.join(available_backends())}.")
+    return KERNELS[backend][name]
+
+def future_values(current_values, annual_rates, years, monthly_contributions=0.0, contribution_increases=0.0, backend=None):
+    """Project many provisions at once, matching calculate_future_value for each."""
+    current_values, annual_rates, years, monthly_contributions, contribution_increases = np.broadcast_arrays(
+        np.asarray(current_values, dtype=np.float64), np.asarray(annual_rates, dtype=np.float64), np.asarray(years, dtype=np.int64),
+        np.asarray(monthly_contributions, dtype=np.float64), np.asarray(contribution_increases, dtype=np.float64)
+    )
+    out = np.empty(current_values.shape, dtype=np.float64)
+    # Copy the broadcast views, which share memory between elements and cannot be handed to numba as writeable arrays
+    _kernel("future_values", backend)(
+        np.array(current_values).ravel(), np.array(annual_rates).ravel(), np.array(years).ravel(),
+        np.array(monthly_contributions).ravel(), np.array(contribution_increases).ravel(), out.reshape(-1)
+    )
+    return out
+
+def depletion_years(capitals, annual_incomes, returns, backend=None):
+    """Return how many years each path's capital lasts under the drawdown rules, or NOT_DEPLETED.
+
+    returns is a (paths x years) array of annual returns; a constant row reproduces
+    calculate_years_until_depletion for capital that runs out within that many years.
+    """
+    returns = np.ascontiguousarray(np.atleast_2d(returns), dtype=np.float64)
+    capitals, annual_incomes = np.broadcast_arrays(
+        np.asarray(capitals, dtype=np.float64).reshape(-1), np.asarray(annual_incomes, dtype=np.float64).reshape(-1)
+    )
+    if len(capitals) == 1 and len(returns) > 1:
+        capitals, annual_incomes = np.repeat(capitals, len(returns)), np.repeat(annual_incomes, len(returns))
+    out = np.empty(len(capitals), dtype=np.int64)
+    _kernel("depletion_years", backend)(np.array(capitals), np.array(annual_incomes), returns, out)
+    return out
+
+def benchmark(paths, years, seed=0):
+    """Time both kernels on every available backend and return the timings in seconds.
+
+    Each kernel is run once before timing so numba's compile (or cache load) is reported separately.
+    """
+    rng = np.random.default_rng(seed)
+    current_values = rng.uniform(0, 5000000, paths)
+    annual_rates = rng.uniform(0.04, 0.12, paths)
+    monthly_contributions = rng.uniform(0, 20000, paths)
+    returns = rng.normal(0.08, 0.12, (paths, years))
+    report = {"paths": paths, "years": years, "backends": {}}
+    for backend in available_backends():
+        timings = {}
+        for name, run in [
+            ("future_values", lambda: future_values(current_values, annual_rates, years, monthly_contributions, 0.05, backend=backend)),
+            ("depletion_years", lambda: depletion_years(current_values, current_values * 0.06, returns, backend=backend))
+        ]:
+            start = time.perf_counter()
+            run()
+            timings[f"{name}_first_call"] = time.perf_counter() - start
+            start = time.perf_counter()
+            run()
+            timings[name] = time.perf_counter() - start
+        report["backends"][backend] = timings
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the projection kernels on each available backend.")
+    parser.add_argument("--paths", type=int, default=100000, help="Number of simulated paths (default: 100000)")
+    parser.add_argument("--years", type=int, default=40, help="Years per path (default: 40)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.paths, args.years), indent=2))
@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
 import io
+import excel_exports
+import memory_profile
+import tax_curves
+import validation
 
 # Tax Rates and Rebates (2024/2025)
 TAX_BRACKETS = [
@@ -34,7 +38,32 @@ def calculate_ra_rebate(income, contribution):
     rebate = deductible * tax_rate
     return deductible, tax_rate, rebate, excess
 
-def show():
+RESULTS_KEY = "ra_calculator_results"
+INPUT_SCHEMA = validation.schema({
+    "name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "income": validation.field("Annual Pensionable Income (R)", minimum=0),
+    "contribution": validation.field("Annual RA Contribution (R)", minimum=0)
+})
+
+def build_ra_workbook(summary_data):
+    """Write the RA tax rebate summary to Excel and return the workbook bytes."""
+    df = pd.DataFrame(summary_data)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="RA Tax Rebate Summary")
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your RA Tax Rebate Summary.",
+                "There are no charts in this tool, but you can create your own in Excel.",
+                "For example, select your data and use Insert > Chart to visualize your results."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the rebate inputs and store the calculated results in session state on submit."""
     st.write("Enter client details to calculate their tax rebate for retirement annuity contributions.")
     st.markdown(
         "<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>RA Contribution Limits: You can deduct RA contributions up to 27.5% of your taxable income, capped at R350,000 per year. Excess contributions roll over to future years. Verify limits for the 2025/2026 tax year.</p>",
@@ -44,55 +73,67 @@ def show():
     name = st.text_input("Client's Name")
     income = st.number_input("Annual Pensionable Income (R)", min_value=0.0, step=1000.0)
     contribution = st.number_input("Annual RA Contribution (R)", min_value=0.0, step=1000.0)
+    live = tax_curves.ra_rebate(income, contribution)
+    st.markdown(
+        f"<p style='font-size: 14px; color: #888888;'>Live estimate: tax rebate R {float(live['rebate']):,.2f} "
+        f"at a marginal rate of {float(live['tax_rate']) * 100:.1f}%.</p>",
+        unsafe_allow_html=True
+    )
 
     if st.button("Calculate Rebate"):
-        if not name.strip():
-            st.error("Please enter a name.")
-        elif income < 0 or contribution < 0:
-            st.error("Income and contribution must be non-negative.")
+        errors = validation.validate_inputs({"name": name, "income": income, "contribution": contribution}, INPUT_SCHEMA)
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                deductible, tax_rate, rebate, excess = calculate_ra_rebate(income, contribution)
-                st.success("--- Tax Rebate Summary ---")
-                st.write(f"**Client**: {name}")
-                st.write(f"**Annual Pensionable Income**: R {income:,.2f}")
-                st.write(f"**RA Contribution**: R {contribution:,.2f}")
-                st.write(f"**Deductible Contribution**: R {deductible:,.2f}")
-                if excess > 0:
-                    st.write(f"**Excess Contribution (Carried Over)**: R {excess:,.2f}")
-                st.write(f"**Marginal Tax Rate**: {tax_rate * 100:.1f}%")
-                st.write(f"**Tax Rebate**: R {rebate:,.2f}")
-                st.markdown(
-                    "<p style='font-size: 14px; color: #888888;'>Note: Tax rates are based on 2024/2025 SARS tables. Verify with 2025/2026 rates when available.</p>",
-                    unsafe_allow_html=True
-                )
-                summary_data = {
-                    "Client": [name],
-                    "Annual Pensionable Income (R)": [income],
-                    "RA Contribution (R)": [contribution],
-                    "Deductible Contribution (R)": [deductible],
-                    "Excess Contribution (Carried Over) (R)": [excess if excess > 0 else 0],
-                    "Marginal Tax Rate (%)": [tax_rate * 100],
-                    "Tax Rebate (R)": [rebate]
-                }
-                df = pd.DataFrame(summary_data)
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    df.to_excel(writer, index=False, sheet_name="RA Tax Rebate Summary")
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your RA Tax Rebate Summary.",
-                            "There are no charts in this tool, but you can create your own in Excel.",
-                            "For example, select your data and use Insert > Chart to visualize your results."
-                        ]
-                    })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="ra_tax_rebate_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                with memory_profile.track(__name__, "calculation"):
+                    deductible, tax_rate, rebate, excess = calculate_ra_rebate(income, contribution)
+                    summary_data = {
+                        "Client": [name],
+                        "Annual Pensionable Income (R)": [income],
+                        "RA Contribution (R)": [contribution],
+                        "Deductible Contribution (R)": [deductible],
+                        "Excess Contribution (Carried Over) (R)": [excess if excess > 0 else 0],
+                        "Marginal Tax Rate (%)": [tax_rate * 100],
+                        "Tax Rebate (R)": [rebate]
+                    }
+                    st.session_state[RESULTS_KEY] = {
+                        "name": name,
+                        "income": income,
+                        "contribution": contribution,
+                        "deductible": deductible,
+                        "tax_rate": tax_rate,
+                        "rebate": rebate,
+                        "excess": excess,
+                        "workbook_args": (summary_data,)
+                    }
             except Exception as e:
-                st.error(f"Error: {e}")
\ No newline at end of file
+                st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+@st.fragment
+def show_results():
+    """Render the most recently calculated rebate from session state without recalculating it."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    st.success("--- Tax Rebate Summary ---")
+    st.write(f"**Client**: {results['name']}")
+    st.write(f"**Annual Pensionable Income**: R {results['income']:,.2f}")
+    st.write(f"**RA Contribution**: R {results['contribution']:,.2f}")
+    st.write(f"**Deductible Contribution**: R {results['deductible']:,.2f}")
+    if results["excess"] > 0:
+        st.write(f"**Excess Contribution (Carried Over)**: R {results['excess']:,.2f}")
+    st.write(f"**Marginal Tax Rate**: {results['tax_rate'] * 100:.1f}%")
+    st.write(f"**Tax Rebate**: R {results['rebate']:,.2f}")
+    st.markdown(
+        "<p style='font-size: 14px; color: #888888;'>Note: Tax rates are based on 2024/2025 SARS tables. Verify with 2025/2026 rates when available.</p>",
+        unsafe_allow_html=True
+    )
+    excel_exports.download_button("Download Summary as Excel", "ra_tax_rebate_summary.xlsx", build_ra_workbook, *results["workbook_args"])
+
+def show():
+    show_inputs()
+    show_results()
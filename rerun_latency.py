@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+from tornado import gen, ioloop, websocket
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from load_test import summarise
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_START_TIMEOUT = 60  # Seconds to wait for the server to accept connections
+RUN_TIMEOUT = 600  # Seconds one tool's measurements may take
+SETTLE_SECONDS = 60  # Pause after the first page load so the background warm-up does not compete with the timed runs
+PAUSE_SECONDS = 3  # Pause between groups of runs, so background work started by one group does not land in the next
+TOOL_SELECTOR = "Choose a Financial Tool:"
+NAME_INPUT = "Client's Name"  # Edited to time an input change, since it never affects the calculation
+# Tool name -> (calculate button label, {input label: value}); tools whose inputs are plain widgets on the page
+SCENARIOS = {
+    "RA Tax Rebate Calculator": ("Calculate Rebate", {"Annual Pensionable Income (R)": 900000.0, "Annual RA Contribution (R)": 120000.0}),
+    "Retirement Calculator": ("Calculate Retirement Plan", {
+        "Desired Monthly Income at Retirement (R)": 40000.0, "Current Age": 40, "Current Value (R)": 1500000.0, "Monthly Contribution (R)": 5000.0
+    }),
+    "Salary Tax Calculator": ("Calculate Tax", {
+        "Gross Annual Salary (R)": 850000.0, "Annual Pension/RA Contribution (R)": 60000.0, "Client's Age": 44,
+        "Number of Dependants on Medical Scheme (including you)": 2
+    })
+}
+
+class BrowserSession:
+    """A scripted browser tab on a running app: sends reruns with widget values as the frontend does and times them.
+
+    Widgets are found by label in the deltas the server sends, along with the fragment that drew
+    them, so an input change can rerun just that fragment like the frontend does.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.page_script_hash = ""
+        self.widgets = {}  # label -> (element type, element proto, fragment id)
+        self.values = {}  # widget id -> WidgetState sent with every rerun
+
+    async def rerun(self, fragment_id="", trigger=None):
+        """Send one rerun and return the seconds until the server reports the script finished."""
+        message = BackMsg()
+        state = message.rerun_script
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            button = state.widget_states.widgets.add()
+            button.id = self.widgets[trigger][1].id
+            button.trigger_value = True
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        await self._read_until_finished()
+        return time.perf_counter() - start
+
+    async def _read_until_finished(self):
+        while True:
+            raw = await self.connection.read_message()
+            if raw is None:
+                raise RuntimeError("The server closed the connection")
+            message = ForwardMsg()
+            message.ParseFromString(raw)
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = message.new_session.main_script_hash
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raise RuntimeError(element.exception.message)
+                widget = getattr(element, element_type)
+                if getattr(widget, "id", "") and hasattr(widget, "label"):
+                    self.widgets[widget.label] = (element_type, widget, message.delta.fragment_id)
+            # A fragment that calls st.rerun finishes early and the server starts the full rerun itself
+            elif kind == "script_finished" and message.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    def set(self, label, value):
+        """Set a selectbox, text input or number input by label for the following reruns."""
+        element_type, widget, _ = self.widgets[label]
+        state = BackMsg().rerun_script.widget_states.widgets.add()
+        state.id = widget.id
+        if element_type == "selectbox":
+            state.int_value = list(widget.options).index(value)
+        elif element_type == "text_input":
+            state.string_value = value
+        elif element_type == "number_input" and widget.data_type == widget.INT:
+            state.int_value = int(value)
+        else:
+            state.double_value = float(value)
+        self.values[widget.id] = state
+
+async def measure_tool(port, tool, repeats):
+    """Calculate one tool's results, then time input changes and full reruns with the results showing."""
+    connection = await websocket.websocket_connect(f"ws://localhost:{port}/_stcore/stream", max_message_size=1 << 28)
+    session = BrowserSession(connection)
+    try:
+        await session.rerun()
+        session.set(TOOL_SELECTOR, tool)
+        await session.rerun()
+        button, inputs = SCENARIOS[tool]
+        for label, value in {NAME_INPUT: "Client", **inputs}.items():
+            session.set(label, value)
+        await session.rerun()
+        timings = {"calculate": [], "input_change": [], "full_rerun": []}
+        for i in range(repeats):
+            session.set(NAME_INPUT, f"Client {i}")
+            timings["calculate"].append(await session.rerun(trigger=button))
+        await gen.sleep(PAUSE_SECONDS)
+        # Before fragments the whole script reruns, so the widget has no fragment id
+        fragment_id = session.widgets[NAME_INPUT][2]
+        for i in range(repeats):
+            session.set(NAME_INPUT, f"Client {i} (edited)")
+            timings["input_change"].append(await session.rerun(fragment_id=fragment_id))
+        await gen.sleep(PAUSE_SECONDS)
+        for i in range(repeats):
+            timings["full_rerun"].append(await session.rerun())
+    finally:
+        connection.close()
+    return {"fragments": bool(fragment_id), **{name: summarise(values) for name, values in timings.items()}}
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("", 0))
+        return probe.getsockname()[1]
+
+def run_rerun_latency(app_dir=APP_DIR, tools=None, repeats=20, settle_seconds=SETTLE_SECONDS):
+    """Serve app_dir's app.py (through its serve.py when it has one), time each tool's interactions and return a JSON-ready report.
+
+    app_dir can be an older checkout of the app, to compare rerun latency before and after a change.
+    """
+    tools = tools or list(SCENARIOS)
+    port = _free_port()
+    # Serve the app the way it is deployed: through serve.py where the checkout has it
+    command = ["serve.py"] if os.path.exists(os.path.join(app_dir, "serve.py")) else ["-m", "streamlit", "run", "app.py"]
+    server = subprocess.Popen(
+        [sys.executable, *command, "--server.headless", "true", "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    loop = ioloop.IOLoop.current()
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            try:
+                socket.create_connection(("localhost", port)).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("The Streamlit server did not start")
+                time.sleep(0.2)
+        loop.run_sync(lambda: measure_tool(port, tools[0], 1), timeout=RUN_TIMEOUT)
+        time.sleep(settle_seconds)
+        per_tool = {tool: loop.run_sync(lambda tool=tool: measure_tool(port, tool, repeats), timeout=RUN_TIMEOUT) for tool in tools}
+    finally:
+        server.terminate()
+        server.wait()
+    return {"app_dir": os.path.abspath(app_dir), "config": {"tools": tools, "repeats": repeats, "settle_seconds": settle_seconds}, "per_tool": per_tool}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time reruns of the Navigate Wealth tools on a real Streamlit server, including fragment reruns.")
+    parser.add_argument("--app-dir", default=APP_DIR, help="Directory of the app.py to serve, e.g. a worktree of an older commit (default: this checkout)")
+    parser.add_argument("--tool", action="append", choices=sorted(SCENARIOS), help="Limit to this tool (repeatable)")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs of each interaction (default: 20)")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS, help=f"Seconds to wait after the first page load (default: {SETTLE_SECONDS})")
+    args = parser.parse_args()
+    print(json.dumps(run_rerun_latency(args.app_dir, args.tool, args.repeats, args.settle), indent=2))
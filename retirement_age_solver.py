@@ -0,0 +1,71 @@
+import numpy as np
+
+MAX_RETIREMENT_AGE = 75
+MAX_DRAWDOWN_RATE = 0.175  # Legislative maximum
+REMAINING_YEARS = 20  # Default remaining life expectancy after retirement, as in calculate_retirement_plan
+
+def project_provisions(provisions, years):
+    """Return the future value of each provision after each number of years, as a (provisions x years) array.
+
+    Matches retirement_calculator.calculate_future_value year by year. A year's contributions
+    (twelve monthly payments, each compounded to year end) add a fixed multiple of that year's
+    contribution, so the value after n years is a discounted cumulative sum instead of a loop.
+    """
+    years = np.asarray(years)
+    current_value = np.array([p["current_value"] for p in provisions], dtype=float)[:, None]
+    annual_rate = np.array([p["annual_return"] for p in provisions], dtype=float)[:, None]
+    monthly_contribution = np.array([p["monthly_contribution"] for p in provisions], dtype=float)[:, None]
+    increase = np.array([p["contribution_increase"] for p in provisions], dtype=float)[:, None]
+    monthly_rate = (1 + annual_rate) ** (1 / 12) - 1
+    # Value at year end of one rand a month, each payment growing at the monthly rate until year end
+    year_end_factor = ((1 + monthly_rate) ** np.arange(12)).sum(axis=1, keepdims=True) / 12
+
+    horizon = np.arange(years.max() + 1 if years.size else 1)
+    annual_contributions = monthly_contribution * 12 * (1 + increase) ** horizon[:-1]
+    growth = (1 + annual_rate) ** horizon
+    # The contribution made in year y grows for (n - 1 - y) more years by the end of year n
+    discounted = np.cumsum(annual_contributions * year_end_factor / growth[:, 1:], axis=1)
+    contributions = np.concatenate([np.zeros((len(provisions), 1)), discounted], axis=1) * growth
+    return (current_value * growth + contributions)[:, years]
+
+def capital_required(desired_monthly_income, desired_annual_increase, inflation_rate, assumed_return, preserve_capital, preservation_years, years):
+    """Return the capital needed at retirement after each number of years, as an array.
+
+    With preserve_capital this is calculate_retirement_plan's capital requirement. Without it,
+    calculate_retirement_plan only reports how long capital lasts, so the requirement is the capital
+    that pays the inflated income at the start of each of the remaining years at the assumed return,
+    and at least enough that the first withdrawal is within the maximum drawdown rate.
+    """
+    years = np.asarray(years, dtype=float)
+    future_annual_income = desired_monthly_income * 12 * ((1 + inflation_rate) * (1 + desired_annual_increase)) ** years
+    if assumed_return <= 0:
+        if preserve_capital:
+            return np.full(years.shape, np.inf)
+        return np.maximum(future_annual_income * REMAINING_YEARS, future_annual_income / MAX_DRAWDOWN_RATE)
+    annuity_factor = (1 - (1 + assumed_return) ** (-REMAINING_YEARS)) / assumed_return
+    if preserve_capital:
+        capital_at_retirement = future_annual_income / assumed_return
+        income_after_preservation = future_annual_income * ((1 + inflation_rate) * (1 + desired_annual_increase)) ** preservation_years
+        preserved = income_after_preservation * annuity_factor / (1 + assumed_return) ** preservation_years
+        return np.maximum(capital_at_retirement, preserved)
+    return np.maximum(future_annual_income * annuity_factor * (1 + assumed_return), future_annual_income / MAX_DRAWDOWN_RATE)
+
+def solve_retirement_age(current_age, desired_monthly_income, desired_annual_increase, inflation_rate, assumed_return, preserve_capital, preservation_years, provisions, max_age=MAX_RETIREMENT_AGE):
+    """Project provisions and required capital for every retirement age up to max_age in one pass.
+
+    Returns the ages, the projected provisions, the capital required, the surplus (negative for a
+    shortfall) at each age and the earliest age at which provisions meet the requirement, or None.
+    """
+    ages = np.arange(current_age, max(current_age, max_age) + 1)
+    years = ages - current_age
+    provisions_value = project_provisions(provisions, years).sum(axis=0) if provisions else np.zeros(len(ages))
+    required = capital_required(desired_monthly_income, desired_annual_increase, inflation_rate, assumed_return, preserve_capital, preservation_years, years)
+    surplus = provisions_value - required
+    feasible = np.flatnonzero(surplus >= 0)
+    return {
+        "ages": ages,
+        "provisions_value": provisions_value,
+        "capital_required": required,
+        "surplus": surplus,
+        "earliest_age": int(ages[feasible[0]]) if len(feasible) else None
+    }
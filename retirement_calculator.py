@@ -3,6 +3,14 @@ import pandas as pd
 import io
 import math
 import plotly.graph_objects as go
+import drawdown_backtest
+import drawdown_optimizer
+import retirement_age_solver
+import retirement_scenarios
+import excel_exports
+import memory_profile
+import cashflow_ledger
+import validation
 
 def calculate_future_value(current_value, annual_rate, years, monthly_contribution=0, annual_contribution_increase=0):
     """Calculate the future value of an investment with monthly contributions and annual increases."""
@@ -102,7 +110,216 @@ def calculate_retirement_plan(monthly_income, inflation_rate, annual_increase, y
         )[0]
         return future_annual_income, future_monthly_income, capital_required, years_until_depletion, withdrawal_at_retirement
 
-def show():
+def calculate_retirement_report(name, current_age, retirement_age, desired_monthly_income, desired_annual_increase, inflation_rate, assumed_return, preserve_capital, preservation_years, provisions):
+    """Calculate every figure shown on the retirement page and written to its Excel export."""
+    years_to_retirement = retirement_age - current_age
+    future_annual_income, future_monthly_income, capital_required, years_until_depletion, _ = calculate_retirement_plan(
+        desired_monthly_income, inflation_rate, desired_annual_increase, years_to_retirement, preserve_capital, preservation_years, assumed_return
+    )
+    # One ledger pass gives the provisions' values at retirement and, without preservation, the whole drawdown
+    ledger = cashflow_ledger.build_ledger([{
+        "current_age": current_age,
+        "retirement_age": retirement_age,
+        "provisions": provisions,
+        "inflation_rate": inflation_rate,
+        "assumed_return": assumed_return,
+        "annual_income": 0 if preserve_capital else future_annual_income
+    }], horizon_years=0 if preserve_capital else cashflow_ledger.HORIZON_YEARS)
+    total_provision_value = float(ledger["capital_at_retirement"][0])
+    provisions_data = []
+    average_return = 0
+    total_weight = 0
+    for provision, fv in zip(provisions, ledger["provision_values"]):
+        fv = float(fv)
+        provisions_data.append({
+            "Type": provision["type"],
+            "Current Value (R)": provision["current_value"],
+            "Annual Return (%)": provision["annual_return"] * 100,
+            "Monthly Contribution (R)": provision["monthly_contribution"],
+            "Annual Contribution Increase (%)": provision["contribution_increase"] * 100,
+            "Future Value at Retirement (R)": fv
+        })
+        weight = provision["current_value"] + (provision["monthly_contribution"] * 12 * years_to_retirement)
+        average_return += provision["annual_return"] * weight
+        total_weight += weight
+    if total_weight > 0:
+        average_return /= total_weight
+    summary_data = {
+        "Client": [name],
+        "Current Age": [current_age],
+        "Retirement Age": [retirement_age],
+        "Years to Retirement": [years_to_retirement],
+        "Desired Monthly Income at Retirement (R)": [desired_monthly_income],
+        "Future Annual Income Needed (R)": [future_annual_income],
+        "Future Monthly Income Needed (R)": [future_monthly_income]
+    }
+    summary_data["Total Future Value of Provisions (R)"] = [total_provision_value]
+    report = {
+        "name": name,
+        "current_age": current_age,
+        "retirement_age": retirement_age,
+        "years_to_retirement": years_to_retirement,
+        "desired_monthly_income": desired_monthly_income,
+        "desired_annual_increase": desired_annual_increase,
+        "future_annual_income": future_annual_income,
+        "future_monthly_income": future_monthly_income,
+        "preserve_capital": preserve_capital,
+        "preservation_years": preservation_years,
+        "assumed_return": assumed_return,
+        "inflation_rate": inflation_rate,
+        "capital_required": capital_required,
+        "total_provision_value": total_provision_value,
+        "average_return": average_return,
+        "provisions": provisions,
+        "provisions_data": provisions_data,
+        "chart_data": None,
+        "ledger": cashflow_ledger.ledger_frame(ledger, 0),
+        "shortfall": None
+    }
+    if preserve_capital:
+        shortfall = capital_required - total_provision_value
+        summary_data["Capital Required at Retirement (R)"] = [capital_required]
+        summary_data["Preserve Capital"] = ["Yes"]
+        summary_data["Preservation Period (Years)"] = [preservation_years]
+
+        # Calculate withdrawal based on legislative minimum and maximum
+        max_drawdown_rate = 0.175  # Legislative maximum
+        min_drawdown_rate = 0.025  # Legislative minimum
+        max_sustainable_withdrawal = total_provision_value * assumed_return
+
+        # Calculate the future annual income needed to achieve exactly the desired monthly income in today's terms
+        inflation_factor = cashflow_ledger.inflation_index(ledger, 0, ledger["retirement_months"][0])
+        target_future_monthly = desired_monthly_income * inflation_factor
+        target_future_annual = target_future_monthly * 12
+
+        # Calculate the drawdown rate needed to achieve the target future annual income
+        target_drawdown_rate = (target_future_annual / total_provision_value) if total_provision_value > 0 else 0
+
+        # Calculate withdrawal at the legislative minimum
+        min_withdrawal = total_provision_value * min_drawdown_rate
+        min_future_monthly = min_withdrawal / 12
+        min_current_monthly = min_future_monthly / inflation_factor
+
+        if total_provision_value >= capital_required:
+            # Provisions are sufficient or in excess
+            if min_current_monthly >= desired_monthly_income:
+                # If the legislative minimum drawdown provides at least the desired income in today's terms
+                actual_withdrawal = min_withdrawal
+                drawdown_rate = min_drawdown_rate * 100
+            else:
+                # Use the drawdown rate needed to achieve the target income, capped by assumed return and legislative max
+                drawdown_rate = min(target_drawdown_rate, assumed_return, max_drawdown_rate)
+                actual_withdrawal = total_provision_value * drawdown_rate
+                drawdown_rate *= 100  # Convert to percentage
+        else:
+            # Provisions are insufficient, cap withdrawal to preserve capital
+            actual_withdrawal = min(target_future_annual, max_sustainable_withdrawal)
+            actual_withdrawal = min(actual_withdrawal, total_provision_value * max_drawdown_rate)
+            drawdown_rate = (actual_withdrawal / total_provision_value * 100) if total_provision_value > 0 else 0
+
+        # Calculate shortfall/excess
+        future_monthly_actual = actual_withdrawal / 12
+        current_monthly_actual = future_monthly_actual / inflation_factor
+        capital_growth_rate = None
+        if current_monthly_actual < desired_monthly_income:
+            shortfall_percentage = ((desired_monthly_income - current_monthly_actual) / desired_monthly_income) * 100
+        else:
+            shortfall_percentage = 0
+            capital_growth_rate = assumed_return * 100 - drawdown_rate
+
+        summary_data["Initial Withdrawal at Retirement (Annual) (R)"] = [actual_withdrawal]
+        summary_data["Initial Withdrawal at Retirement (Monthly, Future Value) (R)"] = [future_monthly_actual]
+        summary_data["Initial Withdrawal at Retirement (Monthly, Today's Value) (R)"] = [current_monthly_actual]
+        if shortfall_percentage > 0:
+            summary_data["Income Shortfall (%)"] = [shortfall_percentage]
+        else:
+            summary_data["Capital Growth Rate (%)"] = [capital_growth_rate]
+        summary_data["Years Until Capital Depletion"] = ["N/A"]
+        report.update({
+            "shortfall": shortfall,
+            "actual_withdrawal": actual_withdrawal,
+            "future_monthly_actual": future_monthly_actual,
+            "current_monthly_actual": current_monthly_actual,
+            "drawdown_rate": drawdown_rate,
+            "shortfall_percentage": shortfall_percentage,
+            "capital_growth_rate": capital_growth_rate
+        })
+        if shortfall > 0:
+            additional_savings = calculate_additional_savings_needed(shortfall, years_to_retirement, average_return)
+            summary_data["Capital Shortfall (R)"] = [shortfall]
+            summary_data["Additional Monthly Savings Needed (R)"] = [additional_savings]
+            report["additional_savings"] = additional_savings
+        else:
+            summary_data["Capital Excess (R)"] = [-shortfall]
+            summary_data["Capital Shortfall (R)"] = [0]
+            summary_data["Additional Monthly Savings Needed (R)"] = [0]
+    else:
+        years_until_depletion = int(ledger["depletion_years"][0])
+        if years_until_depletion == cashflow_ledger.NOT_DEPLETED:
+            years_until_depletion = f"{cashflow_ledger.HORIZON_YEARS}+"
+        first_withdrawal = float(ledger["first_withdrawal"][0])
+        summary_data["Capital at Retirement (R)"] = [total_provision_value]
+        summary_data["Years Until Capital Depletion"] = [years_until_depletion]
+        summary_data["Initial Withdrawal at Retirement (Annual) (R)"] = [first_withdrawal]
+        summary_data["Initial Withdrawal at Retirement (Monthly) (R)"] = [first_withdrawal / 12]
+        summary_data["Preserve Capital"] = ["No"]
+        summary_data["Preservation Period (Years)"] = [0]
+        report.update({
+            "years_until_depletion": years_until_depletion,
+            "first_withdrawal": first_withdrawal,
+            "chart_data": cashflow_ledger.drawdown_schedule(ledger, 0)
+        })
+    report["summary_data"] = summary_data
+    return report
+
+RETIREMENT_EXCEL_INSTRUCTIONS = [
+    "This Excel file contains your Retirement Plan Summary and Provisions Data.",
+    "If you did not opt to preserve capital, the 'Chart Data' sheet includes data for visualizing capital depletion over time.",
+    "To recreate the line chart in Excel (if applicable):",
+    "1. Go to the 'Chart Data' sheet.",
+    "2. Select the 'Age' and 'Capital (R)' columns (or other metrics).",
+    "3. Click Insert > Line Chart in Excel to visualize the depletion.",
+    "The 'Monthly Ledger' sheet has every month's contribution, growth, withdrawal and closing balance from today, with the inflation index used for today's values."
+]
+
+def build_retirement_workbook(report):
+    """Write a retirement report to an in-memory Excel workbook."""
+    summary_df = pd.DataFrame(report["summary_data"])
+    provisions_df = pd.DataFrame(report["provisions_data"])
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, index=False, sheet_name="Retirement Plan Summary")
+        provisions_df.to_excel(writer, startrow=len(summary_df) + 2, index=False, sheet_name="Retirement Plan Summary")
+        if report["chart_data"] is not None:
+            chart_df = pd.DataFrame(report["chart_data"]).reset_index()
+            chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
+        if report.get("ledger") is not None:
+            report["ledger"].to_excel(writer, index=False, sheet_name="Monthly Ledger")
+        instructions = pd.DataFrame({"Instructions": RETIREMENT_EXCEL_INSTRUCTIONS})
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    buffer.seek(0)
+    return buffer
+
+RESULTS_KEY = "retirement_calculator_results"
+INPUT_SCHEMA = validation.schema({
+    "name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "desired_monthly_income": validation.field("Desired Monthly Income at Retirement (R)", minimum=0, exclusive_minimum=True),
+    "current_age": validation.field("Current Age", minimum=18),
+    "retirement_age": validation.field("Retirement Age")
+}, [
+    validation.rule(["current_age", "retirement_age"], lambda table: table["current_age"] < table["retirement_age"], "Current age must be less than retirement age.")
+])
+PROVISION_SCHEMA = validation.schema({
+    "current_value": validation.field("Current Value (R)", minimum=0),
+    "annual_return": validation.field("Assumed Annual Return", minimum=0, maximum=0.2, message="Assumed annual return must be between 0% and 20%."),
+    "monthly_contribution": validation.field("Monthly Contribution (R)", minimum=0),
+    "contribution_increase": validation.field("Annual Contribution Increase", minimum=0, maximum=0.2, message="Annual contribution increase must be between 0% and 20%.")
+})
+SCENARIO_CACHE_KEY = "retirement_scenario_cache"
+
+@st.fragment
+def show_inputs():
+    """Render the retirement inputs and store the calculated report in session state on submit."""
     st.write("Enter client details to calculate the capital needed for retirement.")
     name = st.text_input("Client's Name", key="retirement_calc_name")
     desired_monthly_income = st.number_input("Desired Monthly Income at Retirement (R)", min_value=0.0, step=1000.0)
@@ -157,321 +374,420 @@ def show():
         submit_button = st.form_submit_button("Calculate Retirement Plan")
 
     if submit_button:
-        if not name.strip():
-            st.error("Please enter a name.")
-        elif desired_monthly_income <= 0 or current_age < 18 or current_age >= retirement_age:
-            st.error("Please ensure desired income is positive and current age is valid (18 or older, less than retirement age).")
+        _, provision_errors = validation.validate(pd.DataFrame(provisions), PROVISION_SCHEMA)
+        errors = validation.validate_inputs({
+            "name": name, "desired_monthly_income": desired_monthly_income, "current_age": current_age, "retirement_age": retirement_age
+        }, INPUT_SCHEMA) + validation.error_messages(provision_errors, "Provision")
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                years_to_retirement = retirement_age - current_age
-                future_annual_income, future_monthly_income, capital_required, years_until_depletion, _ = calculate_retirement_plan(
-                    desired_monthly_income, inflation_rate, desired_annual_increase, years_to_retirement, preserve_capital, preservation_years, assumed_return
-                )
-                total_provision_value = 0
-                provisions_data = []
-                average_return = 0
-                total_weight = 0
-                for provision in provisions:
-                    fv = calculate_future_value(
-                        provision["current_value"],
-                        provision["annual_return"],
-                        years_to_retirement,
-                        provision["monthly_contribution"],
-                        provision["contribution_increase"]
-                    )
-                    total_provision_value += fv
-                    provisions_data.append({
-                        "Type": provision["type"],
-                        "Current Value (R)": provision["current_value"],
-                        "Annual Return (%)": provision["annual_return"] * 100,
-                        "Monthly Contribution (R)": provision["monthly_contribution"],
-                        "Annual Contribution Increase (%)": provision["contribution_increase"] * 100,
-                        "Future Value at Retirement (R)": fv
-                    })
-                    weight = provision["current_value"] + (provision["monthly_contribution"] * 12 * years_to_retirement)
-                    average_return += provision["annual_return"] * weight
-                    total_weight += weight
-                if total_weight > 0:
-                    average_return /= total_weight
-                summary_data = {
-                    "Client": [name],
-                    "Current Age": [current_age],
-                    "Retirement Age": [retirement_age],
-                    "Years to Retirement": [years_to_retirement],
-                    "Desired Monthly Income at Retirement (R)": [desired_monthly_income],
-                    "Future Annual Income Needed (R)": [future_annual_income],
-                    "Future Monthly Income Needed (R)": [future_monthly_income]
-                }
-                st.success("--- Retirement Plan Summary ---")
-                st.write(f"**Client**: {name}")
-                st.write(f"**Current Age**: {current_age}")
-                st.write(f"**Retirement Age**: {retirement_age}")
-                st.write(f"**Years to Retirement**: {years_to_retirement}")
-                st.write(f"**Desired Monthly Income at Retirement (Today's Value)**: R {desired_monthly_income:,.2f}")
-                st.write(f"**Future Annual Income Needed (Inflation Adjusted)**: R {future_annual_income:,.2f}")
-                st.write(f"**Future Monthly Income Needed (Inflation Adjusted)**: R {future_monthly_income:,.2f}")
-                st.write("**Provisions at Retirement**:")
-                provisions_df = pd.DataFrame(provisions_data)
-                # Style the provisions table for better visibility
-                st.markdown(
-                    """
-                    <style>
-                    .dataframe {
-                        background-color: #555555;
-                        color: white;
-                        border: 1px solid #777777;
-                    }
-                    .dataframe th {
-                        background-color: #666666;
-                        color: white;
-                        border: 1px solid #777777;
-                    }
-                    .dataframe td {
-                        background-color: #555555;
-                        color: white;
-                        border: 1px solid #777777;
-                    }
-                    </style>
-                    """,
-                    unsafe_allow_html=True
-                )
-                st.dataframe(provisions_df, use_container_width=True)
-                st.write(f"**Total Future Value of Provisions**: R {total_provision_value:,.2f}")
-                summary_data["Total Future Value of Provisions (R)"] = [total_provision_value]
-                if preserve_capital:
-                    shortfall = capital_required - total_provision_value
-                    st.write(f"**Capital Required at Retirement (Preserve Capital)**: R {capital_required:,.2f}")
-                    summary_data["Capital Required at Retirement (R)"] = [capital_required]
-                    summary_data["Preserve Capital"] = ["Yes"]
-                    summary_data["Preservation Period (Years)"] = [preservation_years]
-
-                    # Calculate withdrawal based on legislative minimum and maximum
-                    max_drawdown_rate = 0.175  # Legislative maximum
-                    min_drawdown_rate = 0.025  # Legislative minimum
-                    max_sustainable_withdrawal = total_provision_value * assumed_return
-
-                    # Calculate the future annual income needed to achieve exactly the desired monthly income in today's terms
-                    inflation_factor = (1 + inflation_rate) ** years_to_retirement
-                    target_future_monthly = desired_monthly_income * inflation_factor
-                    target_future_annual = target_future_monthly * 12
-
-                    # Calculate the drawdown rate needed to achieve the target future annual income
-                    target_drawdown_rate = (target_future_annual / total_provision_value) if total_provision_value > 0 else 0
-
-                    # Calculate withdrawal at the legislative minimum
-                    min_withdrawal = total_provision_value * min_drawdown_rate
-                    min_future_monthly = min_withdrawal / 12
-                    min_current_monthly = min_future_monthly / inflation_factor
-
-                    if total_provision_value >= capital_required:
-                        # Provisions are sufficient or in excess
-                        if min_current_monthly >= desired_monthly_income:
-                            # If the legislative minimum drawdown provides at least the desired income in today's terms
-                            actual_withdrawal = min_withdrawal
-                            drawdown_rate = min_drawdown_rate * 100
-                        else:
-                            # Use the drawdown rate needed to achieve the target income, capped by assumed return and legislative max
-                            drawdown_rate = min(target_drawdown_rate, assumed_return, max_drawdown_rate)
-                            actual_withdrawal = total_provision_value * drawdown_rate
-                            drawdown_rate *= 100  # Convert to percentage
-                    else:
-                        # Provisions are insufficient, cap withdrawal to preserve capital
-                        actual_withdrawal = min(target_future_annual, max_sustainable_withdrawal)
-                        actual_withdrawal = min(actual_withdrawal, total_provision_value * max_drawdown_rate)
-                        drawdown_rate = (actual_withdrawal / total_provision_value * 100) if total_provision_value > 0 else 0
-
-                    # Calculate shortfall/excess
-                    future_monthly_actual = actual_withdrawal / 12
-                    current_monthly_actual = future_monthly_actual / inflation_factor
-                    if current_monthly_actual < desired_monthly_income:
-                        shortfall_percentage = ((desired_monthly_income - current_monthly_actual) / desired_monthly_income) * 100
-                    else:
-                        shortfall_percentage = 0
-                        capital_growth_rate = assumed_return * 100 - drawdown_rate
-
-                    # Display results
-                    st.write(f"**Initial Withdrawal at Retirement (Annual)**: R {actual_withdrawal:,.2f}")
-                    st.write(f"**Initial Withdrawal at Retirement (Monthly, Future Value)**: R {future_monthly_actual:,.2f}")
-                    st.write(f"**Initial Withdrawal at Retirement (Monthly, Today's Value)**: R {current_monthly_actual:,.2f}")
-                    summary_data["Initial Withdrawal at Retirement (Annual) (R)"] = [actual_withdrawal]
-                    summary_data["Initial Withdrawal at Retirement (Monthly, Future Value) (R)"] = [future_monthly_actual]
-                    summary_data["Initial Withdrawal at Retirement (Monthly, Today's Value) (R)"] = [current_monthly_actual]
-
-                    # Progress bar for drawdown rate
-                    color = "#2ca02c" if drawdown_rate <= 5 else "#ff7f0e" if drawdown_rate <= 10 else "#d62728"
-                    fig_progress = go.Figure(go.Bar(
-                        x=[drawdown_rate],
-                        y=["Drawdown Rate"],
-                        orientation='h',
-                        marker_color=color,
-                        text=[f"{drawdown_rate:.2f}%"],
-                        textposition='auto',
-                    ))
-                    fig_progress.add_vline(x=17.5, line_dash="dash", line_color="red", annotation_text="Max Legislative Rate (17.5%)", annotation_position="top")
-                    fig_progress.add_vline(x=2.5, line_dash="dash", line_color="green", annotation_text="Min Legislative Rate (2.5%)", annotation_position="bottom")
-                    fig_progress.update_layout(
-                        title="Initial Drawdown Rate (%)",
-                        xaxis_title="Drawdown Rate (%)",
-                        yaxis_title="",
-                        xaxis=dict(range=[0, 20], tickfont=dict(color="white")),
-                        yaxis=dict(tickfont=dict(color="white")),
-                        showlegend=False,
-                        paper_bgcolor="#4A4A4A",
-                        plot_bgcolor="#4A4A4A",
-                        font={'color': "white"},
-                        height=200
-                    )
-                    st.plotly_chart(fig_progress)
-
-                    # Display shortfall or excess
-                    if shortfall_percentage > 0:
-                        st.warning(f"**Income Shortfall**: {shortfall_percentage:.2f}%")
-                        summary_data["Income Shortfall (%)"] = [shortfall_percentage]
-                    else:
-                        st.write(f"**Capital Growth Rate**: {capital_growth_rate:.2f}% per year")
-                        summary_data["Capital Growth Rate (%)"] = [capital_growth_rate]
-
-                    # Bar chart for Capital Required vs Total Provisions
-                    fig_bar = go.Figure(data=[
-                        go.Bar(name="Total Provisions", x=["Capital"], y=[total_provision_value], marker_color="#1f77b4"),
-                        go.Bar(name="Capital Required", x=["Capital"], y=[capital_required], marker_color="#ff7f0e")
-                    ])
-                    fig_bar.update_layout(
-                        title="Capital Required vs Total Provisions",
-                        xaxis_title="",
-                        yaxis_title="Amount (R)",
-                        barmode="group",
-                        showlegend=True,
-                        paper_bgcolor="#4A4A4A",
-                        plot_bgcolor="#4A4A4A",
-                        font={'color': "white"},
-                        yaxis={'tickfont': {'color': "white"}},
-                        xaxis={'tickfont': {'color': "white"}}
-                    )
-                    st.plotly_chart(fig_bar)
-
-                    summary_data["Years Until Capital Depletion"] = ["N/A"]
-                else:
-                    years_until_depletion, first_withdrawal, capital_over_time, withdrawals_over_time, monthly_income_over_time, monthly_income_today_value = calculate_years_until_depletion(
-                        total_provision_value, future_annual_income, inflation_rate, years_to_retirement, assumed_return
-                    )
-                    st.write(f"**Capital at Retirement (Based on Provisions)**: R {total_provision_value:,.2f}")
-                    st.write(f"**Years Until Capital Depletion**: {years_until_depletion}")
-                    st.write(f"**Initial Withdrawal at Retirement (Annual)**: R {first_withdrawal:,.2f}")
-                    st.write(f"**Initial Withdrawal at Retirement (Monthly)**: R {(first_withdrawal / 12):,.2f}")
-                    summary_data["Capital at Retirement (R)"] = [total_provision_value]
-                    summary_data["Years Until Capital Depletion"] = [years_until_depletion]
-                    summary_data["Initial Withdrawal at Retirement (Annual) (R)"] = [first_withdrawal]
-                    summary_data["Initial Withdrawal at Retirement (Monthly) (R)"] = [first_withdrawal / 12]
-                    summary_data["Preserve Capital"] = ["No"]
-                    summary_data["Preservation Period (Years)"] = [0]
-                    st.write("**Capital Depletion Over Time**")
-                    chart_data = pd.DataFrame({
-                        "Age": list(range(retirement_age, retirement_age + len(capital_over_time))),
-                        "Capital (R)": capital_over_time,
-                        "Annual Withdrawal (R)": withdrawals_over_time,
-                        "Monthly Income (R)": monthly_income_over_time,
-                        "Monthly Income in Today's Value (R)": monthly_income_today_value
-                    })
-                    # First Graph: Capital and Annual Withdrawal
-                    fig1 = go.Figure()
-                    fig1.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Capital (R)"],
-                        mode="lines",
-                        name="Capital (R)",
-                        hovertemplate="Age: %{x}<br>Capital: R%{y:.2f}<extra></extra>"
-                    ))
-                    fig1.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Annual Withdrawal (R)"],
-                        mode="lines",
-                        name="Annual Withdrawal (R)",
-                        hovertemplate="Age: %{x}<br>Annual Withdrawal: R%{y:.2f}<extra></extra>"
-                    ))
-                    fig1.update_layout(
-                        title="Capital and Annual Withdrawal Over Time",
-                        xaxis_title="Age",
-                        yaxis_title="Amount (R)",
-                        hovermode="x unified",
-                        showlegend=True,
-                        paper_bgcolor="#4A4A4A",
-                        plot_bgcolor="#4A4A4A",
-                        font={'color': "white"},
-                        yaxis={'tickfont': {'color': "white"}},
-                        xaxis={'tickfont': {'color': "white"}}
+                with memory_profile.track(__name__, "calculation"):
+                    report = calculate_retirement_report(
+                        name, current_age, retirement_age, desired_monthly_income, desired_annual_increase,
+                        inflation_rate, assumed_return, preserve_capital, preservation_years, provisions
                     )
-                    st.plotly_chart(fig1)
-
-                    # Second Graph: Monthly Income (Future Value) and Monthly Income in Today's Value
-                    fig2 = go.Figure()
-                    fig2.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Monthly Income (R)"],
-                        mode="lines",
-                        name="Monthly Income (Future Value) (R)",
-                        hovertemplate="Age: %{x}<br>Monthly Income (Future): R%{y:.2f}<extra></extra>"
-                    ))
-                    fig2.add_trace(go.Scatter(
-                        x=chart_data["Age"],
-                        y=chart_data["Monthly Income in Today's Value (R)"],
-                        mode="lines",
-                        name="Monthly Income in Today's Value (R)",
-                        hovertemplate="Age: %{x}<br>Monthly Income (Today's Value): R%{y:.2f}<extra></extra>"
-                    ))
-                    fig2.update_layout(
-                        title="Monthly Income Over Time",
-                        xaxis_title="Age",
-                        yaxis_title="Monthly Income (R)",
-                        hovermode="x unified",
-                        showlegend=True,
-                        paper_bgcolor="#4A4A4A",
-                        plot_bgcolor="#4A4A4A",
-                        font={'color': "white"},
-                        yaxis={'tickfont': {'color': "white"}},
-                        xaxis={'tickfont': {'color': "white"}}
-                    )
-                    st.plotly_chart(fig2)
-
-                if preserve_capital and shortfall > 0:
-                    additional_savings = calculate_additional_savings_needed(shortfall, years_to_retirement, average_return)
-                    st.warning(f"**Capital Shortfall**: R {shortfall:,.2f}")
-                    st.write(f"**Additional Monthly Savings Needed**: R {additional_savings:,.2f}")
-                    summary_data["Capital Shortfall (R)"] = [shortfall]
-                    summary_data["Additional Monthly Savings Needed (R)"] = [additional_savings]
-                elif preserve_capital and shortfall <= 0:
-                    st.write(f"**Capital Excess**: R {-shortfall:,.2f}")
-                    summary_data["Capital Excess (R)"] = [-shortfall]
-                    summary_data["Capital Shortfall (R)"] = [0]
-                    summary_data["Additional Monthly Savings Needed (R)"] = [0]
-                summary_df = pd.DataFrame(summary_data)
-                chart_df = pd.DataFrame(chart_data).reset_index() if not preserve_capital else pd.DataFrame()
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    summary_df.to_excel(writer, index=False, sheet_name="Retirement Plan Summary")
-                    provisions_df.to_excel(writer, startrow=len(summary_df) + 2, index=False, sheet_name="Retirement Plan Summary")
-                    if not preserve_capital:
-                        chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your Retirement Plan Summary and Provisions Data.",
-                            "If you did not opt to preserve capital, the 'Chart Data' sheet includes data for visualizing capital depletion over time.",
-                            "To recreate the line chart in Excel (if applicable):",
-                            "1. Go to the 'Chart Data' sheet.",
-                            "2. Select the 'Age' and 'Capital (R)' columns (or other metrics).",
-                            "3. Click Insert > Line Chart in Excel to visualize the depletion."
-                        ]
-                    })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="retirement_plan_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                    st.session_state[RESULTS_KEY] = report
             except Exception as e:
                 st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+def show_retirement_age_solver(report):
+    """Show the surplus or shortfall of provisions against required capital at every retirement age."""
+    with st.expander("Earliest Feasible Retirement Age"):
+        solution = retirement_age_solver.solve_retirement_age(
+            report["current_age"], report["desired_monthly_income"], report["desired_annual_increase"], report["inflation_rate"],
+            report["assumed_return"], report["preserve_capital"], report["preservation_years"], report["provisions"]
+        )
+        earliest_age = solution["earliest_age"]
+        if earliest_age is None:
+            st.warning(f"Provisions do not meet the capital required at any retirement age up to {solution['ages'][-1]}.")
+        else:
+            st.write(f"**Earliest Feasible Retirement Age**: {earliest_age}")
+        if not report["preserve_capital"]:
+            st.markdown(
+                f"<p style='font-size: 14px; color: #888888;'>Without capital preservation, the capital required is what funds the desired income for {retirement_age_solver.REMAINING_YEARS} years at the assumed return.</p>",
+                unsafe_allow_html=True
+            )
+        fig = go.Figure(go.Bar(
+            x=solution["ages"],
+            y=solution["surplus"],
+            marker_color=["#2ca02c" if surplus >= 0 else "#d62728" for surplus in solution["surplus"]],
+            hovertemplate="Retirement Age: %{x}<br>Surplus/Shortfall: R%{y:,.2f}<extra></extra>"
+        ))
+        fig.update_layout(
+            title="Provisions Less Capital Required by Retirement Age",
+            xaxis_title="Retirement Age",
+            yaxis_title="Surplus / Shortfall (R)",
+            showlegend=False,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig)
+
+def show_safe_drawdown(report):
+    """Search for the highest initial drawdown rate that lasts to a target age with a chosen probability."""
+    with st.expander("Safe Drawdown Rate"):
+        st.write("Find the highest initial drawdown rate, within the 2.5% to 17.5% legislative band, that keeps capital above R125,000 until a target age in a chosen share of simulated markets. The income then rises with inflation each year.")
+        retirement_age = report["retirement_age"]
+        target_age = st.number_input("Target Age", min_value=retirement_age + 1, max_value=120, value=max(95, retirement_age + 1), step=1, key="safe_drawdown_target_age")
+        success_probability = st.slider("Probability of Lasting to Target Age (%)", min_value=50, max_value=99, value=90, key="safe_drawdown_probability") / 100
+        volatility = st.number_input("Return Volatility (%)", min_value=0.0, max_value=40.0, value=drawdown_optimizer.DEFAULT_VOLATILITY * 100, step=1.0, key="safe_drawdown_volatility") / 100
+        capital = report["total_provision_value"]
+        result = drawdown_optimizer.safe_drawdown_rate(
+            capital, report["assumed_return"], report["inflation_rate"], target_age - retirement_age,
+            success_probability, volatility, current_rate=report["drawdown_rate"] / 100
+        )
+        if result["rate"] is None:
+            st.warning(f"Even the legislative minimum of 2.5% only lasts to age {target_age} in {result['success_probability'] * 100:.1f}% of simulated markets.")
+        else:
+            inflation_factor = (1 + report["inflation_rate"]) ** report["years_to_retirement"]
+            annual_income = capital * result["rate"]
+            st.write(f"**Safe Initial Drawdown Rate**: {result['rate'] * 100:.2f}% (lasts to age {target_age} in {result['success_probability'] * 100:.1f}% of simulated markets)")
+            st.write(f"**Safe Initial Withdrawal (Annual)**: R {annual_income:,.2f}")
+            st.write(f"**Safe Initial Withdrawal (Monthly, Today's Value)**: R {annual_income / 12 / inflation_factor:,.2f}")
+        st.write(f"**Chance the Planned {report['drawdown_rate']:.2f}% Drawdown Lasts to Age {target_age}**: {result['current_success_probability'] * 100:.1f}%")
+        st.markdown(
+            f"<p style='font-size: 14px; color: #888888;'>Based on {result['paths']:,} simulated return paths averaging the assumed return after retirement. Every candidate rate is tested on the same paths.</p>",
+            unsafe_allow_html=True
+        )
+
+def show_historical_backtest(report):
+    """Replay the capital drawdown through every historical start year of an uploaded return history."""
+    with st.expander("Historical Backtest"):
+        st.write("Test the drawdown against actual market history instead of one constant return: every start year in the history is replayed, with withdrawals rising with that period's inflation.")
+        uploaded_file = st.file_uploader(
+            "Annual Return History (CSV)",
+            type="csv",
+            key="backtest_history",
+            help="Columns: Year, Inflation and one column per asset class (e.g. Equity, Bonds), as annual percentages for consecutive years."
+        )
+        if uploaded_file is None:
+            return
+        try:
+            history = drawdown_backtest.load_return_history(uploaded_file)
+        except ValueError as e:
+            st.error(f"Error: {e}")
+            return
+        assets = drawdown_backtest.asset_classes(history)
+        weights = {}
+        columns = st.columns(len(assets))
+        for column, asset in zip(columns, assets):
+            with column:
+                weights[asset] = st.number_input(f"{asset} (%)", min_value=0.0, max_value=100.0, value=100.0 / len(assets), step=5.0, key=f"backtest_weight_{asset}")
+        max_horizon = len(history)
+        horizon = st.number_input("Horizon (Years)", min_value=1, max_value=max_horizon, value=min(drawdown_backtest.DEFAULT_HORIZON, max_horizon), step=1, key="backtest_horizon")
+        try:
+            backtest = drawdown_backtest.backtest_history(
+                history, weights, report["total_provision_value"], report["future_annual_income"], report["retirement_age"], horizon
+            )
+        except ValueError as e:
+            st.error(f"Error: {e}")
+            return
+        st.write(f"**Start Years Tested**: {backtest['windows']} ({history.index[0]} to {history.index[0] + backtest['windows'] - 1})")
+        st.write(f"**Failure Rate (Capital Depleted Before Age {backtest['horizon_age']})**: {backtest['failure_rate']:.1f}%")
+        worst_case_age = backtest["worst_case_age"]
+        median_age = backtest["median_age"]
+        st.write(f"**Worst-Case Depletion Age**: {worst_case_age:.0f}" if worst_case_age is not None else f"**Worst-Case Depletion Age**: Capital lasts beyond age {backtest['horizon_age']} in every start year")
+        st.write(f"**Median Depletion Age**: {median_age:.0f}" if median_age is not None else f"**Median Depletion Age**: Beyond age {backtest['horizon_age']}")
+        table = backtest["table"]
+        fig = go.Figure(go.Bar(
+            x=table["Start Year"],
+            y=table["Depletion Age"].fillna(backtest["horizon_age"]),
+            marker_color=["#d62728" if depleted else "#2ca02c" for depleted in table["Depleted"]],
+            hovertemplate="Start Year: %{x}<br>Depletion Age: %{y}<extra></extra>"
+        ))
+        fig.update_layout(
+            title="Depletion Age by Start Year (green: lasted the full horizon)",
+            xaxis_title="Start Year",
+            yaxis_title="Age",
+            showlegend=False,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig)
+
+def show_scenario_comparison(report):
+    """Compare named variants of the plan side by side, recalculating only the variants that changed."""
+    with st.expander("Scenario Comparison"):
+        st.write("Edit, add or remove scenarios below. Each row uses this client's provisions with its own retirement age, income, extra contribution and assumptions.")
+        table = st.data_editor(
+            retirement_scenarios.default_scenarios(report),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="retirement_scenarios",
+            column_config={
+                "Retirement Age": st.column_config.NumberColumn(min_value=report["current_age"] + 1, max_value=retirement_age_solver.MAX_RETIREMENT_AGE, step=1),
+                "Desired Monthly Income (R)": st.column_config.NumberColumn(min_value=0.0, step=1000.0, format="%.2f"),
+                "Extra Monthly Contribution (R)": st.column_config.NumberColumn(min_value=0.0, step=100.0, format="%.2f"),
+                "Inflation Rate (%)": st.column_config.NumberColumn(min_value=0.0, max_value=20.0, step=0.5),
+                "Assumed Return (%)": st.column_config.NumberColumn(min_value=0.0, max_value=20.0, step=0.5),
+                "Preservation Years": st.column_config.SelectboxColumn(options=[0, 10, 15, 20, 25])
+            }
+        )
+        scenarios = {}
+        for _, row in table.iterrows():
+            name = str(row["Scenario"]).strip() if pd.notna(row["Scenario"]) else ""
+            if not name or row[retirement_scenarios.SCENARIO_COLUMNS[1:4]].isna().any():
+                continue
+            if name in scenarios:
+                st.warning(f"Scenario '{name}' appears more than once; only the first is compared.")
+                continue
+            scenarios[name] = retirement_scenarios.scenario_inputs(report, row.fillna({"Inflation Rate (%)": 0, "Assumed Return (%)": 0, "Preserve Capital": False}))
+        if not scenarios:
+            st.info("Add a named scenario with a retirement age, desired income and extra contribution to compare.")
+            return
+        cache = st.session_state.setdefault(SCENARIO_CACHE_KEY, {})
+        results, recomputed = retirement_scenarios.evaluate_scenarios(scenarios, cache)
+        st.dataframe(retirement_scenarios.comparison_table(scenarios, results), use_container_width=True, hide_index=True)
+
+        fig = go.Figure()
+        for name, result in results.items():
+            fig.add_trace(go.Scatter(
+                x=result["ages"],
+                y=result["provisions_by_age"],
+                mode="lines",
+                name=name,
+                hovertemplate=f"{name}<br>Age: %{{x}}<br>Provisions: R%{{y:,.2f}}<extra></extra>"
+            ))
+        fig.update_layout(
+            title="Projected Provisions by Age",
+            xaxis_title="Age",
+            yaxis_title="Amount (R)",
+            hovermode="x unified",
+            showlegend=True,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig)
+
+        names = list(results)
+        fig_bar = go.Figure(data=[
+            go.Bar(name="Total Provisions at Retirement", x=names, y=[results[name]["total_provision_value"] for name in names], marker_color="#1f77b4"),
+            go.Bar(name="Capital Required", x=names, y=[results[name]["capital_required"] for name in names], marker_color="#ff7f0e")
+        ])
+        fig_bar.update_layout(
+            title="Provisions vs Capital Required by Scenario",
+            xaxis_title="",
+            yaxis_title="Amount (R)",
+            barmode="group",
+            showlegend=True,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig_bar)
+        st.markdown(
+            f"<p style='font-size: 14px; color: #888888;'>Extra contributions are a level monthly amount earning the plan's average return. Capital required is shown for scenarios that preserve capital; the others show how long capital lasts. Recalculated {len(recomputed)} of {len(scenarios)} scenarios.</p>",
+            unsafe_allow_html=True
+        )
+
+@st.fragment
+@memory_profile.tracked("figures")
+def show_results():
+    """Render the most recently calculated retirement plan from session state without recalculating it."""
+    report = st.session_state.get(RESULTS_KEY)
+    if report is None:
+        return
+    name = report["name"]
+    current_age = report["current_age"]
+    retirement_age = report["retirement_age"]
+    desired_monthly_income = report["desired_monthly_income"]
+    preserve_capital = report["preserve_capital"]
+    years_to_retirement = report["years_to_retirement"]
+    total_provision_value = report["total_provision_value"]
+    capital_required = report["capital_required"]
+    st.success("--- Retirement Plan Summary ---")
+    st.write(f"**Client**: {name}")
+    st.write(f"**Current Age**: {current_age}")
+    st.write(f"**Retirement Age**: {retirement_age}")
+    st.write(f"**Years to Retirement**: {years_to_retirement}")
+    st.write(f"**Desired Monthly Income at Retirement (Today's Value)**: R {desired_monthly_income:,.2f}")
+    st.write(f"**Future Annual Income Needed (Inflation Adjusted)**: R {report['future_annual_income']:,.2f}")
+    st.write(f"**Future Monthly Income Needed (Inflation Adjusted)**: R {report['future_monthly_income']:,.2f}")
+    st.write("**Provisions at Retirement**:")
+    provisions_df = pd.DataFrame(report["provisions_data"])
+    # Style the provisions table for better visibility
+    st.markdown(
+        """
+        <style>
+        .dataframe {
+            background-color: #555555;
+            color: white;
+            border: 1px solid #777777;
+        }
+        .dataframe th {
+            background-color: #666666;
+            color: white;
+            border: 1px solid #777777;
+        }
+        .dataframe td {
+            background-color: #555555;
+            color: white;
+            border: 1px solid #777777;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+    st.dataframe(provisions_df, use_container_width=True)
+    st.write(f"**Total Future Value of Provisions**: R {total_provision_value:,.2f}")
+    show_retirement_age_solver(report)
+    if preserve_capital:
+        shortfall = report["shortfall"]
+        drawdown_rate = report["drawdown_rate"]
+        st.write(f"**Capital Required at Retirement (Preserve Capital)**: R {capital_required:,.2f}")
+
+        # Display results
+        st.write(f"**Initial Withdrawal at Retirement (Annual)**: R {report['actual_withdrawal']:,.2f}")
+        st.write(f"**Initial Withdrawal at Retirement (Monthly, Future Value)**: R {report['future_monthly_actual']:,.2f}")
+        st.write(f"**Initial Withdrawal at Retirement (Monthly, Today's Value)**: R {report['current_monthly_actual']:,.2f}")
+
+        # Progress bar for drawdown rate
+        color = "#2ca02c" if drawdown_rate <= 5 else "#ff7f0e" if drawdown_rate <= 10 else "#d62728"
+        fig_progress = go.Figure(go.Bar(
+            x=[drawdown_rate],
+            y=["Drawdown Rate"],
+            orientation='h',
+            marker_color=color,
+            text=[f"{drawdown_rate:.2f}%"],
+            textposition='auto',
+        ))
+        fig_progress.add_vline(x=17.5, line_dash="dash", line_color="red", annotation_text="Max Legislative Rate (17.5%)", annotation_position="top")
+        fig_progress.add_vline(x=2.5, line_dash="dash", line_color="green", annotation_text="Min Legislative Rate (2.5%)", annotation_position="bottom")
+        fig_progress.update_layout(
+            title="Initial Drawdown Rate (%)",
+            xaxis_title="Drawdown Rate (%)",
+            yaxis_title="",
+            xaxis=dict(range=[0, 20], tickfont=dict(color="white")),
+            yaxis=dict(tickfont=dict(color="white")),
+            showlegend=False,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            height=200
+        )
+        st.plotly_chart(fig_progress)
+
+        # Display shortfall or excess
+        if report["shortfall_percentage"] > 0:
+            st.warning(f"**Income Shortfall**: {report['shortfall_percentage']:.2f}%")
+        else:
+            st.write(f"**Capital Growth Rate**: {report['capital_growth_rate']:.2f}% per year")
+
+        # Bar chart for Capital Required vs Total Provisions
+        fig_bar = go.Figure(data=[
+            go.Bar(name="Total Provisions", x=["Capital"], y=[total_provision_value], marker_color="#1f77b4"),
+            go.Bar(name="Capital Required", x=["Capital"], y=[capital_required], marker_color="#ff7f0e")
+        ])
+        fig_bar.update_layout(
+            title="Capital Required vs Total Provisions",
+            xaxis_title="",
+            yaxis_title="Amount (R)",
+            barmode="group",
+            showlegend=True,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig_bar)
+        show_safe_drawdown(report)
+    else:
+        first_withdrawal = report["first_withdrawal"]
+        st.write(f"**Capital at Retirement (Based on Provisions)**: R {total_provision_value:,.2f}")
+        st.write(f"**Years Until Capital Depletion**: {report['years_until_depletion']}")
+        st.write(f"**Initial Withdrawal at Retirement (Annual)**: R {first_withdrawal:,.2f}")
+        st.write(f"**Initial Withdrawal at Retirement (Monthly)**: R {(first_withdrawal / 12):,.2f}")
+        st.write("**Capital Depletion Over Time**")
+        chart_data = pd.DataFrame(report["chart_data"])
+        # First Graph: Capital and Annual Withdrawal
+        fig1 = go.Figure()
+        fig1.add_trace(go.Scatter(
+            x=chart_data["Age"],
+            y=chart_data["Capital (R)"],
+            mode="lines",
+            name="Capital (R)",
+            hovertemplate="Age: %{x}<br>Capital: R%{y:.2f}<extra></extra>"
+        ))
+        fig1.add_trace(go.Scatter(
+            x=chart_data["Age"],
+            y=chart_data["Annual Withdrawal (R)"],
+            mode="lines",
+            name="Annual Withdrawal (R)",
+            hovertemplate="Age: %{x}<br>Annual Withdrawal: R%{y:.2f}<extra></extra>"
+        ))
+        fig1.update_layout(
+            title="Capital and Annual Withdrawal Over Time",
+            xaxis_title="Age",
+            yaxis_title="Amount (R)",
+            hovermode="x unified",
+            showlegend=True,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig1)
+
+        # Second Graph: Monthly Income (Future Value) and Monthly Income in Today's Value
+        fig2 = go.Figure()
+        fig2.add_trace(go.Scatter(
+            x=chart_data["Age"],
+            y=chart_data["Monthly Income (R)"],
+            mode="lines",
+            name="Monthly Income (Future Value) (R)",
+            hovertemplate="Age: %{x}<br>Monthly Income (Future): R%{y:.2f}<extra></extra>"
+        ))
+        fig2.add_trace(go.Scatter(
+            x=chart_data["Age"],
+            y=chart_data["Monthly Income in Today's Value (R)"],
+            mode="lines",
+            name="Monthly Income in Today's Value (R)",
+            hovertemplate="Age: %{x}<br>Monthly Income (Today's Value): R%{y:.2f}<extra></extra>"
+        ))
+        fig2.update_layout(
+            title="Monthly Income Over Time",
+            xaxis_title="Age",
+            yaxis_title="Monthly Income (R)",
+            hovermode="x unified",
+            showlegend=True,
+            paper_bgcolor="#4A4A4A",
+            plot_bgcolor="#4A4A4A",
+            font={'color': "white"},
+            yaxis={'tickfont': {'color': "white"}},
+            xaxis={'tickfont': {'color': "white"}}
+        )
+        st.plotly_chart(fig2)
+        show_historical_backtest(report)
+
+    if preserve_capital and shortfall > 0:
+        st.warning(f"**Capital Shortfall**: R {shortfall:,.2f}")
+        st.write(f"**Additional Monthly Savings Needed**: R {report['additional_savings']:,.2f}")
+    elif preserve_capital and shortfall <= 0:
+        st.write(f"**Capital Excess**: R {-shortfall:,.2f}")
+    show_scenario_comparison(report)
+    excel_exports.download_button("Download Summary as Excel", "retirement_plan_summary.xlsx", build_retirement_workbook, report)
+
+def show():
+    show_inputs()
+    show_results()
 
 if __name__ == "__main__":
     show()
@@ -0,0 +1,171 @@
+import json
+import numpy as np
+import pandas as pd
+import projection_kernels
+import retirement_age_solver
+import retirement_calculator
+
+MAX_DEPLETION_YEARS = 100  # Capital still left after this many years is reported as lasting beyond it
+SCENARIO_COLUMNS = [
+    "Scenario", "Retirement Age", "Desired Monthly Income (R)", "Extra Monthly Contribution (R)",
+    "Inflation Rate (%)", "Assumed Return (%)", "Preserve Capital", "Preservation Years"
+]
+
+def default_scenarios(report):
+    """Return a scenario table seeded from a retirement report: the plan itself and two common variants."""
+    current = {
+        "Scenario": "Current Plan",
+        "Retirement Age": report["retirement_age"],
+        "Desired Monthly Income (R)": report["desired_monthly_income"],
+        "Extra Monthly Contribution (R)": 0.0,
+        "Inflation Rate (%)": report["inflation_rate"] * 100,
+        "Assumed Return (%)": report["assumed_return"] * 100,
+        "Preserve Capital": report["preserve_capital"],
+        "Preservation Years": report["preservation_years"]
+    }
+    later = dict(current, **{"Scenario": "Retire 5 Years Later", "Retirement Age": min(report["retirement_age"] + 5, retirement_age_solver.MAX_RETIREMENT_AGE)})
+    more = dict(current, **{"Scenario": "Contribute R2,000 More", "Extra Monthly Contribution (R)": 2000.0})
+    return pd.DataFrame([current, later, more], columns=SCENARIO_COLUMNS)
+
+def scenario_inputs(report, row):
+    """Combine one scenario table row with the report's client and provisions into plain calculation inputs.
+
+    An extra monthly contribution is added as a separate level provision earning the plan's
+    average return, so the client's own provisions are left as entered.
+    """
+    provisions = [
+        {key: provision[key] for key in ["current_value", "annual_return", "monthly_contribution", "contribution_increase"]}
+        for provision in report["provisions"]
+    ]
+    extra = float(row["Extra Monthly Contribution (R)"] or 0)
+    if extra:
+        provisions.append({
+            "current_value": 0.0,
+            "annual_return": float(report["average_return"]),
+            "monthly_contribution": extra,
+            "contribution_increase": 0.0
+        })
+    preserve_capital = bool(row["Preserve Capital"])
+    return {
+        "current_age": int(report["current_age"]),
+        "retirement_age": int(row["Retirement Age"]),
+        "desired_monthly_income": float(row["Desired Monthly Income (R)"]),
+        "desired_annual_increase": float(report["desired_annual_increase"]),
+        "inflation_rate": float(row["Inflation Rate (%)"]) / 100,
+        "assumed_return": float(row["Assumed Return (%)"]) / 100,
+        "preserve_capital": preserve_capital,
+        "preservation_years": int(row["Preservation Years"] or 0) if preserve_capital else 0,
+        "provisions": provisions
+    }
+
+def fingerprint(inputs):
+    """Return a key that changes whenever any of a scenario's calculation inputs change."""
+    return json.dumps(inputs, sort_keys=True)
+
+def _average_return(provisions, years_to_retirement):
+    """The provision-weighted average return used by calculate_retirement_report."""
+    weights = [p["current_value"] + p["monthly_contribution"] * 12 * years_to_retirement for p in provisions]
+    total_weight = sum(weights)
+    return sum(p["annual_return"] * w for p, w in zip(provisions, weights)) / total_weight if total_weight > 0 else 0
+
+def _evaluate_batch(batch):
+    """Evaluate a list of scenario inputs with one projection call and one depletion call."""
+    years = [inputs["retirement_age"] - inputs["current_age"] for inputs in batch]
+    # One row per provision per year from today to retirement, so the same call gives the growth path and the final value
+    rows = [
+        (provision, year)
+        for inputs, n in zip(batch, years)
+        for provision in inputs["provisions"]
+        for year in range(n + 1)
+    ]
+    values = projection_kernels.future_values(
+        [provision["current_value"] for provision, _ in rows],
+        [provision["annual_return"] for provision, _ in rows],
+        [year for _, year in rows],
+        [provision["monthly_contribution"] for provision, _ in rows],
+        [provision["contribution_increase"] for provision, _ in rows]
+    )
+
+    results = []
+    start = 0
+    for inputs, n in zip(batch, years):
+        count = len(inputs["provisions"]) * (n + 1)
+        provisions_by_year = values[start:start + count].reshape(len(inputs["provisions"]), n + 1).sum(axis=0) if count else np.zeros(n + 1)
+        start += count
+        future_annual_income = inputs["desired_monthly_income"] * 12 * (1 + inputs["inflation_rate"]) ** n * (1 + inputs["desired_annual_increase"]) ** n
+        total = float(provisions_by_year[-1])
+        result = {
+            "ages": np.arange(inputs["current_age"], inputs["retirement_age"] + 1),
+            "provisions_by_age": provisions_by_year,
+            "years_to_retirement": n,
+            "future_monthly_income": future_annual_income / 12,
+            "future_annual_income": future_annual_income,
+            "total_provision_value": total,
+            "capital_required": None,
+            "shortfall": None,
+            "additional_savings": None,
+            "years_until_depletion": None
+        }
+        if inputs["preserve_capital"]:
+            capital_required = float(retirement_age_solver.capital_required(
+                inputs["desired_monthly_income"], inputs["desired_annual_increase"], inputs["inflation_rate"], inputs["assumed_return"],
+                True, inputs["preservation_years"], [n]
+            )[0])
+            shortfall = capital_required - total
+            average_return = _average_return(inputs["provisions"], n)
+            result.update({
+                "capital_required": capital_required,
+                "shortfall": shortfall,
+                "additional_savings": retirement_calculator.calculate_additional_savings_needed(shortfall, n, average_return) if np.isfinite(shortfall) and average_return > 0 else None
+            })
+        results.append(result)
+
+    # Capital that runs out is drawn down under the same rules as calculate_years_until_depletion, all scenarios together
+    drawdown = [i for i, inputs in enumerate(batch) if not inputs["preserve_capital"]]
+    if drawdown:
+        returns = np.repeat([[batch[i]["assumed_return"]] for i in drawdown], MAX_DEPLETION_YEARS, axis=1)
+        depletion = projection_kernels.depletion_years(
+            [results[i]["total_provision_value"] for i in drawdown], [results[i]["future_annual_income"] for i in drawdown], returns
+        )
+        for i, years_until_depletion in zip(drawdown, depletion):
+            results[i]["years_until_depletion"] = None if years_until_depletion == projection_kernels.NOT_DEPLETED else int(years_until_depletion)
+    return results
+
+def evaluate_scenarios(scenarios, cache):
+    """Evaluate named scenario inputs, recomputing only those whose inputs are not already in cache.
+
+    cache maps fingerprints to results and is updated in place (results for inputs no longer in
+    use are dropped). Returns the results by scenario name and the names that were recomputed.
+    """
+    keys = {name: fingerprint(inputs) for name, inputs in scenarios.items()}
+    pending = {key: scenarios[name] for name, key in keys.items() if key not in cache}
+    if pending:
+        cache.update(zip(pending, _evaluate_batch(list(pending.values()))))
+    for key in set(cache) - set(keys.values()):
+        del cache[key]
+    recomputed = [name for name, key in keys.items() if key in pending]
+    return {name: cache[key] for name, key in keys.items()}, recomputed
+
+def comparison_table(scenarios, results):
+    """Return one row per scenario with the figures advisers compare."""
+    rows = []
+    for name, inputs in scenarios.items():
+        result = results[name]
+        years_until_depletion = result["years_until_depletion"]
+        row = {
+            "Scenario": name,
+            "Retirement Age": inputs["retirement_age"],
+            "Years to Retirement": result["years_to_retirement"],
+            "Future Monthly Income Needed (R)": result["future_monthly_income"],
+            "Total Provisions at Retirement (R)": result["total_provision_value"],
+            "Capital Required (R)": result["capital_required"],
+            "Capital Shortfall (R)": max(result["shortfall"], 0) if result["shortfall"] is not None else None,
+            "Additional Monthly Savings Needed (R)": result["additional_savings"],
+            "Years Until Capital Depletion": None,
+            "Depletion Age": None
+        }
+        if not inputs["preserve_capital"]:
+            row["Years Until Capital Depletion"] = f"{years_until_depletion}" if years_until_depletion is not None else f"{MAX_DEPLETION_YEARS}+"
+            row["Depletion Age"] = f"{inputs['retirement_age'] + years_until_depletion}" if years_until_depletion is not None else f"{inputs['retirement_age'] + MAX_DEPLETION_YEARS}+"
+        rows.append(row)
+    return pd.DataFrame(rows)
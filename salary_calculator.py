@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
+import tax_years
+import tax_curves
+import excel_exports
+import memory_profile
+import validation
 
 # Tax Rates and Rebates (2024/2025)
 TAX_BRACKETS = [
@@ -74,7 +80,62 @@ def calculate_salary_tax(gross_salary, pension_contribution, age, medical_contri
     net_income_monthly = net_income / 12
     return taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate
 
-def show():
+RESULTS_KEY = "salary_calculator_results"
+CLIENT_LIST_COLUMNS = ["Name", "Gross Salary", "Pension Contribution", "Age", "Medical Contributions", "Dependants"]
+# Checks the form inputs and uploaded client lists alike, keyed by client list column
+CLIENT_SCHEMA = validation.schema({
+    "Name": validation.field("Client's Name", text=True, message="Please enter a name."),
+    "Gross Salary": validation.field("Gross Annual Salary (R)", minimum=0),
+    "Pension Contribution": validation.field("Annual Pension/RA Contribution (R)", minimum=0),
+    "Age": validation.field("Age", minimum=0, maximum=120),
+    "Medical Contributions": validation.field("Annual Medical Scheme Contributions (R)", minimum=0),
+    "Dependants": validation.field("Number of Dependants", minimum=0, multiple_of=1)
+})
+PAYE_BAND_STEP = 10000  # Annual salary bands in the PAYE table
+PAYE_BAND_MAX = 2000000
+
+@st.cache_data(show_spinner=False)
+def paye_band_table():
+    """Return monthly PAYE, UIF and net income for every round salary band in every tax year, for a client under 65 without deductions."""
+    stacked = tax_years.stack_tax_tables(tax_years.TAX_YEARS)
+    salaries = np.arange(PAYE_BAND_STEP, PAYE_BAND_MAX + 1, PAYE_BAND_STEP, dtype=float)
+    tax = tax_years.evaluate_salary_tax(stacked, salaries, 0, 0, 0, 0)
+    # Year-major order, so each tax year's bands are consecutive rows
+    return pd.DataFrame({
+        "Tax Year": np.repeat(stacked["years"], len(salaries)),
+        "Gross Annual Salary (R)": np.tile(salaries, len(stacked["years"])),
+        "Gross Monthly Salary (R)": np.tile(salaries / 12, len(stacked["years"])),
+        "PAYE (Monthly) (R)": tax["paye"].T.ravel() / 12,
+        "UIF (Monthly) (R)": tax["uif"].T.ravel() / 12,
+        "Net Monthly Income (R)": tax["net_income"].T.ravel() / 12,
+        "Effective Tax Rate (%)": tax["effective_rate"].T.ravel() * 100,
+        "Marginal Tax Rate (%)": tax["marginal_rate"].T.ravel() * 100
+    })
+
+def build_salary_workbook(summary_data, chart_data):
+    """Write the salary tax summary and chart data to Excel and return the workbook bytes."""
+    summary_df = pd.DataFrame(summary_data)
+    chart_df = pd.DataFrame(chart_data).reset_index()
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        summary_df.to_excel(writer, index=False, sheet_name="Salary Tax Summary")
+        chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
+        instructions = pd.DataFrame({
+            "Instructions": [
+                "This Excel file contains your Salary Tax Summary and Chart Data.",
+                "To recreate the bar chart in Excel:",
+                "1. Go to the 'Chart Data' sheet.",
+                "2. Select the 'Category' and 'Amount (R)' columns.",
+                "3. Click Insert > Bar Chart in Excel to visualize the tax breakdown.",
+                "Note: The progress bar (Tax Savings %) cannot be exported as it is a dynamic widget."
+            ]
+        })
+        instructions.to_excel(writer, index=False, sheet_name="Instructions")
+    return buffer.getvalue()
+
+@st.fragment
+def show_inputs():
+    """Render the salary inputs and store the calculated results in session state on submit."""
     st.write("Enter client details to calculate their salary tax, UIF, medical tax credits, and net income.")
     name = st.text_input("Client's Name", key="tax_calc_name")
     gross_salary = st.number_input("Gross Annual Salary (R)", min_value=0.0, step=1000.0)
@@ -82,88 +143,173 @@ def show():
     medical_contributions = st.number_input("Annual Medical Scheme Contributions (R)", min_value=0.0, step=1000.0)
     num_dependants = st.number_input("Number of Dependants on Medical Scheme (including you)", min_value=0, max_value=10, step=1)
     age = st.number_input("Client's Age", min_value=0, max_value=120, step=1)
+    live = tax_curves.salary_tax(gross_salary, pension_contribution, age, num_dependants)
+    st.markdown(
+        f"<p style='font-size: 14px; color: #888888;'>Live estimate: PAYE R {float(live['paye']) / 12:,.2f} a month, "
+        f"net income R {float(live['net_income']) / 12:,.2f} a month, marginal rate {float(live['marginal_rate']) * 100:.1f}%.</p>",
+        unsafe_allow_html=True
+    )
 
     if st.button("Calculate Tax"):
-        if not name.strip():
-            st.error("Please enter a name.")
-        elif gross_salary < 0 or pension_contribution < 0 or medical_contributions < 0 or num_dependants < 0 or age < 0:
-            st.error("All inputs must be non-negative.")
+        errors = validation.validate_inputs(dict(zip(CLIENT_LIST_COLUMNS, [name, gross_salary, pension_contribution, age, medical_contributions, num_dependants])), CLIENT_SCHEMA)
+        if errors:
+            for error in errors:
+                st.error(error)
         else:
             try:
-                taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate = calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants)
-                st.success("--- Salary Tax Summary ---")
-                st.write(f"**Client**: {name}")
-                st.write(f"**Gross Annual Salary**: R {gross_salary:,.2f}")
-                st.write(f"**Taxable Income**: R {taxable_income:,.2f}")
-                st.write(f"**PAYE (Before Medical Tax Credits, Annual)**: R {paye_before_mtc:,.2f}")
-                st.write(f"**PAYE (Before Medical Tax Credits, Monthly)**: R {paye_before_mtc_monthly:,.2f}")
-                summary_data = {
-                    "Client": [name],
-                    "Gross Annual Salary (R)": [gross_salary],
-                    "Taxable Income (R)": [taxable_income],
-                    "PAYE Before Medical Tax Credits (Annual) (R)": [paye_before_mtc],
-                    "PAYE Before Medical Tax Credits (Monthly) (R)": [paye_before_mtc_monthly]
-                }
-                if num_dependants > 0:
-                    st.write(f"**Medical Tax Credits (Annual)**: R {mtc_annual:,.2f}")
-                    st.write(f"**Medical Tax Credits (Monthly)**: R {mtc_monthly:,.2f}")
-                    tax_savings_percentage = min((mtc_annual / paye_before_mtc) * 100 if paye_before_mtc > 0 else 0, 100)
-                    st.write(f"**Tax Savings from Medical Credits**: {tax_savings_percentage:.1f}% of your PAYE")
-                    st.progress(tax_savings_percentage / 100)
-                    st.markdown(
-                        "<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>Dependent Credits: R364/month for you and your first dependant, R246/month for each additional dependant (e.g., spouse, children, or other family members on your medical scheme).</p>",
-                        unsafe_allow_html=True
-                    )
-                    summary_data["Medical Tax Credits (Annual) (R)"] = [mtc_annual]
-                    summary_data["Medical Tax Credits (Monthly) (R)"] = [mtc_monthly]
-                    summary_data["Tax Savings from Medical Credits (%)"] = [tax_savings_percentage]
-                st.write(f"**PAYE (After Medical Tax Credits, Annual)**: R {paye:,.2f}")
-                st.write(f"**PAYE (After Medical Tax Credits, Monthly)**: R {paye_monthly:,.2f}")
-                st.write(f"**UIF Contribution (Employee, Annual)**: R {uif:,.2f}")
-                st.write(f"**UIF Contribution (Employee, Monthly)**: R {uif_monthly:,.2f}")
-                st.write(f"**Net Annual Income**: R {net_income:,.2f}")
-                st.write(f"**Net Monthly Income**: R {net_income_monthly:,.2f}")
-                st.write(f"**Marginal Tax Rate**: {marginal_rate * 100:.1f}%")
-                summary_data["PAYE After Medical Tax Credits (Annual) (R)"] = [paye]
-                summary_data["PAYE After Medical Tax Credits (Monthly) (R)"] = [paye_monthly]
-                summary_data["UIF Contribution (Employee, Annual) (R)"] = [uif]
-                summary_data["UIF Contribution (Employee, Monthly) (R)"] = [uif_monthly]
-                summary_data["Net Annual Income (R)"] = [net_income]
-                summary_data["Net Monthly Income (R)"] = [net_income_monthly]
-                summary_data["Marginal Tax Rate (%)"] = [marginal_rate * 100]
-                st.write("**Tax Breakdown Visualization**")
-                chart_data = pd.DataFrame({
-                    "Category": ["Gross Income", "PAYE", "UIF", "Medical Tax Credits", "Net Income"],
-                    "Amount (R)": [gross_salary, -paye, -uif, -mtc_annual if num_dependants > 0 else 0, net_income]
-                })
-                st.bar_chart(chart_data.set_index("Category"))
-                st.markdown(
-                    "<p style='font-size: 14px; color: #888888;'>Note: Tax rates, UIF limits, and medical tax credits are based on 2024/2025 SARS tables. Verify with 2025/2026 rates when available.</p>",
-                    unsafe_allow_html=True
-                )
-                summary_df = pd.DataFrame(summary_data)
-                chart_df = pd.DataFrame(chart_data).reset_index()
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    summary_df.to_excel(writer, index=False, sheet_name="Salary Tax Summary")
-                    chart_df.to_excel(writer, index=False, sheet_name="Chart Data", startrow=0)
-                    instructions = pd.DataFrame({
-                        "Instructions": [
-                            "This Excel file contains your Salary Tax Summary and Chart Data.",
-                            "To recreate the bar chart in Excel:",
-                            "1. Go to the 'Chart Data' sheet.",
-                            "2. Select the 'Category' and 'Amount (R)' columns.",
-                            "3. Click Insert > Bar Chart in Excel to visualize the tax breakdown.",
-                            "Note: The progress bar (Tax Savings %) cannot be exported as it is a dynamic widget."
-                        ]
+                with memory_profile.track(__name__, "calculation"):
+                    taxable_income, paye_before_mtc, paye_before_mtc_monthly, mtc_annual, mtc_monthly, paye, paye_monthly, uif, uif_monthly, net_income, net_income_monthly, marginal_rate = calculate_salary_tax(gross_salary, pension_contribution, age, medical_contributions, num_dependants)
+                    summary_data = {
+                        "Client": [name],
+                        "Gross Annual Salary (R)": [gross_salary],
+                        "Taxable Income (R)": [taxable_income],
+                        "PAYE Before Medical Tax Credits (Annual) (R)": [paye_before_mtc],
+                        "PAYE Before Medical Tax Credits (Monthly) (R)": [paye_before_mtc_monthly]
+                    }
+                    tax_savings_percentage = 0
+                    if num_dependants > 0:
+                        tax_savings_percentage = min((mtc_annual / paye_before_mtc) * 100 if paye_before_mtc > 0 else 0, 100)
+                        summary_data["Medical Tax Credits (Annual) (R)"] = [mtc_annual]
+                        summary_data["Medical Tax Credits (Monthly) (R)"] = [mtc_monthly]
+                        summary_data["Tax Savings from Medical Credits (%)"] = [tax_savings_percentage]
+                    summary_data["PAYE After Medical Tax Credits (Annual) (R)"] = [paye]
+                    summary_data["PAYE After Medical Tax Credits (Monthly) (R)"] = [paye_monthly]
+                    summary_data["UIF Contribution (Employee, Annual) (R)"] = [uif]
+                    summary_data["UIF Contribution (Employee, Monthly) (R)"] = [uif_monthly]
+                    summary_data["Net Annual Income (R)"] = [net_income]
+                    summary_data["Net Monthly Income (R)"] = [net_income_monthly]
+                    summary_data["Marginal Tax Rate (%)"] = [marginal_rate * 100]
+                    chart_data = pd.DataFrame({
+                        "Category": ["Gross Income", "PAYE", "UIF", "Medical Tax Credits", "Net Income"],
+                        "Amount (R)": [gross_salary, -paye, -uif, -mtc_annual if num_dependants > 0 else 0, net_income]
                     })
-                    instructions.to_excel(writer, index=False, sheet_name="Instructions")
-                buffer.seek(0)
-                st.download_button(
-                    label="Download Summary as Excel",
-                    data=buffer,
-                    file_name="salary_tax_summary.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                    st.session_state[RESULTS_KEY] = {
+                        "name": name,
+                        "gross_salary": gross_salary,
+                        "pension_contribution": pension_contribution,
+                        "medical_contributions": medical_contributions,
+                        "age": age,
+                        "num_dependants": num_dependants,
+                        "taxable_income": taxable_income,
+                        "paye_before_mtc": paye_before_mtc,
+                        "paye_before_mtc_monthly": paye_before_mtc_monthly,
+                        "mtc_annual": mtc_annual,
+                        "mtc_monthly": mtc_monthly,
+                        "tax_savings_percentage": tax_savings_percentage,
+                        "paye": paye,
+                        "paye_monthly": paye_monthly,
+                        "uif": uif,
+                        "uif_monthly": uif_monthly,
+                        "net_income": net_income,
+                        "net_income_monthly": net_income_monthly,
+                        "marginal_rate": marginal_rate,
+                        "chart_data": chart_data,
+                        "workbook_args": (summary_data, chart_data)
+                    }
             except Exception as e:
-                st.error(f"Error: {e}")
\ No newline at end of file
+                st.error(f"Error: {e}")
+            else:
+                st.rerun()
+
+def effective_rate_chart(comparison, names):
+    """Effective tax rate by tax year with one column per client, as compare_tax_years returns them.
+
+    Clients that share a name are told apart by their position in the list, e.g. 'Thabo (3)'.
+    """
+    names = pd.Series(names, dtype=str).reset_index(drop=True)
+    shared = names.duplicated(keep=False)
+    labels = names.where(~shared, names + " (" + (names.index + 1).astype(str) + ")")
+    chart = comparison.assign(Client=np.repeat(labels.to_numpy(), len(comparison) // len(names)))
+    return chart.pivot(index="Tax Year", columns="Client", values="Effective Tax Rate (%)")[labels.unique()]
+
+def show_tax_year_comparison(results):
+    """Render effective tax rates for the client (or an uploaded client list) across tax years."""
+    with st.expander("Compare Tax Years"):
+        st.write("See how the same salary is taxed in earlier tax years and in projected years where brackets are indexed for inflation.")
+        years_ahead = st.slider("Projected Years", min_value=0, max_value=10, value=5, key="tax_years_ahead")
+        indexation = st.number_input("Bracket Indexation (% per year)", min_value=0.0, max_value=20.0, value=4.5, step=0.5, key="tax_years_indexation") / 100
+        income_growth = st.number_input("Salary Growth (% per year)", min_value=0.0, max_value=20.0, value=6.0, step=0.5, key="tax_years_growth") / 100
+        uploaded_file = st.file_uploader(
+            "Compare a Client List (optional CSV)",
+            type="csv",
+            key="tax_years_clients",
+            help=f"Columns: {', '.join(CLIENT_LIST_COLUMNS)}. Amounts are annual, for the 2024/2025 tax year."
+        )
+        if uploaded_file is None:
+            clients = pd.DataFrame([[
+                results["name"], results["gross_salary"], results["pension_contribution"],
+                results["age"], results["medical_contributions"], results["num_dependants"]
+            ]], columns=CLIENT_LIST_COLUMNS)
+        else:
+            try:
+                clients, errors = validation.validate(pd.read_csv(uploaded_file), CLIENT_SCHEMA)
+            except ValueError as e:
+                st.error(f"Error: {e}")
+                return
+            if len(errors):
+                st.warning(f"{errors['Row'].nunique()} client rows with errors were left out of the comparison.")
+                st.dataframe(errors, hide_index=True)
+            if clients.empty:
+                return
+        comparison = tax_years.compare_tax_years(clients, tax_years.project_tax_years(years_ahead, indexation), income_growth)
+        st.write("**Effective Tax Rate by Tax Year**")
+        st.line_chart(effective_rate_chart(comparison, clients["Name"]))
+        st.dataframe(comparison, hide_index=True)
+        st.markdown(
+            "<p style='font-size: 14px; color: #888888;'>Salaries grow by the chosen rate from 2024/2025 (and are discounted by it for earlier years). When salaries grow faster than the brackets are indexed, the effective tax rate rises: bracket creep.</p>",
+            unsafe_allow_html=True
+        )
+
+def show_paye_bands():
+    """Show the precomputed PAYE table for round salary bands."""
+    with st.expander("PAYE by Salary Band"):
+        table = paye_band_table()
+        years = list(tax_years.TAX_YEARS)
+        tax_year = st.selectbox("Tax Year", years, index=years.index(tax_years.BASE_TAX_YEAR), key="paye_bands_tax_year")
+        st.dataframe(table[table["Tax Year"] == tax_year].drop(columns="Tax Year"), use_container_width=True, hide_index=True)
+        st.markdown(
+            "<p style='font-size: 14px; color: #888888;'>For a client under 65 with no pension contributions or medical scheme dependants.</p>",
+            unsafe_allow_html=True
+        )
+
+@st.fragment
+def show_results():
+    """Render the most recently calculated salary tax from session state without recalculating it."""
+    results = st.session_state.get(RESULTS_KEY)
+    if results is None:
+        return
+    st.success("--- Salary Tax Summary ---")
+    st.write(f"**Client**: {results['name']}")
+    st.write(f"**Gross Annual Salary**: R {results['gross_salary']:,.2f}")
+    st.write(f"**Taxable Income**: R {results['taxable_income']:,.2f}")
+    st.write(f"**PAYE (Before Medical Tax Credits, Annual)**: R {results['paye_before_mtc']:,.2f}")
+    st.write(f"**PAYE (Before Medical Tax Credits, Monthly)**: R {results['paye_before_mtc_monthly']:,.2f}")
+    if results["num_dependants"] > 0:
+        st.write(f"**Medical Tax Credits (Annual)**: R {results['mtc_annual']:,.2f}")
+        st.write(f"**Medical Tax Credits (Monthly)**: R {results['mtc_monthly']:,.2f}")
+        st.write(f"**Tax Savings from Medical Credits**: {results['tax_savings_percentage']:.1f}% of your PAYE")
+        st.progress(results["tax_savings_percentage"] / 100)
+        st.markdown(
+            "<p style='font-size: 14px; font-style: italic; color: #CCCCCC;'>Dependent Credits: R364/month for you and your first dependant, R246/month for each additional dependant (e.g., spouse, children, or other family members on your medical scheme).</p>",
+            unsafe_allow_html=True
+        )
+    st.write(f"**PAYE (After Medical Tax Credits, Annual)**: R {results['paye']:,.2f}")
+    st.write(f"**PAYE (After Medical Tax Credits, Monthly)**: R {results['paye_monthly']:,.2f}")
+    st.write(f"**UIF Contribution (Employee, Annual)**: R {results['uif']:,.2f}")
+    st.write(f"**UIF Contribution (Employee, Monthly)**: R {results['uif_monthly']:,.2f}")
+    st.write(f"**Net Annual Income**: R {results['net_income']:,.2f}")
+    st.write(f"**Net Monthly Income**: R {results['net_income_monthly']:,.2f}")
+    st.write(f"**Marginal Tax Rate**: {results['marginal_rate'] * 100:.1f}%")
+    st.write("**Tax Breakdown Visualization**")
+    st.bar_chart(results["chart_data"].set_index("Category"))
+    st.markdown(
+        "<p style='font-size: 14px; color: #888888;'>Note: Tax rates, UIF limits, and medical tax credits are based on 2024/2025 SARS tables. Verify with 2025/2026 rates when available.</p>",
+        unsafe_allow_html=True
+    )
+    excel_exports.download_button("Download Summary as Excel", "salary_tax_summary.xlsx", build_salary_workbook, *results["workbook_args"])
+    show_tax_year_comparison(results)
+    show_paye_bands()
+
+def show():
+    show_inputs()
+    show_results()
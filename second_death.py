@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import estate_liquidity
+
+DEFAULT_GAPS = np.arange(0, 31)  # Years between the two deaths screened by default
+# One row per married couple, amounts in rand. Capital gains are the unrealised gains in the non-liquid assets.
+COUPLE_COLUMNS = [
+    "Couple",
+    "First Gross Estate (R)", "First Liquid Assets (R)", "First Capital Gains (R)", "First Liabilities (R)",
+    "Spouse Share (%)", "PBO Bequests (R)",
+    "Survivor Gross Estate (R)", "Survivor Liquid Assets (R)", "Survivor Capital Gains (R)", "Survivor Liabilities (R)"
+]
+
+def estate_duty(dutiable_value, abatement):
+    """The duty calculate_estate_duty charges without a surviving spouse, for arrays of dutiable values (before abatement) and abatements."""
+    dutiable_value = np.maximum(0, dutiable_value - abatement)
+    threshold = estate_liquidity.ESTATE_DUTY_THRESHOLD
+    return np.where(
+        dutiable_value <= threshold,
+        dutiable_value * estate_liquidity.ESTATE_DUTY_RATE_1,
+        threshold * estate_liquidity.ESTATE_DUTY_RATE_1 + (dutiable_value - threshold) * estate_liquidity.ESTATE_DUTY_RATE_2
+    )
+
+def capital_gains_tax(gain, marginal_tax_rate):
+    """calculate_cgt for arrays of total gains."""
+    return np.maximum(0, gain - estate_liquidity.CGT_EXCLUSION_DEATH) * estate_liquidity.CGT_INCLUSION_RATE * marginal_tax_rate
+
+def _column(couples, name):
+    return couples[name].to_numpy(dtype=float)
+
+def simulate_second_death(couples, gaps=DEFAULT_GAPS, growth=0.06, marginal_tax_rate=0.45, executor_fee_rate=None):
+    """Model the first death and the survivor's death for every couple and every gap between them in one pass.
+
+    At the first death the spouse's share of the residue (after CGT and executor fees) is deducted
+    from the dutiable estate and the spouse takes over the base cost of the assets inherited, so
+    those gains are rolled over rather than taxed. CGT and executor fees are deducted from the
+    dutiable estate at both deaths, and whatever abatement the first estate did not use is ported to
+    the survivor, so leaving everything to the spouse ports the whole abatement. The survivor's
+    estate, with the inheritance, grows at growth a year until the second death, when duty, CGT,
+    executor fees and liquidity are calculated with no spouse.
+
+    First-death costs are paid from the first estate's liquid assets, and the inheritance takes what
+    liquidity is left in proportion to the spouse's share. Liabilities are held at their current
+    amounts. executor_fee_rate defaults to estate_liquidity's standard rate. Returns a dict of
+    (couples,) arrays for the first death and (couples x gaps) arrays for the second.
+    """
+    if executor_fee_rate is None:
+        executor_fee_rate = estate_liquidity.EXECUTOR_FEE_RATE_DEFAULT
+    gaps = np.asarray(gaps, dtype=float)
+    abatement = estate_liquidity.ESTATE_DUTY_ABATEMENT
+    gross = _column(couples, "First Gross Estate (R)")
+    liquid = _column(couples, "First Liquid Assets (R)")
+    gains = _column(couples, "First Capital Gains (R)")
+    share = np.clip(_column(couples, "Spouse Share (%)") / 100, 0, 1)
+    pbo = _column(couples, "PBO Bequests (R)")
+
+    # First death: only the gains on what does not pass to the spouse are taxed
+    net = gross - _column(couples, "First Liabilities (R)")
+    first_cgt = capital_gains_tax(gains * (1 - share), marginal_tax_rate)
+    first_fees = gross * executor_fee_rate
+    spouse_bequest = share * np.maximum(0, net - pbo - first_cgt - first_fees)
+    dutiable = np.maximum(0, net - first_cgt - first_fees - spouse_bequest - pbo)
+    first_duty = estate_duty(dutiable, abatement)
+    ported_abatement = abatement - np.minimum(abatement, dutiable)
+    first_costs = first_cgt + first_duty + first_fees
+    inherited_liquid = np.minimum(spouse_bequest, share * np.maximum(0, liquid - first_costs))
+    inherited_other = spouse_bequest - inherited_liquid
+    inherited_gains = np.minimum(gains * share, inherited_other)
+
+    # Second death, for every gap: liquid and non-liquid assets grow; gains grow with the non-liquid assets
+    survivor_liquid = _column(couples, "Survivor Liquid Assets (R)") + inherited_liquid
+    survivor_other = _column(couples, "Survivor Gross Estate (R)") - _column(couples, "Survivor Liquid Assets (R)") + inherited_other
+    survivor_gains = _column(couples, "Survivor Capital Gains (R)") + inherited_gains
+    factor = (1 + np.asarray(growth, dtype=float).reshape(-1, 1)) ** gaps
+    second_liquid = survivor_liquid[:, None] * factor
+    second_other = survivor_other[:, None] * factor
+    second_gross = second_liquid + second_other
+    second_net = second_gross - _column(couples, "Survivor Liabilities (R)")[:, None]
+    second_cgt = capital_gains_tax(survivor_gains[:, None] + survivor_other[:, None] * (factor - 1), np.asarray(marginal_tax_rate).reshape(-1, 1))
+    second_fees = second_gross * np.asarray(executor_fee_rate).reshape(-1, 1)
+    second_duty = estate_duty(np.maximum(0, second_net - second_cgt - second_fees), (abatement + ported_abatement)[:, None])
+    second_costs = second_cgt + second_duty + second_fees
+    return {
+        "gaps": gaps,
+        "first_cgt": first_cgt,
+        "first_duty": first_duty,
+        "first_fees": first_fees,
+        "first_costs": first_costs,
+        "first_shortfall": np.maximum(0, first_costs - liquid),
+        "spouse_bequest": spouse_bequest,
+        "ported_abatement": ported_abatement,
+        "second_gross": second_gross,
+        "second_net": second_net,
+        "second_cgt": second_cgt,
+        "second_duty": second_duty,
+        "second_fees": second_fees,
+        "second_costs": second_costs,
+        "second_liquid": second_liquid,
+        "second_shortfall": np.maximum(0, second_costs - second_liquid)
+    }
+
+def second_death_table(result, couple=0):
+    """Return one couple's second-death figures, one row per gap between the deaths."""
+    return pd.DataFrame({
+        "Years Between Deaths": result["gaps"].astype(int),
+        "Gross Estate (R)": result["second_gross"][couple],
+        "Capital Gains Tax (R)": result["second_cgt"][couple],
+        "Estate Duty (R)": result["second_duty"][couple],
+        "Executor Fees (R)": result["second_fees"][couple],
+        "Total Costs (R)": result["second_costs"][couple],
+        "Liquid Assets Available (R)": result["second_liquid"][couple],
+        "Liquidity Shortfall (R)": result["second_shortfall"][couple]
+    })
+
+def screen_couples(couples, result):
+    """Summarise each couple's liquidity at both deaths, with the worst second-death shortfall across the gaps."""
+    worst = result["second_shortfall"].argmax(axis=1)
+    rows = np.arange(len(couples))
+    return pd.DataFrame({
+        "Couple": couples["Couple"].to_numpy(),
+        "First Death Costs (R)": result["first_costs"],
+        "First Death Shortfall (R)": result["first_shortfall"],
+        "Ported Abatement (R)": result["ported_abatement"],
+        "Worst Second Death Shortfall (R)": result["second_shortfall"][rows, worst],
+        "Years Between Deaths at Worst": result["gaps"][worst].astype(int),
+        "Gaps With a Shortfall (%)": (result["second_shortfall"] > 0).mean(axis=1) * 100
+    })
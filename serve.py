@@ -0,0 +1,26 @@
+import os
+import sys
+import argparse
+from streamlit.web import cli
+import warmup
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+def main(args):
+    """Warm up and freeze the long-lived heap, then serve app.py with `streamlit run` in this process.
+
+    The server does not exist yet, so the freeze can only catch the warmed modules, tables and
+    kernels, never a session's objects. app.py then finds the warm-up already finished.
+    """
+    warmup.start(warmup.TOOL_MODULES).join()
+    warmup.freeze_heap()
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *args]
+    return cli.main()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the app like `streamlit run app.py`, with the warm-up done and its heap frozen before any session connects. "
+        "Any other options, e.g. --server.port 8501, are passed on to streamlit run."
+    )
+    _, streamlit_args = parser.parse_known_args()
+    sys.exit(main(streamlit_args))
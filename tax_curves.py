@@ -0,0 +1,153 @@
+import json
+import time
+import argparse
+from functools import lru_cache
+import numpy as np
+import tax_years
+
+def rebate_tier(age):
+    """The rebate tier for each age: 0 under 65, 1 from 65 and 2 from 75, getting the first tier + 1 rebates in REBATE_TYPES."""
+    age = np.asarray(age)
+    return (age >= 65).astype(np.int64) + (age >= 75)
+
+@lru_cache(maxsize=None)
+def tax_curves(tax_year=tax_years.BASE_TAX_YEAR):
+    """Precompute a tax year's piecewise tax curves, built once per process and shared by every session.
+
+    Tax before rebates is piecewise linear in taxable income. Segment j covers incomes in
+    (edges[j - 1], edges[j]] and is base + (income - origin) * rate, the bracket's own terms, so a
+    lookup repeats the direct calculation's arithmetic exactly. Segment 0 is no taxable income; the
+    R1 gap after each bracket's upper bound is its own segment, taxed at zero at the bracket's
+    marginal rate, as calculate_salary_tax does. Rebates for each age tier, medical credits and
+    UIF are applied after the lookup, again as the direct calculation applies them.
+
+    RA rebates use a step curve of the rate ra_calculator.get_tax_rate returns: a bracket's rate
+    from its lower to its upper bound inclusive, and the top rate in the gaps.
+    """
+    table = tax_years.TAX_YEARS[tax_year]
+    brackets = np.array(table["brackets"], dtype=float)
+    lowers, uppers, rates, bases = brackets.T
+    count = len(brackets)
+    # Interleave each bracket with the gap after it, ending with the open-ended top bracket
+    edges = np.zeros(2 * count - 1)
+    edges[1::2] = uppers[:-1]
+    edges[2::2] = lowers[1:]
+    zeros = np.zeros(count - 1)
+    return {
+        "tax_year": tax_year,
+        "edges": edges,
+        "bases": np.concatenate([[0.0], np.column_stack([bases[:-1], zeros]).ravel(), bases[-1:]]),
+        "origins": np.concatenate([[0.0], np.column_stack([lowers[:-1], zeros]).ravel(), lowers[-1:]]),
+        "rates": np.concatenate([[0.0], np.column_stack([rates[:-1], zeros]).ravel(), rates[-1:]]),
+        "marginal_rates": np.concatenate([[0.0], np.repeat(rates[:-1], 2), rates[-1:]]),
+        "rebates": np.cumsum([table["rebates"][name] for name in tax_years.REBATE_TYPES]).astype(float),
+        "ra_lowers": lowers,
+        "ra_uppers": uppers,
+        "ra_rates": rates,
+        "mtc_per_person": table["mtc_per_person"],
+        "mtc_additional_dependant": table["mtc_additional_dependant"],
+        "uif_annual_cap": table["uif_monthly_cap"] * 12
+    }
+
+def nbytes(curves):
+    """Bytes held by a tax year's curve arrays."""
+    return sum(value.nbytes for value in curves.values() if isinstance(value, np.ndarray))
+
+def salary_tax(gross_salary, pension_contribution, age, num_dependants, tax_year=tax_years.BASE_TAX_YEAR):
+    """calculate_salary_tax by piecewise lookup, for scalars or arrays of clients.
+
+    Returns a dict of arrays named like calculate_salary_tax's results, equal to it to the cent.
+    """
+    curves = tax_curves(tax_year)
+    gross_salary = np.asarray(gross_salary, dtype=float)
+    num_dependants = np.asarray(num_dependants)
+    max_deductible = np.minimum(gross_salary * tax_years.RA_DEDUCTION_RATE, tax_years.RA_DEDUCTION_CAP)
+    taxable_income = np.maximum(0, gross_salary - np.minimum(pension_contribution, max_deductible))
+    segment = np.searchsorted(curves["edges"], taxable_income, side="left")
+    tax_before_rebates = curves["bases"][segment] + (taxable_income - curves["origins"][segment]) * curves["rates"][segment]
+    paye_before_mtc = np.maximum(0, tax_before_rebates - curves["rebates"][rebate_tier(age)])
+    per_person = curves["mtc_per_person"] * 12
+    mtc_annual = np.where(
+        num_dependants <= 0, 0,
+        np.where(num_dependants <= 2, num_dependants * per_person, 2 * per_person + (num_dependants - 2) * curves["mtc_additional_dependant"] * 12)
+    )
+    paye = np.maximum(0, paye_before_mtc - mtc_annual)
+    uif = np.minimum(gross_salary, curves["uif_annual_cap"]) * tax_years.UIF_RATE
+    return {
+        "taxable_income": taxable_income,
+        "paye_before_mtc": paye_before_mtc,
+        "mtc_annual": mtc_annual,
+        "paye": paye,
+        "uif": uif,
+        "net_income": gross_salary - paye - uif,
+        "marginal_rate": curves["marginal_rates"][segment]
+    }
+
+def ra_rebate(income, contribution, tax_year=tax_years.BASE_TAX_YEAR):
+    """calculate_ra_rebate by piecewise lookup, for scalars or arrays, as a dict of deductible, tax_rate, rebate and excess."""
+    curves = tax_curves(tax_year)
+    income = np.asarray(income, dtype=float)
+    max_deductible = np.minimum(income * tax_years.RA_DEDUCTION_RATE, tax_years.RA_DEDUCTION_CAP)
+    deductible = np.minimum(contribution, max_deductible)
+    bracket = np.searchsorted(curves["ra_lowers"], income, side="right") - 1
+    in_bracket = (bracket >= 0) & (income <= curves["ra_uppers"][np.maximum(bracket, 0)])
+    tax_rate = np.where(in_bracket, curves["ra_rates"][np.maximum(bracket, 0)], curves["ra_rates"][-1])
+    return {
+        "deductible": deductible,
+        "tax_rate": tax_rate,
+        "rebate": deductible * tax_rate,
+        "excess": np.maximum(0, contribution - max_deductible)
+    }
+
+def benchmark(count, seed=0):
+    """Time the lookups against the direct calculators and count results that differ by a cent or more."""
+    import ra_calculator
+    import salary_calculator
+    rng = np.random.default_rng(seed)
+    gross = np.round(rng.lognormal(np.log(350000), 0.9, count), 2)
+    # Incomes on and around every bracket bound, including the R1 gaps
+    bounds = np.array([bound for bracket in salary_calculator.TAX_BRACKETS for bound in bracket[:2] if np.isfinite(bound)], dtype=float)
+    gross[:len(bounds) * 5] = (bounds[:, None] + np.array([-0.5, 0, 0.25, 0.5, 1])).ravel()
+    pension = np.where(rng.random(count) < 0.5, 0, np.round(gross * rng.uniform(0, 0.35, count), 2))
+    age = rng.integers(18, 90, count)
+    dependants = rng.integers(0, 6, count)
+
+    start = time.perf_counter()
+    tax_curves.cache_clear()
+    curves = tax_curves()
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    lookup = salary_tax(gross, pension, age, dependants)
+    rebates = ra_rebate(gross, pension)
+    lookup_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    direct = np.array([
+        salary_calculator.calculate_salary_tax(gross[i], pension[i], age[i], 0, dependants[i])
+        for i in range(count)
+    ])
+    direct_rebates = np.array([ra_calculator.calculate_ra_rebate(gross[i], pension[i]) for i in range(count)])
+    direct_seconds = time.perf_counter() - start
+    columns = {"paye": 5, "net_income": 9, "marginal_rate": 11}
+    return {
+        "clients": count,
+        "tax_years": len(tax_years.TAX_YEARS),
+        "bytes_per_tax_year": nbytes(curves),
+        "build_seconds": build_seconds,
+        "lookup_seconds": lookup_seconds,
+        "direct_seconds": direct_seconds,
+        "cent_differences": {
+            **{name: int((np.abs(lookup[name] - direct[:, column]) >= 0.005).sum()) for name, column in columns.items()},
+            "ra_rebate": int((np.abs(rebates["rebate"] - direct_rebates[:, 2]) >= 0.005).sum())
+        },
+        "max_difference": float(max(
+            max(np.abs(lookup[name] - direct[:, column]).max() for name, column in columns.items()),
+            np.abs(rebates["rebate"] - direct_rebates[:, 2]).max()
+        ))
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare piecewise tax curve lookups with the direct salary tax and RA rebate calculations.")
+    parser.add_argument("--clients", type=int, default=200000, help="Number of synthetic clients (default: 200000)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.clients), indent=2))
@@ -0,0 +1,226 @@
+import copy
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import tax_years
+
+# Stored per client, named like tax_years.evaluate_salary_tax's outputs
+RESULT_NAMES = [
+    "taxable_income", "tax_before_rebates", "paye_before_mtc", "mtc_annual",
+    "paye", "uif", "net_income", "marginal_rate", "effective_rate"
+]
+REBATE_TIERS = ["under 65", "65 to 74", "75 and older"]  # Tier t gets the first t + 1 rebates in REBATE_TYPES
+MEDICAL_TIERS = ["no dependants", "1 or 2 dependants", "3 or more dependants"]
+
+def _evaluate(table, inputs, positions=None):
+    """Calculate the stored results for the clients at positions (all when None) under one tax table."""
+    if positions is None:
+        positions = slice(None)
+    tax = tax_years.evaluate_salary_tax(
+        tax_years.stack_tax_tables({"table": table}), inputs["gross_salary"][positions], inputs["pension_contribution"][positions],
+        inputs["age"][positions], 0, inputs["dependants"][positions]
+    )
+    return {name: np.array(tax[name][:, 0]) for name in RESULT_NAMES}  # Copies, since some outputs are read-only broadcasts
+
+def _lowers(table):
+    return np.array([bracket[0] for bracket in table["brackets"]], dtype=float)
+
+def _bracket_of(lowers, taxable_income):
+    """The bracket each income depends on: the last whose lower bound it exceeds, or -1 for none.
+
+    A bracket's results run from its lower bound to the next bracket's, so an income in the R1 gap
+    after a bracket's upper bound still depends on that bracket (for the marginal rate).
+    """
+    return np.searchsorted(lowers, taxable_income, side="left") - 1
+
+def _rebate_totals(table):
+    rebates = np.array([table["rebates"][name] for name in tax_years.REBATE_TYPES], dtype=float)
+    return np.cumsum(rebates)
+
+def build_book(clients, table):
+    """Calculate every client's salary tax under table and index which table entries each result depends on.
+
+    clients is a DataFrame with salary_calculator's client list columns. Taxable income and gross
+    salary do not depend on the table, so the sorted orders built here stay valid through every
+    later update_table; only the bracket offsets into them move.
+    """
+    inputs = {
+        "gross_salary": clients["Gross Salary"].to_numpy(dtype=float),
+        "pension_contribution": clients["Pension Contribution"].to_numpy(dtype=float),
+        "age": clients["Age"].to_numpy(dtype=float),
+        "dependants": clients["Dependants"].to_numpy(dtype=float)
+    }
+    results = _evaluate(table, inputs)
+    income_order = np.argsort(results["taxable_income"], kind="stable")
+    sorted_income = results["taxable_income"][income_order]
+    gross_order = np.argsort(inputs["gross_salary"], kind="stable")
+    rebate_tier = (inputs["age"] >= 65).astype(np.int8) + (inputs["age"] >= 75)
+    medical_tier = np.where(inputs["dependants"] <= 0, 0, np.where(inputs["dependants"] <= 2, 1, 2)).astype(np.int8)
+    return {
+        "table": copy.deepcopy(table),
+        "clients": clients,
+        "inputs": inputs,
+        "results": results,
+        "dependencies": {
+            "bracket": _bracket_of(_lowers(table), results["taxable_income"]),
+            "rebate_tier": rebate_tier,
+            "medical_tier": medical_tier,
+            "uif_capped": inputs["gross_salary"] > table["uif_monthly_cap"] * 12
+        },
+        "indexes": {
+            # Clients in bracket i are income_order[bracket_offsets[i]:bracket_offsets[i + 1]]
+            "income_order": income_order,
+            "sorted_income": sorted_income,
+            "bracket_offsets": np.append(np.searchsorted(sorted_income, _lowers(table), side="right"), len(clients)),
+            "gross_order": gross_order,
+            "sorted_gross": inputs["gross_salary"][gross_order],
+            "rebate_tiers": [np.flatnonzero(rebate_tier == tier) for tier in range(len(REBATE_TIERS))],
+            "medical_tiers": [np.flatnonzero(medical_tier == tier) for tier in range(len(MEDICAL_TIERS))]
+        }
+    }
+
+def affected_clients(book, table):
+    """Return the positions of the clients whose results change if the book moves to table, and the count per changed entry.
+
+    A changed bracket affects the clients between the lower of its old and new lower bounds and the
+    higher of its old and new next bounds: one slice of the income order. Rebate changes affect the
+    age tiers that receive them, less clients whose tax before rebates is covered by both the old and
+    new rebates; medical credit changes affect the dependant tiers that use them; a UIF cap change
+    affects clients earning above the lower of the two caps.
+    """
+    old_table = book["table"]
+    indexes = book["indexes"]
+    n = len(book["clients"])
+    affected = []
+    by_entry = {}
+
+    old_brackets, new_brackets = old_table["brackets"], table["brackets"]
+    new_lowers = np.append(_lowers(table), np.inf)
+    for i in range(max(len(old_brackets), len(new_brackets))):
+        old = old_brackets[i] if i < len(old_brackets) else None
+        new = new_brackets[i] if i < len(new_brackets) else None
+        if old == new:
+            continue
+        start, end = n, 0
+        if old is not None:
+            start, end = indexes["bracket_offsets"][i], indexes["bracket_offsets"][i + 1]
+        if new is not None:
+            start = min(start, np.searchsorted(indexes["sorted_income"], new_lowers[i], side="right"))
+            end = max(end, np.searchsorted(indexes["sorted_income"], new_lowers[i + 1], side="right"))
+        positions = indexes["income_order"][start:max(start, end)]
+        by_entry[f"bracket {i + 1}"] = len(positions)
+        affected.append(positions)
+
+    old_totals, new_totals = _rebate_totals(old_table), _rebate_totals(table)
+    for tier, label in enumerate(REBATE_TIERS):
+        if old_totals[tier] != new_totals[tier]:
+            positions = indexes["rebate_tiers"][tier]
+            # PAYE before credits is floored at zero, so clients taxed below both rebates are unchanged
+            positions = positions[book["results"]["tax_before_rebates"][positions] > min(old_totals[tier], new_totals[tier])]
+            by_entry[f"rebates ({label})"] = len(positions)
+            affected.append(positions)
+
+    medical_tiers = []
+    if old_table["mtc_per_person"] != table["mtc_per_person"]:
+        medical_tiers += [1, 2]
+    if old_table["mtc_additional_dependant"] != table["mtc_additional_dependant"]:
+        medical_tiers += [2]
+    for tier in sorted(set(medical_tiers)):
+        by_entry[f"medical credits ({MEDICAL_TIERS[tier]})"] = len(indexes["medical_tiers"][tier])
+        affected.append(indexes["medical_tiers"][tier])
+
+    if old_table["uif_monthly_cap"] != table["uif_monthly_cap"]:
+        cap = min(old_table["uif_monthly_cap"], table["uif_monthly_cap"]) * 12
+        positions = indexes["gross_order"][np.searchsorted(indexes["sorted_gross"], cap, side="right"):]
+        by_entry["UIF cap"] = len(positions)
+        affected.append(positions)
+
+    positions = np.unique(np.concatenate(affected)) if affected else np.array([], dtype=np.int64)
+    return positions, by_entry
+
+def update_table(book, table):
+    """Move the book to a new tax table, recomputing only the clients whose results depend on what changed.
+
+    Updates the book in place and returns how many clients were recomputed, overall and per changed entry.
+    """
+    positions, by_entry = affected_clients(book, table)
+    if len(positions):
+        recomputed = _evaluate(table, book["inputs"], positions)
+        for name in RESULT_NAMES:
+            book["results"][name][positions] = recomputed[name]
+        dependencies = book["dependencies"]
+        dependencies["bracket"][positions] = _bracket_of(_lowers(table), recomputed["taxable_income"])
+        dependencies["uif_capped"][positions] = book["inputs"]["gross_salary"][positions] > table["uif_monthly_cap"] * 12
+    book["table"] = copy.deepcopy(table)
+    book["indexes"]["bracket_offsets"] = np.append(
+        np.searchsorted(book["indexes"]["sorted_income"], _lowers(table), side="right"), len(book["clients"])
+    )
+    return {"clients": len(book["clients"]), "recomputed": len(positions), "by_entry": by_entry}
+
+def results_frame(book):
+    """Return the book's clients with their stored results."""
+    results = book["results"]
+    return book["clients"].assign(**{
+        "Taxable Income (R)": results["taxable_income"],
+        "PAYE (R)": results["paye"],
+        "UIF (R)": results["uif"],
+        "Net Income (R)": results["net_income"],
+        "Effective Tax Rate (%)": results["effective_rate"] * 100,
+        "Marginal Tax Rate (%)": results["marginal_rate"] * 100
+    })
+
+def sample_clients(count, seed=0):
+    """Return a synthetic client book with a realistic spread of salaries, ages and dependants."""
+    rng = np.random.default_rng(seed)
+    gross = np.round(rng.lognormal(np.log(350000), 0.7, count), -2)
+    return pd.DataFrame({
+        "Name": np.arange(count).astype(str),
+        "Gross Salary": gross,
+        "Pension Contribution": np.round(gross * rng.uniform(0, 0.3, count), -2),
+        "Age": rng.integers(18, 90, count),
+        "Medical Contributions": 0.0,
+        "Dependants": rng.integers(0, 6, count)
+    })
+
+def _corrections(table):
+    """Typical mid-year corrections to a published table, by name."""
+    top_rate = copy.deepcopy(table)
+    top_rate["brackets"][-1] = top_rate["brackets"][-1][:2] + (0.46,) + top_rate["brackets"][-1][3:]
+    tertiary = copy.deepcopy(table)
+    tertiary["rebates"]["tertiary"] += 100
+    uif_cap = dict(table, uif_monthly_cap=table["uif_monthly_cap"] + 500)
+    additional = dict(table, mtc_additional_dependant=table["mtc_additional_dependant"] + 10)
+    return {"Top bracket rate": top_rate, "Tertiary rebate": tertiary, "UIF cap": uif_cap, "Additional dependant credit": additional}
+
+def benchmark(count, seed=0):
+    """Apply each typical correction to a synthetic book, timing the targeted update against a full recompute.
+
+    Each update is checked against a full recompute of the corrected table, which must match exactly.
+    """
+    table = tax_years.TAX_YEARS[tax_years.BASE_TAX_YEAR]
+    clients = sample_clients(count, seed)
+    report = {"clients": count, "corrections": {}}
+    for name, corrected in _corrections(table).items():
+        book = build_book(clients, table)
+        start = time.perf_counter()
+        summary = update_table(book, corrected)
+        targeted = time.perf_counter() - start
+        start = time.perf_counter()
+        full = _evaluate(corrected, book["inputs"])
+        full_seconds = time.perf_counter() - start
+        report["corrections"][name] = {
+            "recomputed": summary["recomputed"],
+            "share": summary["recomputed"] / count,
+            "targeted_seconds": targeted,
+            "full_seconds": full_seconds,
+            "exact": all(np.array_equal(book["results"][key], full[key]) for key in RESULT_NAMES)
+        }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark targeted recomputation of a client book after tax table corrections.")
+    parser.add_argument("--clients", type=int, default=1000000, help="Number of synthetic clients (default: 1000000)")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.clients), indent=2))
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+RA_DEDUCTION_RATE = 0.275
+RA_DEDUCTION_CAP = 350000
+UIF_RATE = 0.01
+
+# Brackets, rebates, medical credits and the UIF cap were left unadjusted in the 2024 and 2025 budgets
+UNADJUSTED_TABLE = {
+    "brackets": [
+        (0, 237100, 0.18, 0),
+        (237101, 370500, 0.26, 42678),
+        (370501, 512800, 0.31, 77362),
+        (512801, 673000, 0.36, 121475),
+        (673001, 857900, 0.39, 179147),
+        (857901, 1817000, 0.41, 251258),
+        (1817001, float('inf'), 0.45, 644489)
+    ],
+    "rebates": {"primary": 17235, "secondary": 9444, "tertiary": 3145},
+    "mtc_per_person": 364,
+    "mtc_additional_dependant": 246,
+    "uif_monthly_cap": 17712
+}
+# Published SARS tables, oldest first. Each bracket is (lower, upper, rate, base_tax), as in salary_calculator.
+TAX_YEARS = {
+    "2022/2023": {
+        "brackets": [
+            (0, 226000, 0.18, 0),
+            (226001, 353100, 0.26, 40680),
+            (353101, 488700, 0.31, 73726),
+            (488701, 641400, 0.36, 115762),
+            (641401, 817600, 0.39, 170734),
+            (817601, 1731600, 0.41, 239452),
+            (1731601, float('inf'), 0.45, 614192)
+        ],
+        "rebates": {"primary": 16425, "secondary": 9000, "tertiary": 2997},
+        "mtc_per_person": 347,
+        "mtc_additional_dependant": 234,
+        "uif_monthly_cap": 17712
+    },
+    "2023/2024": UNADJUSTED_TABLE,
+    "2024/2025": UNADJUSTED_TABLE,
+    "2025/2026": UNADJUSTED_TABLE
+}
+BASE_TAX_YEAR = "2024/2025"  # The year the calculators' own tables are for
+REBATE_TYPES = ["primary", "secondary", "tertiary"]
+
+def next_tax_year(label):
+    """Return the label of the tax year after label, e.g. '2025/2026' -> '2026/2027'."""
+    start = int(label[:4]) + 1
+    return f"{start}/{start + 1}"
+
+def index_table(table, factor):
+    """Return a copy of a tax table with thresholds, rebates and medical credits scaled by factor.
+
+    Upper thresholds are rounded to the nearest rand, each lower threshold follows the previous
+    upper by R1, and base taxes are rebuilt from the new thresholds so the brackets stay continuous.
+    The UIF cap and the RA deduction cap are fixed in statute, so they are not indexed.
+    """
+    brackets = []
+    lower, base_tax = 0, 0
+    for i, (_, upper, rate, _) in enumerate(table["brackets"]):
+        if i > 0:
+            previous_lower, previous_upper, previous_rate, previous_base = brackets[-1]
+            lower = previous_upper + 1
+            base_tax = round(previous_base + (previous_upper - previous_lower) * previous_rate)
+        brackets.append((lower, upper if np.isinf(upper) else round(upper * factor), rate, base_tax))
+    return {
+        "brackets": brackets,
+        "rebates": {name: round(amount * factor) for name, amount in table["rebates"].items()},
+        "mtc_per_person": round(table["mtc_per_person"] * factor),
+        "mtc_additional_dependant": round(table["mtc_additional_dependant"] * factor),
+        "uif_monthly_cap": table["uif_monthly_cap"]
+    }
+
+def project_tax_years(years_ahead, indexation, tables=None):
+    """Return tables extended by years_ahead projected years, each indexed by (1 + indexation) on the last."""
+    tables = dict(TAX_YEARS if tables is None else tables)
+    label = list(tables)[-1]
+    table = tables[label]
+    for _ in range(years_ahead):
+        table = index_table(table, 1 + indexation)
+        label = next_tax_year(label)
+        tables[f"{label} (projected)"] = table
+    return tables
+
+def stack_tax_tables(tables):
+    """Stack tax tables into (years x brackets) arrays, padding shorter tables with empty brackets."""
+    width = max(len(table["brackets"]) for table in tables.values())
+    lowers = np.full((len(tables), width), np.inf)
+    uppers = np.full((len(tables), width), np.inf)
+    rates = np.zeros((len(tables), width))
+    bases = np.zeros((len(tables), width))
+    top_rates = np.zeros(len(tables))
+    for y, table in enumerate(tables.values()):
+        brackets = np.array(table["brackets"], dtype=float)
+        count = len(brackets)
+        lowers[y, :count], uppers[y, :count], rates[y, :count], bases[y, :count] = brackets.T
+        top_rates[y] = brackets[-1, 2]
+    return {
+        "years": list(tables),
+        "lowers": lowers,
+        "uppers": uppers,
+        "rates": rates,
+        "bases": bases,
+        "top_rates": top_rates,
+        "rebates": np.array([[table["rebates"][name] for name in REBATE_TYPES] for table in tables.values()], dtype=float),
+        "mtc_per_person": np.array([table["mtc_per_person"] for table in tables.values()], dtype=float),
+        "mtc_additional_dependant": np.array([table["mtc_additional_dependant"] for table in tables.values()], dtype=float),
+        "uif_annual_cap": np.array([table["uif_monthly_cap"] * 12 for table in tables.values()], dtype=float),
+        "base_index": list(tables).index(BASE_TAX_YEAR) if BASE_TAX_YEAR in tables else 0
+    }
+
+def _grow(values, stacked, growth):
+    """Broadcast per-client values to (clients x years), growing by growth per year from the base year."""
+    values = np.asarray(values, dtype=float).reshape(-1, 1)
+    return values * (1 + growth) ** (np.arange(len(stacked["years"])) - stacked["base_index"])
+
+def evaluate_salary_tax(stacked, gross_salary, pension_contribution, age, medical_contributions, num_dependants, income_growth=0.0):
+    """Evaluate calculate_salary_tax for every client in every stacked tax year in one pass.
+
+    Client arguments are scalars or equal-length arrays for the base tax year. Salaries and
+    contributions grow (or, for earlier years, shrink) by income_growth per year from there, so
+    comparing against indexed tables shows bracket creep. Returns a dict of (clients x years) arrays named like calculate_salary_tax's outputs.
+    """
+    years = len(stacked["years"])
+    gross = _grow(gross_salary, stacked, income_growth)
+    pension = _grow(pension_contribution, stacked, income_growth)
+    age = np.asarray(age, dtype=float).reshape(-1, 1)
+    num_dependants = np.asarray(num_dependants, dtype=float).reshape(-1, 1)
+
+    max_deductible = np.minimum(gross * RA_DEDUCTION_RATE, RA_DEDUCTION_CAP)
+    taxable_income = np.maximum(0, gross - np.minimum(pension, max_deductible))
+
+    x = taxable_income[:, :, None]
+    above = x > stacked["lowers"]
+    in_bracket = above & (x <= stacked["uppers"])
+    with np.errstate(invalid="ignore"):
+        bracket_tax = stacked["bases"] + (x - stacked["lowers"]) * stacked["rates"]
+    tax_before_rebates = np.where(in_bracket, bracket_tax, 0).sum(axis=2)
+    # Brackets are ascending, so the marginal rate belongs to the last bracket whose lower bound is exceeded
+    passed = above.sum(axis=2)
+    marginal_rate = np.where(passed > 0, stacked["rates"][np.arange(years), np.maximum(passed - 1, 0)], 0)
+
+    primary, secondary, tertiary = stacked["rebates"].T
+    total_rebate = primary + np.where(age >= 65, secondary, 0) + np.where(age >= 75, tertiary, 0)
+    paye_before_mtc = np.maximum(0, tax_before_rebates - total_rebate)
+
+    per_person = stacked["mtc_per_person"] * 12
+    additional = stacked["mtc_additional_dependant"] * 12
+    mtc_annual = np.where(
+        num_dependants <= 0, 0,
+        np.where(num_dependants <= 2, num_dependants * per_person, 2 * per_person + (num_dependants - 2) * additional)
+    )
+    mtc_annual = np.broadcast_to(mtc_annual, gross.shape)
+    paye = np.maximum(0, paye_before_mtc - mtc_annual)
+    uif = np.minimum(gross, stacked["uif_annual_cap"]) * UIF_RATE
+    net_income = gross - paye - uif
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effective_rate = np.where(gross > 0, paye / gross, 0)
+    return {
+        "gross_salary": gross,
+        "taxable_income": taxable_income,
+        "tax_before_rebates": tax_before_rebates,
+        "paye_before_mtc": paye_before_mtc,
+        "mtc_annual": mtc_annual,
+        "paye": paye,
+        "uif": uif,
+        "net_income": net_income,
+        "marginal_rate": marginal_rate,
+        "effective_rate": effective_rate
+    }
+
+def evaluate_ra_rebate(stacked, income, contribution, income_growth=0.0):
+    """Evaluate calculate_ra_rebate for every client in every stacked tax year in one pass.
+
+    Returns a dict of (clients x years) arrays for deductible, tax_rate, rebate and excess.
+    """
+    years = len(stacked["years"])
+    income = _grow(income, stacked, income_growth)
+    contribution = _grow(contribution, stacked, income_growth)
+    max_deductible = np.minimum(income * RA_DEDUCTION_RATE, RA_DEDUCTION_CAP)
+    deductible = np.minimum(contribution, max_deductible)
+    excess = np.maximum(0, contribution - max_deductible)
+    x = income[:, :, None]
+    # Like ra_calculator.get_tax_rate: the first bracket with lower <= income <= upper, else the top rate
+    matches = (x >= stacked["lowers"]) & (x <= stacked["uppers"])
+    rates = stacked["rates"][np.arange(years), matches.argmax(axis=2)]
+    tax_rate = np.where(matches.any(axis=2), rates, stacked["top_rates"])
+    return {"deductible": deductible, "tax_rate": tax_rate, "rebate": deductible * tax_rate, "excess": excess}
+
+def compare_tax_years(clients, tables, income_growth=0.0):
+    """Return one row per client and tax year with PAYE, effective and marginal rates and RA rebate.
+
+    clients is a DataFrame with Name, Gross Salary, Pension Contribution, Age, Medical Contributions
+    and Dependants columns.
+    """
+    stacked = stack_tax_tables(tables)
+    salary = evaluate_salary_tax(
+        stacked, clients["Gross Salary"], clients["Pension Contribution"], clients["Age"],
+        clients["Medical Contributions"], clients["Dependants"], income_growth
+    )
+    ra = evaluate_ra_rebate(stacked, clients["Gross Salary"], clients["Pension Contribution"], income_growth)
+    years = len(stacked["years"])
+    return pd.DataFrame({
+        "Client": np.repeat(clients["Name"].to_numpy(), years),
+        "Tax Year": np.tile(stacked["years"], len(clients)),
+        "Gross Salary (R)": salary["gross_salary"].ravel(),
+        "Taxable Income (R)": salary["taxable_income"].ravel(),
+        "PAYE (R)": salary["paye"].ravel(),
+        "Net Income (R)": salary["net_income"].ravel(),
+        "Effective Tax Rate (%)": salary["effective_rate"].ravel() * 100,
+        "Marginal Tax Rate (%)": salary["marginal_rate"].ravel() * 100,
+        "RA Rebate (R)": ra["rebate"].ravel()
+    })
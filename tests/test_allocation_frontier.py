@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+import allocation_frontier
+import tax_curves
+import tax_years
+
+INCOME = 900000.0
+AGE = 45
+
+@pytest.mark.parametrize("amount, monthly, contributions_per_year", [(400000.0, False, 1), (30000.0, True, 12)])
+def test_ra_tax_columns_are_per_tax_year(amount, monthly, contributions_per_year):
+    outcome = allocation_frontier.optimise(amount, INCOME, AGE, monthly=monthly)["outcome"]
+    splits = allocation_frontier.split_frame(outcome, np.arange(len(outcome["ra"])))
+    assert list(splits.columns) == allocation_frontier.SPLIT_COLUMNS
+    annual_ra = splits["Retirement Annuity (R)"].to_numpy() * contributions_per_year
+    paye = tax_curves.salary_tax(INCOME, annual_ra, AGE, 0)["paye_before_mtc"]
+    limit = min(INCOME * tax_years.RA_DEDUCTION_RATE, tax_years.RA_DEDUCTION_CAP)
+    assert (annual_ra > limit).any()
+    np.testing.assert_allclose(splits["RA Tax Saving per Tax Year (R)"], paye[0] - paye, atol=0.005)
+    np.testing.assert_allclose(splits["RA Excess Carried Forward per Tax Year (R)"], np.maximum(0, annual_ra - limit), atol=0.005)
@@ -0,0 +1,35 @@
+import io
+import pandas as pd
+import pytest
+import bank_statements
+
+def statement(rows, header="Date,Description,Amount"):
+    return io.StringIO("\n".join([header, *rows]))
+
+@pytest.mark.parametrize("text, expected", [
+    ("R 1 234,50", 1234.50),
+    ("1.234,56", 1234.56),
+    ("1.234.567,5", 1234567.5),
+    ("-1,234.50", -1234.50),
+    ("1,234", 1234.0),
+    ("1.234", 1.234),
+    ("1.234.567", 1234567.0),
+    ("12,5", 12.5),
+    ("(50.00)", -50.0),
+    ("(R 1.234,56)", -1234.56),
+    ("R-75", -75.0),
+    ("", 0.0)
+])
+def test_clean_amounts_formats(text, expected):
+    amounts = bank_statements._clean_amounts(pd.Series([text], name="Amount", dtype=object))
+    assert amounts.iloc[0] == pytest.approx(expected)
+
+def test_unreadable_amounts_are_reported_not_zeroed():
+    file = statement(['2024-05-01,Salary,"25 000,00"', "2024-05-02,Groceries,abc", "2024-05-03,Fuel,12..5"])
+    with pytest.raises(ValueError, match=r"row 2 \('abc'\), row 3 \('12\.\.5'\)"):
+        bank_statements.load_statement(file)
+
+def test_blank_debit_and_credit_cells_are_zero():
+    file = statement(["2024-05-01,Salary,,1000.00", '2024-05-02,Groceries,"(250,00)",'], header="Date,Description,Debit,Credit")
+    transactions = bank_statements.load_statement(file)
+    assert transactions["Amount"].tolist() == [1000.0, -250.0]
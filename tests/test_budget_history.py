@@ -0,0 +1,45 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+import budget_history
+
+def history_with_months(months=6):
+    history = budget_history.BudgetHistory()
+    for month in range(months):
+        history.add_snapshot("Client", f"2024-{month + 1:02d}", 30000, [("Rent", 9000 + 100 * month), ("Food", 4000), ("Fuel", 2000 + 50 * month)])
+    return history
+
+def test_readding_a_month_replaces_its_lines():
+    history = history_with_months()
+    history.add_snapshot("Client", "2024-03", 30000, [("Rent", 9500), ("Gym", 500)])
+    march = history.category_history("Client").query("month == '2024-03'")
+    assert dict(zip(march["category"], march["amount"])) == {"Rent": 9500, "Gym": 500}
+    assert history.savings_history("Client").query("month == '2024-03'")["total_expenses"].item() == 10000
+    assert len(history.lines_frame()) == 6 * 3 - 2 + 1
+
+def test_replaced_month_matches_a_full_rebuild():
+    history = history_with_months(9)
+    history.add_snapshot("Client", "2024-04", 31000, [("Rent", 12000)])
+    history.add_snapshot("Other", "2024-01", 20000, [("Food", 3000)])
+    incremental = history.lines_frame().sort_values(["client", "category", "month"]).reset_index(drop=True)
+    history.rebuild()
+    rebuilt = history.lines_frame().sort_values(["client", "category", "month"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+    assert not (incremental["category"].eq("Food") & incremental["month"].eq("2024-04") & incremental["client"].eq("Client")).any()
+
+def test_save_and_load_after_replacing_a_month(tmp_path):
+    history = history_with_months()
+    history.add_snapshot("Client", "2024-02", 30000, [("Food", 4100)])
+    path = tmp_path / "history.npz"
+    history.save(path)
+    loaded = budget_history.BudgetHistory.load(path)
+    pd.testing.assert_frame_equal(loaded.category_history("Client"), history.category_history("Client"))
+    loaded.add_snapshot("Client", "2024-07", 30000, [("Food", 4000)])
+    assert np.isfinite(loaded.category_history("Client").query("month == '2024-07'")["trend"]).all()
+
+def test_store_imports_without_streamlit():
+    # Blocking streamlit makes any import of it, direct or through a UI module, fail
+    code = "import sys; sys.modules['streamlit'] = None; import budget_history; budget_history.BudgetHistory().add_snapshot('Client', '2024-01', 30000, [('Rent', 9000)])"
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import cashflow_ledger
+import retirement_calculator
+
+PROVISIONS = [(250000.0, 0.09, 3000.0, 0.05), (80000.0, 0.06, 1500.0, 0.0)]  # current value, return, monthly contribution, increase
+
+def client(current_age, retirement_age, provisions, annual_income=0.0, assumed_return=0.07, inflation_rate=0.06):
+    return {
+        "current_age": current_age, "retirement_age": retirement_age, "inflation_rate": inflation_rate,
+        "assumed_return": assumed_return, "annual_income": annual_income,
+        "provisions": [dict(zip(cashflow_ledger.PROVISION_FIELDS, provision)) for provision in provisions]
+    }
+
+def random_clients(count, seed=0):
+    rng = np.random.default_rng(seed)
+    clients = []
+    for _ in range(count):
+        current_age = int(rng.integers(25, 64))
+        provisions = [
+            (float(rng.uniform(0, 2e6)), float(rng.uniform(0, 0.12)), float(rng.uniform(0, 20000)), float(rng.uniform(0, 0.08)))
+            for _ in range(rng.integers(1, 4))
+        ]
+        clients.append(client(current_age, int(rng.integers(current_age, 71)), provisions))
+    return clients
+
+def test_provision_values_match_calculate_future_value():
+    clients = random_clients(40)
+    ledger = cashflow_ledger.build_ledger(clients, horizon_years=0)
+    expected = [
+        retirement_calculator.calculate_future_value(
+            provision["current_value"], provision["annual_return"], inputs["retirement_age"] - inputs["current_age"],
+            provision["monthly_contribution"], provision["contribution_increase"]
+        )
+        for inputs in clients for provision in inputs["provisions"]
+    ]
+    np.testing.assert_allclose(ledger["provision_values"], expected, rtol=1e-9)
+    totals = np.bincount(ledger["provision_client"], weights=expected, minlength=len(clients))
+    np.testing.assert_allclose(ledger["capital_at_retirement"], totals, rtol=1e-9)
+
+def test_year_end_balances_match_calculate_future_value():
+    ledger = cashflow_ledger.build_ledger([client(40, 60, PROVISIONS)], horizon_years=0)
+    for years in range(1, 21):
+        expected = sum(retirement_calculator.calculate_future_value(*provision[:2], years, *provision[2:]) for provision in PROVISIONS)
+        assert ledger["balance"][0, years * 12 - 1] == pytest.approx(expected, rel=1e-9)
+
+@pytest.mark.parametrize("capital, annual_income, assumed_return", [
+    (3000000.0, 360000.0, 0.07),
+    (1500000.0, 250000.0, 0.05),
+    (900000.0, 200000.0, 0.0),
+    (120000.0, 50000.0, 0.08),
+    (5000000.0, 600000.0, 0.09)
+])
+def test_drawdown_matches_calculate_years_until_depletion(capital, annual_income, assumed_return):
+    ledger = cashflow_ledger.build_ledger([client(65, 65, [(capital, 0.0, 0.0, 0.0)], annual_income, assumed_return)])
+    years, first_withdrawal, capital_over_time, withdrawals, monthly_income, _ = retirement_calculator.calculate_years_until_depletion(
+        capital, annual_income, 0.06, 0, assumed_return
+    )
+    assert ledger["depletion_years"][0] == years
+    assert ledger["first_withdrawal"][0] == pytest.approx(first_withdrawal if first_withdrawal is not None else capital)
+    schedule = cashflow_ledger.drawdown_schedule(ledger, 0)
+    np.testing.assert_allclose(schedule["Capital (R)"], capital_over_time, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(schedule["Annual Withdrawal (R)"], withdrawals, rtol=1e-9)
+    np.testing.assert_allclose(schedule["Monthly Income (R)"], monthly_income, rtol=1e-9)
+
+def test_capital_that_outlasts_the_horizon_is_not_depleted():
+    ledger = cashflow_ledger.build_ledger([client(65, 65, [(10000000.0, 0.0, 0.0, 0.0)], 300000.0, 0.08)], horizon_years=40)
+    assert ledger["depletion_years"][0] == cashflow_ledger.NOT_DEPLETED
+    assert ledger["balance"].shape[1] == 40 * 12
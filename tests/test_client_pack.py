@@ -0,0 +1,85 @@
+import json
+import openpyxl
+import pytest
+import client_book
+import client_pack
+import retirement_calculator
+
+def record(name, current_age, preserve_capital=False, provisions=((500000.0, 0.09, 4000.0, 0.05),)):
+    return {
+        "name": name, "current_age": current_age, "retirement_age": 65, "desired_monthly_income": 30000.0,
+        "desired_annual_increase": 0.03, "inflation_rate": 0.06, "assumed_return": 0.07, "preserve_capital": preserve_capital,
+        "preservation_years": 20,
+        "provisions": [
+            {"type": kind, "current_value": value, "annual_return": annual_return, "monthly_contribution": contribution, "contribution_increase": increase}
+            for kind, (value, annual_return, contribution, increase) in zip(["Retirement Annuity", "Pension Fund", "Retirement Annuity"], provisions)
+        ]
+    }
+
+RECORDS = [
+    record("Thandi", 40),
+    record("Pieter", 55, preserve_capital=True, provisions=((1200000.0, 0.08, 0.0, 0.0), (300000.0, 0.1, 2500.0, 0.06))),
+    record("Thandi", 30, provisions=()),
+    record("Lerato", 48, provisions=((90000.0, 0.07, 1500.0, 0.0), (60000.0, 0.05, 800.0, 0.04), (10000.0, 0.11, 0.0, 0.0)))
+]
+
+def test_book_gives_back_each_records_report_inputs():
+    book, names, errors = client_pack.load_book(RECORDS)
+    assert names == [client["name"] for client in RECORDS] and errors == {}
+    rebuilt = list(book.view().retirement_inputs())
+    assert [position for position, _ in rebuilt] == list(range(len(RECORDS)))
+    for (_, arguments), client in zip(rebuilt, RECORDS):
+        assert {"name": client["name"], **arguments} == client
+
+def test_reports_from_the_book_match_reports_from_the_records():
+    results = list(client_pack.iter_client_reports(RECORDS, max_workers=1))
+    for (name, report, error), client in zip(results, RECORDS):
+        expected = retirement_calculator.calculate_retirement_report(**client)
+        assert error is None and name == client["name"]
+        assert report["summary_data"] == expected["summary_data"]
+        assert report["provisions_data"] == expected["provisions_data"]
+        assert report["chart_data"] == expected["chart_data"]
+
+def test_records_that_cannot_be_stored_are_reported_in_place():
+    missing = {key: value for key, value in record("Sipho", 45).items() if key != "assumed_return"}
+    unreadable = {**record("Anna", 45), "current_age": "forty"}
+    bad_provision = record("Ben", 45)
+    del bad_provision["provisions"][0]["annual_return"]
+    book, _, errors = client_pack.load_book([RECORDS[0], missing, unreadable, bad_provision, RECORDS[3]])
+    assert len(book) == 2 and sorted(errors) == [1, 2, 3]
+    assert errors[1] == "Missing fields: assumed_return" and errors[3] == "Missing fields: annual_return"
+
+    results = list(client_pack.iter_client_reports([RECORDS[0], missing, unreadable, RECORDS[3]], max_workers=1))
+    assert [name for name, _, _ in results] == ["Thandi", "Sipho", "Anna", "Lerato"]
+    assert [report is None for _, report, _ in results] == [False, True, True, False]
+
+def test_failed_record_leaves_the_book_unchanged():
+    book = client_book.ClientBook()
+    book.add_client("a", RECORDS[0])
+    with pytest.raises(ValueError):
+        book.add_client("b", {**RECORDS[1], "retirement_age": "sixty"})
+    assert len(book) == 1 and "b" not in book.client_codes
+    assert book.view().children("provisions")["current_value"].tolist() == [500000.0]
+
+def test_workbook_indexes_every_client(tmp_path):
+    clients = tmp_path / "clients.jsonl"
+    clients.write_text("\n".join(json.dumps(client) for client in [*RECORDS, {"name": "Empty"}]), encoding="utf-8")
+    written, failed = client_pack.write_compliance_workbook(client_pack.load_clients(clients), tmp_path / "pack.xlsx", max_workers=1)
+    assert (written, failed) == (4, 1)
+    workbook = openpyxl.load_workbook(tmp_path / "pack.xlsx", read_only=True)
+    index = [row for row in workbook["Clients"].iter_rows(min_row=2, values_only=True)]
+    assert [row[:2] for row in index] == [("Thandi", "Thandi"), ("Pieter", "Pieter"), ("Thandi", "Thandi (2)"), ("Lerato", "Lerato"), ("Empty", None)]
+    assert index[-1][2].startswith("Error: Missing fields")
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_records_are_read_about_one_window_ahead_of_the_results(max_workers):
+    window = max_workers * client_pack.MAX_IN_FLIGHT_PER_WORKER
+    read = []
+    def clients():
+        for i in range(10 * window):
+            read.append(i)
+            yield {**RECORDS[i % len(RECORDS)], "name": f"Client {i}"} if i % 7 else {"name": f"Client {i}"}
+    for taken, (name, _, _) in enumerate(client_pack.iter_client_reports(clients(), max_workers), start=1):
+        assert name == f"Client {taken - 1}"
+        assert len(read) - taken < 2 * window
+    assert len(read) == 10 * window
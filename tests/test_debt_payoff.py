@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+import budget_tool
+import debt_payoff
+
+def random_debts(count, seed):
+    rng = np.random.default_rng(seed)
+    balance = np.round(rng.uniform(2000, 250000, count), 2)
+    rate = np.round(rng.uniform(0.07, 0.28, count), 4)
+    minimum_payment = np.round(np.maximum(balance * rate / debt_payoff.MONTHS_PER_YEAR * 1.2, balance * 0.02), 2)
+    priority = np.where(rng.random(count) < 0.3, np.nan, rng.integers(1, 4, count))
+    return balance, rate, minimum_payment, priority
+
+def assert_matches_loop(balance, rate, minimum_payment, priority, remaining_budget):
+    plan = debt_payoff.simulate(balance, rate, minimum_payment, priority, [], remaining_budget)
+    orders = debt_payoff.payment_orders(balance, rate, priority)
+    for s in range(len(orders)):
+        for e, extra in enumerate(plan["extras"]):
+            total_interest, payoff = debt_payoff._simulate_scenario(
+                balance, rate / debt_payoff.MONTHS_PER_YEAR, minimum_payment, orders[s], extra, debt_payoff.MAX_MONTHS
+            )
+            assert plan["total_interest"][s, e] == pytest.approx(total_interest, rel=1e-9, abs=1e-6)
+            assert plan["payoff_month"][s, e].tolist() == payoff
+
+@pytest.mark.parametrize("debts, seed", [(1, 0), (3, 1), (6, 2), (10, 3)])
+def test_simulate_matches_the_scenario_loop(debts, seed):
+    assert_matches_loop(*random_debts(debts, seed), remaining_budget=5000.0)
+
+def test_simulate_matches_the_scenario_loop_with_settled_and_growing_debts():
+    # A settled debt, a debt whose minimum is below its interest and no budget for extra payments
+    balance = np.array([0.0, 10000.0, 25000.0])
+    rate = np.array([0.2, 0.3, 0.12])
+    minimum_payment = np.array([500.0, 100.0, 1500.0])
+    assert_matches_loop(balance, rate, minimum_payment, np.array([np.nan, 1.0, 2.0]), remaining_budget=0.0)
+    assert_matches_loop(balance, rate, minimum_payment, np.array([np.nan, 1.0, 2.0]), remaining_budget=800.0)
+
+def test_minimum_below_interest():
+    # R10,000 at 30% accrues R250 in the first month
+    flagged = debt_payoff.minimum_below_interest([10000.0, 10000.0, 10000.0, 0.0], [0.3, 0.3, 0.3, 0.3], [100.0, 250.0, 250.01, 0.0])
+    assert flagged.tolist() == [True, True, False, False]
+
+def test_debt_plan_lists_debts_whose_minimum_is_below_interest():
+    debts = pd.DataFrame({
+        "debt": ["Store Card", None], "balance": [10000.0, 20000.0], "rate": [30.0, 12.0],
+        "minimum_payment": [100.0, 1000.0], "priority": [np.nan, np.nan]
+    })
+    goals = pd.DataFrame({"goal": pd.Series(dtype=object), "target": pd.Series(dtype=float)})
+    plan = budget_tool.calculate_debt_plan(debts, goals, 0.0, 0.0)
+    assert plan["minimum_below_interest"] == [("Store Card", 100.0, 250.0)]
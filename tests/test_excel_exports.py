@@ -0,0 +1,47 @@
+import io
+import pytest
+from streamlit.testing.v1 import AppTest
+import excel_exports
+
+BUILDER = {"calls": 0, "fail": True}
+
+def flaky_builder(name):
+    BUILDER["calls"] += 1
+    if BUILDER["fail"]:
+        raise ValueError(f"No data for {name}")
+    return io.BytesIO(name.encode())
+
+def export_page():
+    import excel_exports
+    import test_excel_exports
+    excel_exports.download_button("Download as Excel", "export.xlsx", test_excel_exports.flaky_builder, "Thandi")
+
+def wait_for_build(app):
+    key = app.session_state[excel_exports.EXPORTS_STATE_KEY]["export.xlsx"]
+    excel_exports._jobs[key].exception(timeout=10)
+
+@pytest.fixture
+def page():
+    BUILDER.update(calls=0, fail=True)
+    excel_exports._jobs.clear()
+    app = AppTest.from_function(export_page)
+    app.run()
+    wait_for_build(app)
+    yield app
+    excel_exports._jobs.clear()
+
+def test_failed_export_shows_its_error_without_rebuilding(page):
+    for _ in range(3):
+        page.run()
+        assert [error.value for error in page.error] == ["Error: No data for Thandi"]
+    assert BUILDER["calls"] == 1
+
+def test_retry_builds_the_export_again(page):
+    page.run()
+    BUILDER["fail"] = False
+    page.button(key="retry_export_export.xlsx").click().run()
+    wait_for_build(page)
+    page.run()
+    assert BUILDER["calls"] == 2
+    assert not page.error
+    assert page.get("download_button")[0].proto.label == "Download as Excel"
@@ -0,0 +1,48 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+import memory_profile
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setenv(memory_profile.ENABLE_ENV_VAR, "1")
+    memory_profile.reset()
+    yield
+    memory_profile.reset()
+
+def record(monkeypatch, session):
+    monkeypatch.setattr(memory_profile, "session_id", lambda: session)
+    memory_profile.record_session({"results": [0] * 10})
+
+def test_sessions_keep_the_most_recently_recorded(monkeypatch, profiling):
+    monkeypatch.setattr(memory_profile, "MAX_SESSIONS", 3)
+    for session in ["a", "b", "c", "a", "d"]:
+        record(monkeypatch, session)
+    assert [snapshot["session"] for snapshot in memory_profile.sessions()] == ["c", "a", "d"]
+
+def admin_page():
+    import memory_profile
+    memory_profile.show_admin()
+
+@pytest.mark.parametrize("token, supplied, shown", [
+    ("", None, False),
+    ("", "", False),
+    ("s3cret", None, False),
+    ("s3cret", "wrong", False),
+    ("s3cret", "s3cret", True)
+])
+def test_admin_view_needs_the_token(monkeypatch, profiling, token, supplied, shown):
+    monkeypatch.setenv(memory_profile.ADMIN_TOKEN_ENV_VAR, token)
+    app = AppTest.from_function(admin_page)
+    if supplied is not None:
+        app.query_params[memory_profile.ADMIN_QUERY_PARAM] = supplied
+    app.run()
+    assert not app.exception
+    assert [expander.label for expander in app.expander] == (["Memory Profile (Admin)"] if shown else [])
+
+def test_admin_view_is_hidden_without_profiling(monkeypatch):
+    monkeypatch.delenv(memory_profile.ENABLE_ENV_VAR, raising=False)
+    monkeypatch.setenv(memory_profile.ADMIN_TOKEN_ENV_VAR, "s3cret")
+    app = AppTest.from_function(admin_page)
+    app.query_params[memory_profile.ADMIN_QUERY_PARAM] = "s3cret"
+    app.run()
+    assert not app.expander
@@ -0,0 +1,27 @@
+import io
+import pandas as pd
+import salary_calculator
+import tax_years
+import validation
+
+CLIENT_LIST = """Name,Gross Salary,Pension Contribution,Age,Medical Contributions,Dependants
+Thabo,650000,50000,40,0,2
+Anna,900000,0,52,24000,1
+Thabo,420000,0,29,0,0
+"""
+
+def test_uploaded_clients_with_the_same_name_are_charted_separately():
+    clients, errors = validation.validate(pd.read_csv(io.StringIO(CLIENT_LIST)), salary_calculator.CLIENT_SCHEMA)
+    assert errors.empty
+    comparison = tax_years.compare_tax_years(clients, tax_years.project_tax_years(3, 0.045), 0.06)
+    chart = salary_calculator.effective_rate_chart(comparison, clients["Name"])
+    assert list(chart.columns) == ["Thabo (1)", "Anna", "Thabo (3)"]
+    assert chart.shape[0] == comparison["Tax Year"].nunique()
+    first = comparison.iloc[:chart.shape[0]].set_index("Tax Year")["Effective Tax Rate (%)"]
+    pd.testing.assert_series_equal(chart["Thabo (1)"].loc[first.index], first, check_names=False)
+    assert not chart["Thabo (1)"].equals(chart["Thabo (3)"])
+
+def test_single_client_keeps_their_name():
+    clients = pd.DataFrame([["Lerato", 500000, 0, 35, 0, 0]], columns=salary_calculator.CLIENT_LIST_COLUMNS)
+    comparison = tax_years.compare_tax_years(clients, tax_years.project_tax_years(2, 0.045))
+    assert list(salary_calculator.effective_rate_chart(comparison, clients["Name"]).columns) == ["Lerato"]
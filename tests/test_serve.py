@@ -0,0 +1,20 @@
+import gc
+import sys
+import serve
+import warmup
+
+def test_heap_is_frozen_after_the_warm_up_and_before_the_server_starts(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "freeze_heap", lambda: calls.append(("freeze", warmup.status()["state"], gc.get_freeze_count())))
+    monkeypatch.setattr(serve.cli, "main", lambda: calls.append(("server", sys.argv[1:])) or 0)
+    monkeypatch.setattr(sys, "argv", list(sys.argv))
+    assert serve.main(["--server.port", "8600"]) == 0
+    # The warm-up itself freezes nothing, since it also runs on a thread under `streamlit run app.py`
+    assert calls == [("freeze", "finished", 0), ("server", ["run", serve.APP_SCRIPT, "--server.port", "8600"])]
+
+def test_freeze_heap_freezes_what_is_alive():
+    try:
+        warmup.freeze_heap()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
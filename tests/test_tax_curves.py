@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import ra_calculator
+import salary_calculator
+import tax_curves
+
+CENT = 0.005
+
+def incomes(count=400, seed=0):
+    """Random incomes plus incomes on and around every bracket bound, including the R1 gaps."""
+    rng = np.random.default_rng(seed)
+    bounds = np.array([bound for bracket in salary_calculator.TAX_BRACKETS for bound in bracket[:2] if np.isfinite(bound)], dtype=float)
+    around = (bounds[:, None] + np.array([-1, -0.5, -0.01, 0, 0.01, 0.25, 0.5, 0.99, 1])).ravel()
+    return np.concatenate([[0.0, 0.01], around, np.round(rng.lognormal(np.log(350000), 0.9, count), 2)])
+
+@pytest.mark.parametrize("age", [30, 64, 65, 74, 75, 90])
+def test_salary_tax_matches_calculate_salary_tax(age):
+    gross = incomes(seed=age)
+    rng = np.random.default_rng(age)
+    pension = np.where(rng.random(len(gross)) < 0.3, 0, np.round(gross * rng.uniform(0, 0.35, len(gross)), 2))
+    dependants = rng.integers(0, 6, len(gross))
+    lookup = tax_curves.salary_tax(gross, pension, age, dependants)
+    direct = np.array([salary_calculator.calculate_salary_tax(gross[i], pension[i], age, 0, dependants[i]) for i in range(len(gross))])
+    columns = {"taxable_income": 0, "paye_before_mtc": 1, "mtc_annual": 3, "paye": 5, "uif": 7, "net_income": 9}
+    for name, column in columns.items():
+        assert np.abs(lookup[name] - direct[:, column]).max() < CENT, name
+    np.testing.assert_array_equal(lookup["marginal_rate"], direct[:, 11])
+
+def test_ra_rebate_matches_calculate_ra_rebate():
+    income = incomes(seed=1)
+    rng = np.random.default_rng(1)
+    contribution = np.concatenate([[0.0, 350000.0, 500000.0], np.round(income[3:] * rng.uniform(0, 0.5, len(income) - 3), 2)])
+    lookup = tax_curves.ra_rebate(income, contribution)
+    direct = np.array([ra_calculator.calculate_ra_rebate(income[i], contribution[i]) for i in range(len(income))])
+    for name, column in {"deductible": 0, "rebate": 2, "excess": 3}.items():
+        assert np.abs(lookup[name] - direct[:, column]).max() < CENT, name
+    np.testing.assert_array_equal(lookup["tax_rate"], direct[:, 1])
+
+def test_scalar_lookup_matches_the_array_lookup():
+    tax = tax_curves.salary_tax(782000.0, 50000.0, 66, 3)
+    batch = tax_curves.salary_tax(np.array([100000.0, 782000.0]), np.array([0.0, 50000.0]), 66, np.array([0, 3]))
+    assert {name: float(value) for name, value in tax.items()} == {name: float(values[1]) for name, values in batch.items()}
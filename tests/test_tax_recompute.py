@@ -0,0 +1,38 @@
+import copy
+import numpy as np
+import pytest
+import tax_recompute
+import tax_years
+
+BASE_TABLE = tax_years.TAX_YEARS[tax_years.BASE_TAX_YEAR]
+
+def assert_matches_full_recompute(book, table):
+    full = tax_recompute._evaluate(table, book["inputs"])
+    for name in tax_recompute.RESULT_NAMES:
+        np.testing.assert_array_equal(book["results"][name], full[name], err_msg=name)
+
+@pytest.mark.parametrize("correction", list(tax_recompute._corrections(BASE_TABLE)))
+def test_targeted_update_matches_full_recompute(correction):
+    book = tax_recompute.build_book(tax_recompute.sample_clients(20000, seed=1), BASE_TABLE)
+    table = tax_recompute._corrections(BASE_TABLE)[correction]
+    summary = tax_recompute.update_table(book, table)
+    assert 0 < summary["recomputed"] < summary["clients"]
+    assert_matches_full_recompute(book, table)
+
+def test_moved_bracket_bound_and_lower_rebate_match_full_recompute():
+    table = copy.deepcopy(BASE_TABLE)
+    lower, upper, rate, base = table["brackets"][2]
+    table["brackets"][2] = (lower - 20000, upper, rate, base - 5200)
+    table["brackets"][1] = table["brackets"][1][:1] + (lower - 20001,) + table["brackets"][1][2:]
+    table["rebates"]["primary"] -= 500
+    book = tax_recompute.build_book(tax_recompute.sample_clients(20000, seed=2), BASE_TABLE)
+    tax_recompute.update_table(book, table)
+    assert_matches_full_recompute(book, table)
+
+def test_successive_tax_years_match_full_recompute():
+    clients = tax_recompute.sample_clients(20000, seed=3)
+    tables = tax_years.project_tax_years(2, 0.045)
+    book = tax_recompute.build_book(clients, tables[tax_years.BASE_TAX_YEAR])
+    for table in tables.values():
+        tax_recompute.update_table(book, table)
+        assert_matches_full_recompute(book, table)
@@ -0,0 +1,45 @@
+import io
+import pandas as pd
+import pytest
+import estate_liquidity
+import salary_calculator
+import validation
+
+COUPLE_BOOK = """Couple,First Gross Estate (R),First Liquid Assets (R),First Capital Gains (R),First Liabilities (R),Spouse Share (%),PBO Bequests (R),Survivor Gross Estate (R),Survivor Liquid Assets (R),Survivor Capital Gains (R),Survivor Liabilities (R)
+Dlamini,5000000,800000,0,100000,100,0,2000000,300000,0,0
+Naidoo,4000000,abc,0,0,100,0,1000000,200000,0,0
+Smith,3000000,3500000,0,0,100,0,1000000,200000,0,0
+"""
+
+def test_rules_skip_rows_whose_fields_are_not_numbers():
+    couples, errors = estate_liquidity.validation.validate(pd.read_csv(io.StringIO(COUPLE_BOOK)), estate_liquidity.COUPLE_SCHEMA)
+    assert errors[["Row", "Message"]].values.tolist() == [
+        [2, "First Liquid Assets (R) must be a number."],
+        [3, "Liquid assets cannot exceed the gross estate."]
+    ]
+    assert couples["Couple"].tolist() == ["Dlamini"]
+    assert pd.api.types.is_numeric_dtype(couples["First Liquid Assets (R)"])
+
+def test_valid_rows_are_returned_as_numbers():
+    clients = pd.DataFrame({
+        "Name": ["A", "B"], "Gross Salary": ["650000", "x"], "Pension Contribution": ["0", "0"],
+        "Age": ["40", "41"], "Medical Contributions": ["0", "0"], "Dependants": ["1", "0"]
+    })
+    valid, errors = validation.validate(clients, salary_calculator.CLIENT_SCHEMA)
+    assert errors["Row"].tolist() == [2]
+    assert valid["Gross Salary"].tolist() == [650000]
+    assert all(pd.api.types.is_numeric_dtype(valid[column]) for column in salary_calculator.CLIENT_LIST_COLUMNS[1:])
+    assert valid["Name"].tolist() == ["A"]
+
+def test_missing_columns_are_reported_by_column_name():
+    clients = pd.DataFrame({"Name": ["A"], "Gross Salary": [650000], "Age": [40], "Dependants": [0]})
+    with pytest.raises(ValueError, match="Missing columns: Pension Contribution, Medical Contributions"):
+        validation.validate(clients, salary_calculator.CLIENT_SCHEMA)
+
+def test_form_inputs_still_report_rules():
+    schema = validation.schema(
+        {"low": validation.field("Low"), "high": validation.field("High")},
+        [validation.rule(["low", "high"], lambda table: table["low"] < table["high"], "Low must be below high.")]
+    )
+    assert validation.validate_inputs({"low": 5, "high": 3}, schema) == ["Low must be below high."]
+    assert validation.validate_inputs({"low": "five", "high": 3}, schema) == ["Low must be a number."]
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+ERROR_COLUMNS = ["Row", "Field", "Message"]
+
+def field(label, required=True, minimum=None, maximum=None, exclusive_minimum=False, multiple_of=None, text=False, message=None):
+    """Declare one input: its display label, whether it is required and the bounds a number must meet.
+
+    message replaces the generated error text for every check on the field.
+    """
+    return {
+        "label": label, "required": required, "minimum": minimum, "maximum": maximum,
+        "exclusive_minimum": exclusive_minimum, "multiple_of": multiple_of, "text": text, "message": message
+    }
+
+def rule(fields, check, message):
+    """Declare a check across fields: check takes the input table and returns True for valid rows.
+
+    check only sees rows whose fields passed their own checks, with number fields as numbers.
+    """
+    return {"fields": list(fields), "check": check, "message": message}
+
+def _number(value):
+    return f"{value:,.0f}" if float(value).is_integer() else f"{value:,}"
+
+def _compile_field(spec):
+    """Turn a field declaration into (message, test) pairs, where test maps a column to a mask of invalid rows."""
+    label = spec["label"]
+    checks = []
+    if spec["text"]:
+        if spec["required"]:
+            checks.append((f"{label} is required.", lambda column: column.isna() | (column.astype(str).str.strip() == "")))
+    else:
+        if spec["required"]:
+            checks.append((f"{label} is required.", lambda column: column.isna()))
+        checks.append((f"{label} must be a number.", lambda column: column.notna() & pd.to_numeric(column, errors="coerce").isna()))
+        minimum, maximum, multiple_of = spec["minimum"], spec["maximum"], spec["multiple_of"]
+        if minimum is not None and spec["exclusive_minimum"]:
+            checks.append((f"{label} must be more than {_number(minimum)}.", lambda column: pd.to_numeric(column, errors="coerce") <= minimum))
+        elif minimum is not None:
+            checks.append((f"{label} must be at least {_number(minimum)}.", lambda column: pd.to_numeric(column, errors="coerce") < minimum))
+        if maximum is not None:
+            checks.append((f"{label} must be at most {_number(maximum)}.", lambda column: pd.to_numeric(column, errors="coerce") > maximum))
+        if multiple_of is not None:
+            checks.append((f"{label} must be a multiple of {_number(multiple_of)}.", lambda column: pd.to_numeric(column, errors="coerce") % multiple_of != 0))
+    if spec["message"] is not None:
+        checks = [(spec["message"], test) for _, test in checks]
+    return checks
+
+def schema(fields, rules=()):
+    """Compile field declarations and cross-field rules into a schema that validate applies to whole tables."""
+    return {
+        "fields": fields,
+        "rules": list(rules),
+        "checks": {name: _compile_field(spec) for name, spec in fields.items()}
+    }
+
+def validate(table, schema):
+    """Check every row of table against schema in one vectorized pass per check.
+
+    Returns (valid rows, errors), where errors has one row per failed check giving the 1-based row
+    number, the field label and the message. The valid rows have their number fields converted to
+    numbers. A row's cross-field rules are only checked once its fields pass their own checks, and
+    then on those numbers, so each problem is reported once. Raises ValueError naming the columns
+    when a required column is missing altogether.
+    """
+    missing = [name for name, spec in schema["fields"].items() if spec["required"] and name not in table.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    numbers = table.copy()
+    field_invalid = {}
+    errors = []
+    for name, checks in schema["checks"].items():
+        if name not in table.columns:
+            continue
+        invalid = np.zeros(len(table), dtype=bool)
+        for message, test in checks:
+            failed = test(table[name]).to_numpy(dtype=bool) & ~invalid
+            if failed.any():
+                errors.append(pd.DataFrame({"Row": np.flatnonzero(failed) + 1, "Field": schema["fields"][name]["label"], "Message": message}))
+            invalid |= failed
+        field_invalid[name] = invalid
+        if not schema["fields"][name]["text"]:
+            numbers[name] = pd.to_numeric(table[name], errors="coerce")
+    invalid_rows = np.logical_or.reduce(list(field_invalid.values())) if field_invalid else np.zeros(len(table), dtype=bool)
+    for cross in schema["rules"]:
+        checked = ~np.logical_or.reduce([field_invalid.get(name, np.zeros(len(table), dtype=bool)) for name in cross["fields"]])
+        failed = np.zeros(len(table), dtype=bool)
+        if checked.any():
+            failed[checked] = ~np.asarray(cross["check"](numbers[checked]), dtype=bool)
+        if failed.any():
+            label = " / ".join(schema["fields"][name]["label"] for name in cross["fields"])
+            errors.append(pd.DataFrame({"Row": np.flatnonzero(failed) + 1, "Field": label, "Message": cross["message"]}))
+        invalid_rows |= failed
+    errors = pd.concat(errors, ignore_index=True).sort_values("Row", kind="stable", ignore_index=True) if errors else pd.DataFrame(columns=ERROR_COLUMNS)
+    return numbers[~invalid_rows].copy(), errors
+
+def validate_inputs(values, schema):
+    """Validate one set of form inputs (field name -> value) and return every error message."""
+    _, errors = validate(pd.DataFrame([values]), schema)
+    return list(errors["Message"])
+
+def error_messages(errors, row_label):
+    """Format a table's errors as messages naming the row, e.g. row_label="Provision" gives "Provision 2: ..."."""
+    return [f"{row_label} {row}: {message}" for row, message in zip(errors["Row"], errors["Message"])]
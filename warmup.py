@@ -0,0 +1,152 @@
+import gc
+import time
+import json
+import logging
+import importlib
+import threading
+import pandas as pd
+from streamlit.logger import get_logger
+
+# Tool modules are imported inside the tasks, not here, so importing this module stays cheap and
+# the imports themselves happen on the warm-up thread rather than during the first page render
+TOOL_MODULES = ["allocation_optimizer", "budget_tool", "estate_liquidity", "everest_wealth", "payroll_costs", "ra_calculator", "retirement_calculator", "salary_calculator"]
+logger = get_logger(__name__)  # Streamlit's logger, so the report shows in the server log
+_lock = threading.Lock()
+_thread = None
+_status = {"state": "not started", "tasks": [], "total_ms": 0.0, "saved_ms": 0.0}
+
+def _import_tools(modules):
+    for module in modules:
+        importlib.import_module(module)
+
+def _sample_report(preserve_capital, preservation_years):
+    import retirement_calculator
+    provisions = [{"type": "Retirement Annuity", "current_value": 500000, "annual_return": 0.08, "monthly_contribution": 3000, "contribution_increase": 0.05}]
+    return retirement_calculator.calculate_retirement_report("Warm-up", 40, 65, 30000, 0.03, 0.06, 0.07, preserve_capital, preservation_years, provisions)
+
+def _run_calculations(modules):
+    import allocation_frontier
+    import budget_totals
+    import estate_liquidity
+    import everest_wealth
+    import everest_yield
+    import payroll_costs
+    import ra_calculator
+    import salary_calculator
+    allocation_frontier.optimise(everest_wealth.MINIMUM_INVESTMENT * 2, 500000, 40)
+    budget_totals.calculate_budget(30000, [("Housing", 10000), ("Groceries", 5000)])
+    estate_liquidity.calculate_estate_duty(10000000, True, 2000000, 0)
+    estate_liquidity.calculate_cgt([{"market_value": 3000000, "base_cost": 1000000}], 0.45)
+    estate_liquidity.calculate_executor_fees(10000000, estate_liquidity.EXECUTOR_FEE_RATE_DEFAULT)
+    everest_wealth.calculate_investment_results(everest_wealth.MINIMUM_INVESTMENT, "Strategic Income")
+    everest_yield.yield_catalog([everest_wealth.MINIMUM_INVESTMENT])
+    ra_calculator.calculate_ra_rebate(500000, 50000)
+    salary_calculator.calculate_salary_tax(500000, 50000, 40, 30000, 2)
+    employees, _ = payroll_costs.prepare_employees(pd.DataFrame({
+        "Employee": ["A", "B"], "Department": ["Sales", "Finance"], "Cost Centre": ["100", "200"], "Gross Salary": [400000, 650000]
+    }))
+    payroll_costs.summarise_payroll(payroll_costs.calculate_payroll(employees), "Department")
+    _sample_report(True, 15)
+    _sample_report(False, 0)
+
+def _write_workbooks(modules):
+    import everest_wealth
+    import retirement_calculator
+    everest_wealth.build_everest_workbook(pd.DataFrame({"Metric": ["Net Monthly Income (R)"], "Value": ["R 1,000.00"]}))
+    retirement_calculator.build_retirement_workbook(_sample_report(False, 0))
+
+def _build_charts(modules):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Bar(name="Bar", x=["A"], y=[1]), go.Scatter(x=[1, 2], y=[1, 2], mode="lines", name="Line")])
+    fig.add_vline(x=1, line_dash="dash", annotation_text="Line")
+    fig.update_layout(title="Warm-up", paper_bgcolor="#4A4A4A", font={'color': "white"}, xaxis={'tickfont': {'color': "white"}})
+    fig.to_json()
+
+def _serialise_tables(modules):
+    import pyarrow
+    pyarrow.Table.from_pandas(pd.DataFrame({"Metric": ["A"], "Value (R)": [1.0], "Count": [1]}))
+
+def _load_kernels(modules):
+    import projection_kernels
+    projection_kernels.future_values([100000.0], [0.08], [20], [1000.0], [0.05])
+    projection_kernels.depletion_years([1000000.0], [100000.0], [[0.07] * 40])
+
+def _precompute_tables(modules):
+    import everest_wealth
+    import salary_calculator
+    import tax_curves
+    import tax_years
+    everest_wealth.payoff_table()
+    salary_calculator.paye_band_table()
+    for tax_year in tax_years.TAX_YEARS:
+        tax_curves.tax_curves(tax_year)
+
+# Each task does what the first request for it would otherwise pay for
+WARMUP_TASKS = [
+    ("Tool modules", _import_tools),
+    ("Calculations", _run_calculations),
+    ("Excel workbooks", _write_workbooks),
+    ("Plotly charts", _build_charts),
+    ("Arrow tables", _serialise_tables),
+    ("Projection kernels", _load_kernels),
+    ("Precomputed tables", _precompute_tables)
+]
+
+def run_warmup(modules):
+    """Run every warm-up task twice and record how much faster the second (warm) run was.
+
+    The difference is the latency the first request no longer pays. A failing task is logged and
+    skipped, since warm-up must never stop the app from serving.
+    """
+    with _lock:
+        _status.update({"state": "running", "tasks": [], "total_ms": 0.0, "saved_ms": 0.0})
+    for name, task in WARMUP_TASKS:
+        try:
+            start = time.perf_counter()
+            task(modules)
+            cold_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            task(modules)
+            warm_ms = (time.perf_counter() - start) * 1000
+        except Exception:
+            logger.exception("Warm-up task '%s' failed", name)
+            continue
+        with _lock:
+            _status["tasks"].append({"task": name, "cold_ms": cold_ms, "warm_ms": warm_ms, "saved_ms": max(cold_ms - warm_ms, 0.0)})
+            _status["total_ms"] += cold_ms + warm_ms
+            _status["saved_ms"] += max(cold_ms - warm_ms, 0.0)
+    with _lock:
+        _status["state"] = "finished"
+    logger.info("Warm-up finished in %.0f ms and removed about %.0f ms from first requests: %s", _status["total_ms"], _status["saved_ms"], ", ".join(
+        f"{task['task']} {task['saved_ms']:.0f} ms" for task in _status["tasks"]
+    ))
+    return status()
+
+def start(modules):
+    """Start the warm-up on a daemon thread, once per process, and return the thread."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run_warmup, args=(list(modules),), name="navigate-warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+def freeze_heap():
+    """Collect garbage, then move every object left out of the garbage collector's reach with gc.freeze.
+
+    The warmed modules, tables and kernels live as long as the process, and without this every full
+    collection rescans them, which cost 100 ms or more on most reruns. gc.freeze is process-wide:
+    it also freezes any session state alive at the time, and frozen objects that later become
+    cyclic garbage are never freed. So it is only called before the server starts, by serve.py.
+    """
+    gc.collect()
+    gc.freeze()
+
+def status():
+    """Return a copy of the warm-up progress and timings."""
+    with _lock:
+        return {**_status, "tasks": [dict(task) for task in _status["tasks"]]}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(run_warmup(TOOL_MODULES), indent=2))